@@ -0,0 +1,210 @@
+"""Асинхронный клиент курсов валют ЦБ РФ с опросом нескольких источников.
+
+:func:`aget_currencies` параллельно запрашивает основной адрес API и
+зеркала, ограничивая число одновременных запросов, и возвращает
+результат по одной из стратегий:
+
+* ``"first"`` — первый успешный ответ, остальные запросы отменяются;
+* ``"quorum"`` — ждать ``quorum`` успешных ответов и вернуть медиану
+  курсов по каждой валюте.
+
+Разбор и проверка ответа общие с синхронным :func:`get_currencies`
+(:meth:`logging_utils.RatesSnapshot.from_payload` и
+:meth:`~logging_utils.RatesSnapshot.select`).
+HTTP-запросы выполняются на ``asyncio`` streams, без сторонних библиотек.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ssl
+import statistics
+from typing import Iterable, Sequence
+from urllib.parse import urlsplit
+
+from logging_utils import CBR_DAILY_URL, RatesSnapshot
+
+MODES = ("first", "quorum")
+USER_AGENT = "lab7-async-currencies/1.0"
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    """Прочитать тело ответа с ``Transfer-Encoding: chunked``."""
+    chunks = []
+    while True:
+        size_line = await reader.readline()
+        size = int(size_line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+async def http_get(url: str) -> bytes:
+    """
+    Выполнить GET-запрос и вернуть тело ответа ``200``.
+
+    Поддерживаются ``http``/``https``, ``Content-Length`` и ``chunked``.
+    Любая сетевая ошибка или статус, отличный от 200, превращается в
+    ``ConnectionError`` — как в синхронном клиенте.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ConnectionError(
+            f"Ошибка при запросе к API: неверный URL {url!r}")
+
+    https = parts.scheme == "https"
+    port = parts.port or (443 if https else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target += f"?{parts.query}"
+    host_header = parts.hostname if parts.port is None \
+        else f"{parts.hostname}:{parts.port}"
+
+    writer = None
+    try:
+        reader, writer = await asyncio.open_connection(
+            parts.hostname, port,
+            ssl=ssl.create_default_context() if https else None)
+        writer.write(
+            f"GET {target} HTTP/1.1\r\n"
+            f"Host: {host_header}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            "Accept: application/json\r\n"
+            "Accept-Encoding: identity\r\n"
+            "Connection: close\r\n\r\n".encode("ascii"))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        try:
+            status = int(status_line.split()[1])
+        except IndexError as e:
+            raise ValueError(
+                f"некорректная строка статуса {status_line!r}") from e
+
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            body = await _read_chunked(reader)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+    except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+        raise ConnectionError(f"Ошибка при запросе к API: {e}") from e
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if status != 200:
+        raise ConnectionError(f"Ошибка при запросе к API: HTTP {status}")
+    return body
+
+
+async def _fetch_rates(url: str, codes: Sequence[str], timeout: float,
+                       semaphore: asyncio.Semaphore) -> dict[str, float]:
+    async with semaphore:
+        try:
+            body = await asyncio.wait_for(http_get(url), timeout)
+        except asyncio.TimeoutError as e:
+            raise ConnectionError(
+                f"Ошибка при запросе к API: таймаут {timeout} с ({url})"
+            ) from e
+    return RatesSnapshot.from_payload(body).select(codes)
+
+
+def _combined_error(errors: list[Exception]) -> Exception:
+    """Ошибка, которой завершается вызов, если источники не ответили."""
+    if all(type(e) is type(errors[0]) for e in errors):
+        return errors[0]
+    details = "; ".join(f"{type(e).__name__}: {e}" for e in errors)
+    return ConnectionError(f"Ни один источник не вернул курсы: {details}")
+
+
+async def aget_currencies(
+        currency_codes: Iterable[str],
+        sources: Sequence[str] = (CBR_DAILY_URL,),
+        timeout: float = 5.0,
+        mode: str = "first",
+        quorum: int = 2,
+        max_concurrency: int = 4,
+) -> dict[str, float]:
+    """
+    Асинхронно получить курсы валют из одного или нескольких источников.
+
+    Параметры
+    ---------
+    currency_codes:
+        Символьные коды валют (например, ``['USD', 'EUR']``).
+    sources:
+        URL основного API и зеркал в формате ``daily_json.js``.
+    timeout:
+        Таймаут одного источника в секундах (без учёта ожидания
+        свободного слота).
+    mode:
+        ``"first"`` — первый успешный ответ; ``"quorum"`` — медиана
+        по ``quorum`` успешным ответам.
+    quorum:
+        Сколько успешных ответов нужно в режиме ``"quorum"``.
+    max_concurrency:
+        Максимальное число одновременных запросов.
+
+    Возвращает
+    ----------
+    dict[str, float]
+        Словарь вида ``{"USD": 93.25, "EUR": 101.7}``.
+
+    Исключения
+    ----------
+    Если нужного числа успешных ответов не набралось: при однотипных
+    ошибках источников пробрасывается первая из них (``ConnectionError``,
+    ``ValueError``, ``KeyError``, ``TypeError`` — как у
+    :func:`get_currencies`), иначе ``ConnectionError`` с перечнем ошибок.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    if not sources:
+        raise ValueError("at least one source is required")
+    needed = 1 if mode == "first" else quorum
+    if not 1 <= needed <= len(sources):
+        raise ValueError(
+            f"quorum must be between 1 and {len(sources)}, got {quorum}")
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be >= 1")
+
+    codes = list(currency_codes)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = [asyncio.ensure_future(_fetch_rates(url, codes, timeout,
+                                                semaphore))
+             for url in sources]
+
+    results: list[dict[str, float]] = []
+    errors: list[Exception] = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                results.append(await next_done)
+            except Exception as e:
+                errors.append(e)
+                if len(sources) - len(errors) < needed:
+                    raise _combined_error(errors)
+                continue
+            if len(results) >= needed:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if mode == "first":
+        return results[0]
+    return {code: statistics.median(r[code] for r in results)
+            for code in codes}
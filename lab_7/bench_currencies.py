@@ -0,0 +1,180 @@
+"""Бенчмарки получения курсов валют на локальном stub-сервере ЦБ РФ.
+
+Запуск:
+    python bench_currencies.py
+
+Сеть не нужна: все запросы идут к ``cbr_stub.StubCbrServer``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import json
+import threading
+import time
+
+import requests
+
+import logging_utils
+from async_currencies import aget_currencies
+from cbr_stub import StubCbrServer, make_payload, make_valute
+from logging_utils import (
+    RatesCache,
+    RatesSnapshot,
+    get_cached_currencies,
+    get_currencies,
+)
+from rates_history import RatesArchive, download_history
+
+CODES = ["USD", "EUR"]
+
+
+def _per_call_ms(func, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def bench_session(calls: int = 300) -> None:
+    """Новое соединение на вызов vs общая сессия vs сессия + 304."""
+    print(f"{'режим':<34}{'мс/вызов':>10}{'соединений':>12}")
+
+    with StubCbrServer(conditional=False) as server:
+        def fresh_connection():
+            response = requests.get(server.url, timeout=5)
+            response.raise_for_status()
+            RatesSnapshot.from_payload(response.content).select(CODES)
+
+        ms = _per_call_ms(fresh_connection, calls)
+        print(f"{'requests.get на каждый вызов':<34}{ms:>10.3f}"
+              f"{len(set(server.client_ports)):>12}")
+
+    with StubCbrServer(conditional=False) as server:
+        ms = _per_call_ms(lambda: get_currencies(CODES, url=server.url),
+                          calls)
+        print(f"{'общая Session (keep-alive)':<34}{ms:>10.3f}"
+              f"{len(set(server.client_ports)):>12}")
+
+    with StubCbrServer() as server:
+        ms = _per_call_ms(lambda: get_currencies(CODES, url=server.url),
+                          calls)
+        print(f"{'Session + ETag/304':<34}{ms:>10.3f}"
+              f"{len(set(server.client_ports)):>12}"
+              f"   (304: {server.not_modified} из {server.requests})")
+    logging_utils._conditional_cache.clear()
+
+
+def bench_snapshot(calls: int = 20_000) -> None:
+    """Разбор ответа на каждый вызов vs выборка из общего снимка."""
+    body = json.dumps(make_payload(), ensure_ascii=False).encode("utf-8")
+    snapshot = RatesSnapshot.from_payload(body)
+
+    ms = _per_call_ms(
+        lambda: RatesSnapshot.from_payload(body).select(CODES), calls)
+    print(f"разбор JSON на вызов:         {ms * 1000:8.2f} мкс")
+    ms = _per_call_ms(lambda: snapshot.select(CODES), calls)
+    print(f"RatesSnapshot.select:         {ms * 1000:8.2f} мкс")
+
+
+def bench_cache(calls: int = 1000, threads: int = 16,
+                delay: float = 0.05) -> None:
+    """Вызовы через RatesCache и одновременные промахи (single-flight)."""
+    with StubCbrServer(delay=delay) as server:
+        cache = RatesCache(ttl=60)
+        ms = _per_call_ms(
+            lambda: get_cached_currencies(CODES, url=server.url, cache=cache),
+            calls)
+        print(f"последовательно, {calls} вызовов: {ms * 1000:.1f} мкс/вызов,"
+              f" запросов к API: {server.requests}, {cache.stats()}")
+
+    with StubCbrServer(delay=delay) as server:
+        cache = RatesCache(ttl=60)
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            barrier.wait()
+            get_cached_currencies(CODES, url=server.url, cache=cache)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{threads} одновременных промахов: {elapsed:.0f} мс, "
+              f"запросов к API: {server.requests}")
+
+
+def bench_multi_source(sources: int = 4, delay: float = 0.1) -> None:
+    """Последовательный опрос источников vs asyncio first/quorum."""
+    servers = [StubCbrServer(delay=delay).start() for _ in range(sources)]
+    urls = [server.url for server in servers]
+    try:
+        start = time.perf_counter()
+        for url in urls:
+            get_currencies(CODES, url=url)
+        sequential = (time.perf_counter() - start) * 1000
+        print(f"sync, по очереди {sources} источника: {sequential:.0f} мс")
+
+        for mode, quorum in (("first", 1), ("quorum", sources - 1)):
+            start = time.perf_counter()
+            asyncio.run(aget_currencies(CODES, sources=urls, mode=mode,
+                                        quorum=quorum))
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"aget_currencies mode={mode!r}, quorum={quorum}: "
+                  f"{elapsed:.0f} мс")
+    finally:
+        for server in servers:
+            server.stop()
+        logging_utils._conditional_cache.clear()
+
+
+def bench_history(days: int = 120, delay: float = 0.01) -> None:
+    """Загрузка архива за период при разном числе потоков и повторный запуск."""
+    start = dt.date(2023, 1, 1)
+    archive_files = {
+        f"{day:%Y/%m/%d}": make_payload(make_valute(), day.isoformat())
+        for day in (start + dt.timedelta(days=i) for i in range(days))
+        if day.weekday() < 5
+    }
+    end = start + dt.timedelta(days=days - 1)
+
+    with StubCbrServer(archive=archive_files, delay=delay) as server:
+        for workers in (1, 4, 8):
+            with RatesArchive(":memory:") as archive:
+                t0 = time.perf_counter()
+                download_history(start, end, archive, max_workers=workers,
+                                 url_template=server.archive_url_template)
+                elapsed = (time.perf_counter() - t0) * 1000
+            print(f"{days} дней, max_workers={workers}: {elapsed:.0f} мс")
+
+        with RatesArchive(":memory:") as archive:
+            download_history(start, end, archive,
+                             url_template=server.archive_url_template)
+            requests_before = server.requests
+            t0 = time.perf_counter()
+            download_history(start, end, archive,
+                             url_template=server.archive_url_template)
+            elapsed = (time.perf_counter() - t0) * 1000
+            print(f"повторный запуск: {elapsed:.1f} мс, запросов к API: "
+                  f"{server.requests - requests_before}")
+
+
+def main() -> None:
+    print("== Соединения и условные запросы ==")
+    bench_session()
+    print("\n== Разобранный снимок курсов ==")
+    bench_snapshot()
+    print("\n== TTL-кэш курсов ==")
+    bench_cache()
+    print("\n== Несколько источников: sync vs asyncio ==")
+    bench_multi_source()
+    print("\n== Загрузка архива курсов ==")
+    bench_history()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Микробенчмарки накладных расходов декоратора ``logger``.
+
+Запуск:
+    python bench_logging.py
+
+Печатает время одного вызова (в наносекундах) для функции без декоратора
+и для задекорированной функции при разных уровнях логгера.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+from logging_utils import (
+    LOG_FORMAT,
+    OVERFLOW_POLICIES,
+    QueuedLogging,
+    ReprPolicy,
+    logger,
+    quad_logger,
+    solve_quadratic,
+)
+from quadratic_batch import solve_quadratic_batch
+
+NUMBER = 200_000
+REPEAT = 5
+
+PAYLOAD = {f"key_{i}": list(range(20)) for i in range(200)}
+
+
+def _per_call_ns(func, *args) -> float:
+    """Минимальное по повторам время одного вызова ``func(*args)`` в нс."""
+    times = timeit.repeat(lambda: func(*args), number=NUMBER, repeat=REPEAT)
+    return min(times) / NUMBER * 1e9
+
+
+def bench_levels() -> None:
+    """Декорированный no-op при уровнях DEBUG/INFO/WARNING/ERROR."""
+    log = logging.getLogger("bench.levels")
+    log.propagate = False
+    log.addHandler(logging.StreamHandler(open(os.devnull, "w")))
+
+    def noop(value):
+        return value
+
+    decorated = logger(noop, handle=log)
+
+    print(f"{'уровень':<10}{'no-op, нс':>14}{'dict, нс':>14}")
+    print(f"{'(без)':<10}{_per_call_ns(noop, 1):>14.0f}"
+          f"{_per_call_ns(noop, PAYLOAD):>14.0f}")
+    for level in (logging.DEBUG, logging.INFO, logging.WARNING,
+                  logging.ERROR):
+        log.setLevel(level)
+        print(f"{logging.getLevelName(level):<10}"
+              f"{_per_call_ns(decorated, 1):>14.0f}"
+              f"{_per_call_ns(decorated, PAYLOAD):>14.0f}")
+
+
+def bench_repr_policy() -> None:
+    """Время вызова и длина лога для крупных данных при разных политиках."""
+    payloads = {
+        "bytes 4 МБ": b"\x00" * (4 * 1024 * 1024),
+        "dict 100k": {f"key_{i}": i for i in range(100_000)},
+        "list 1M": list(range(1_000_000)),
+    }
+    policies = {
+        "полный repr": None,
+        "по умолчанию": ReprPolicy(),
+        "со сводкой": ReprPolicy(summary_threshold=1000),
+    }
+
+    print(f"{'данные':<14}{'политика':<16}{'мкс/вызов':>12}{'байт лога':>12}")
+    for payload_name, payload in payloads.items():
+        for policy_name, policy in policies.items():
+            stream = io.StringIO()
+
+            @logger(handle=stream, repr_policy=policy)
+            def identity(value):
+                return value
+
+            number = 5
+            sec = min(timeit.repeat(lambda: identity(payload),
+                                    number=number, repeat=3)) / number
+            size = len(stream.getvalue()) // (number * 3)
+            print(f"{payload_name:<14}{policy_name:<16}"
+                  f"{sec * 1e6:>12.0f}{size:>12}")
+
+
+def bench_timing() -> None:
+    """Стоимость timing=True для no-op при выключенном INFO."""
+    log = logging.getLogger("bench.timing")
+    log.propagate = False
+    log.setLevel(logging.WARNING)
+    log.addHandler(logging.NullHandler())
+
+    def noop(value):
+        return value
+
+    plain = logger(noop, handle=log)
+    timed = logger(noop, handle=log, timing=True)
+    summarized = logger(noop, handle=log, timing=True, summary_interval=1.0)
+
+    for label, func in (("timing=False", plain), ("timing=True", timed),
+                        ("summary_interval=1", summarized)):
+        print(f"{label:<22}{_per_call_ns(func, 1):>10.0f} нс")
+    print("stats():", timed.stats())
+
+
+class _CountingHandler(logging.Handler):
+    """Обработчик, который только считает записи."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records += 1
+
+
+def bench_sampling(calls: int = 20_000) -> None:
+    """Число записей и время вызова при сэмплировании в стиле quad_logger."""
+    print(f"{'режим':<22}{'записей/вызов':>15}{'мкс/вызов':>12}")
+    modes = {
+        "все вызовы": {},
+        "sample_every=10": {"sample_every": 10},
+        "sample_every=100": {"sample_every": 100},
+        "rate_limit=1000/с": {"rate_limit": 1000.0},
+    }
+    for label, options in modes.items():
+        log = logging.getLogger(f"bench.sampling.{label}")
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        counter = _CountingHandler()
+        log.addHandler(counter)
+
+        @logger(handle=log, **options)
+        def solve(a, b, c):
+            d = b * b - 4 * a * c
+            log.debug("Discriminant computed: %s", d)
+            return d
+
+        start = time.perf_counter()
+        for i in range(calls):
+            solve(1, i, 1)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<22}{counter.records / calls:>15.3f}"
+              f"{elapsed / calls * 1e6:>12.1f}")
+
+
+class _SlowFileHandler(logging.FileHandler):
+    """``FileHandler``, имитирующий медленный диск задержкой на запись."""
+
+    def __init__(self, filename: str, delay_sec: float) -> None:
+        super().__init__(filename, encoding="utf-8")
+        self.delay_sec = delay_sec
+
+    def emit(self, record: logging.LogRecord) -> None:
+        time.sleep(self.delay_sec)
+        super().emit(record)
+
+
+def bench_slow_disk(calls: int = 200, delay_sec: float = 0.001,
+                    queue_size: int = 1000) -> None:
+    """Задержка декорированного вызова при синхронной и очередной записи."""
+    print(f"задержка диска {delay_sec * 1000:.1f} мс на запись, "
+          f"вызовов: {calls}, очередь: {queue_size}")
+    print(f"{'режим':<20}{'p50, мкс':>10}{'max, мкс':>12}"
+          f"{'потеряно':>10}{'stop, мс':>10}")
+
+    modes = ["sync"] + [f"queued/{policy}" for policy in OVERFLOW_POLICIES]
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in modes:
+            log = logging.getLogger(f"bench.slow_disk.{mode}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            handler = _SlowFileHandler(os.path.join(tmp, "slow.log"),
+                                       delay_sec)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            log.addHandler(handler)
+
+            queued = None
+            if mode != "sync":
+                queued = QueuedLogging(log, maxsize=queue_size,
+                                       overflow=mode.split("/")[1])
+
+            @logger(handle=log)
+            def noop(value):
+                return value
+
+            latencies = []
+            for i in range(calls):
+                start = time.perf_counter()
+                noop(i)
+                latencies.append(time.perf_counter() - start)
+
+            stop_start = time.perf_counter()
+            dropped = 0
+            if queued is not None:
+                queued.stop()
+                dropped = queued.dropped
+            stop_ms = (time.perf_counter() - stop_start) * 1000
+
+            handler.close()
+            log.removeHandler(handler)
+            print(f"{mode:<20}{statistics.median(latencies) * 1e6:>10.0f}"
+                  f"{max(latencies) * 1e6:>12.0f}{dropped:>10}"
+                  f"{stop_ms:>10.0f}")
+
+
+_IMPORT_PROBE = """
+import os, time
+start = time.perf_counter()
+import logging_utils
+elapsed = time.perf_counter() - start
+print(elapsed, len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else -1)
+"""
+
+
+def bench_import(runs: int = 10) -> None:
+    """Время импорта logging_utils, число дескрипторов и созданные файлы."""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": module_dir}
+    times, fds = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE],
+                                 cwd=tmp, env=env, check=True,
+                                 capture_output=True, text=True).stdout
+            elapsed, fd_count = out.split()
+            times.append(float(elapsed))
+            fds.append(int(fd_count))
+        created = sorted(os.listdir(tmp))
+
+    print(f"импорт logging_utils: медиана {statistics.median(times) * 1e3:.1f}"
+          f" мс, открытых fd: {max(fds)}, созданные файлы: {created or '-'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for delay in (False, True):
+            def create():
+                handler = logging.FileHandler(
+                    os.path.join(tmp, "probe.log"), delay=delay)
+                handler.close()
+
+            per_call = min(timeit.repeat(create, number=200, repeat=5)) / 200
+            label = "ленивый (delay=True)" if delay else "сразу (delay=False)"
+            print(f"создание FileHandler, {label:<22}"
+                  f"{per_call * 1e6:>8.1f} мкс")
+
+
+def bench_quadratic_batch(scalar_calls: int = 20_000,
+                          batch_size: int = 1_000_000) -> None:
+    """solve_quadratic в цикле vs solve_quadratic_batch на массивах."""
+    rng = np.random.default_rng(0)
+    a = rng.uniform(0.5, 2.0, batch_size)
+    b = rng.uniform(-10.0, 10.0, batch_size)
+    c = rng.uniform(-5.0, 5.0, batch_size)
+
+    level = quad_logger.level
+    for label, quad_level in (("INFO", logging.INFO),
+                              ("WARNING", logging.WARNING)):
+        quad_logger.setLevel(quad_level)
+        triples = list(zip(a[:scalar_calls].tolist(),
+                           b[:scalar_calls].tolist(),
+                           c[:scalar_calls].tolist()))
+        start = time.perf_counter()
+        for triple in triples:
+            solve_quadratic(*triple)
+        per_eq = (time.perf_counter() - start) / scalar_calls
+        print(f"solve_quadratic, лог {label:<8}{per_eq * 1e9:>10.0f} нс/ур.")
+
+    quad_logger.setLevel(logging.INFO)
+    start = time.perf_counter()
+    solve_quadratic_batch(a, b, c)
+    per_eq = (time.perf_counter() - start) / batch_size
+    print(f"solve_quadratic_batch ({batch_size} ур.) {per_eq * 1e9:>6.1f}"
+          f" нс/ур.")
+    quad_logger.setLevel(level)
+
+
+def main() -> None:
+    print("== Накладные расходы logger по уровням ==")
+    bench_levels()
+    print("\n== Ограниченный repr для крупных данных ==")
+    bench_repr_policy()
+    print("\n== Гистограмма задержек (timing=True) ==")
+    bench_timing()
+    print("\n== Сэмплирование и ограничение частоты ==")
+    bench_sampling()
+    print("\n== Запись на медленный диск: FileHandler vs очередь ==")
+    bench_slow_disk()
+    print("\n== Стоимость импорта и ленивое открытие файлов ==")
+    bench_import()
+    print("\n== Квадратные уравнения: по одному vs пакетом NumPy ==")
+    bench_quadratic_batch()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Локальный stub-сервер API ЦБ РФ для тестов и бенчмарков.
+
+Отдаёт ``/daily_json.js`` в формате www.cbr-xml-daily.ru с заголовками
+``ETag``/``Last-Modified`` и отвечает ``304`` на условные запросы,
+а также архивные файлы ``/archive/YYYY/MM/DD/daily_json.js``.
+Сервер работает в фоновом потоке и не требует доступа к сети:
+
+    with StubCbrServer() as server:
+        get_currencies(["USD"], url=server.url)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+BASE_CODES = ("USD", "EUR", "GBP", "CNY", "JPY")
+
+
+def make_valute(extra: int = 40) -> dict[str, dict[str, Any]]:
+    """
+    Сформировать словарь ``Valute``: несколько реальных кодов плюс
+    ``extra`` синтетических валют, чтобы размер ответа был похож на
+    настоящий.
+    """
+    valute: dict[str, dict[str, Any]] = {}
+    codes = list(BASE_CODES) + [f"X{i:02d}" for i in range(extra)]
+    for index, code in enumerate(codes, start=1):
+        valute[code] = {
+            "ID": f"R{index:05d}",
+            "NumCode": f"{index:03d}",
+            "CharCode": code,
+            "Nominal": 1,
+            "Name": f"Валюта {code}",
+            "Value": 10.0 + index,
+            "Previous": 10.0 + index - 0.5,
+        }
+    return valute
+
+
+def make_payload(valute: dict[str, dict[str, Any]] | None = None,
+                 date: str = "2024-01-10T11:30:00+03:00") -> dict[str, Any]:
+    """Полный JSON-ответ ``daily_json.js`` вокруг словаря ``Valute``."""
+    return {
+        "Date": date,
+        "PreviousDate": date,
+        "PreviousURL": "//www.cbr-xml-daily.ru/archive/daily_json.js",
+        "Timestamp": date,
+        "Valute": valute if valute is not None else make_valute(),
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело пишутся отдельно: без TCP_NODELAY keep-alive
+    # соединение ловит задержку Nagle + delayed ACK (~40 мс на ответ).
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+    def do_GET(self) -> None:
+        stub: StubCbrServer = self.server.stub
+        stub.record_request(self.client_address, self.path)
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        if stub.fail_status:
+            self._send(stub.fail_status, b"error", "text/plain")
+            return
+
+        path = self.path.split("?", 1)[0]
+        if path in stub.fail_paths:
+            self._send(503, b"unavailable", "text/plain")
+            return
+
+        if path.startswith("/archive/"):
+            body = stub.archive_body(path)
+            if body is None:
+                self._send(404, b"not found", "text/plain")
+            else:
+                self._send(200, body, "application/javascript; charset=utf-8")
+            return
+
+        if path != "/daily_json.js":
+            self._send(404, b"not found", "text/plain")
+            return
+
+        body, etag, last_modified = stub.current()
+        if etag and self.headers.get("If-None-Match") == etag:
+            stub.not_modified += 1
+            self._send(304, b"", None, etag, last_modified)
+            return
+        self._send(200, body, "application/javascript; charset=utf-8",
+                   etag, last_modified)
+
+    def _send(self, status: int, body: bytes, content_type: str | None,
+              etag: str | None = None,
+              last_modified: str | None = None) -> None:
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        if last_modified:
+            self.send_header("Last-Modified", last_modified)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Не печатать трассировки, когда клиент сам оборвал соединение."""
+
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubCbrServer:
+    """
+    Stub-сервер API ЦБ РФ в фоновом потоке.
+
+    Атрибуты для проверок: ``requests`` — число запросов,
+    ``not_modified`` — сколько раз отдан ``304``, ``client_ports`` —
+    порты клиентов (по ним видно переиспользование соединений),
+    ``paths`` — запрошенные пути.
+    ``delay`` задаёт искусственную задержку ответа, ``fail_status`` —
+    HTTP-код ошибки, которым сервер отвечает на все запросы,
+    ``fail_paths`` — пути, на которые отвечает ``503``.
+
+    ``archive`` — словарь ``{"YYYY/MM/DD": payload}`` для архивных
+    файлов; для дат вне словаря сервер отвечает ``404``, как настоящий
+    API в выходные и праздники.
+    """
+
+    def __init__(self, payload: dict[str, Any] | None = None,
+                 conditional: bool = True, delay: float = 0.0,
+                 archive: dict[str, dict[str, Any]] | None = None,
+                 host: str = "127.0.0.1") -> None:
+        self.conditional = conditional
+        self.delay = delay
+        self.fail_status = 0
+        self.fail_paths: set[str] = set()
+        self.archive = archive or {}
+        self.requests = 0
+        self.not_modified = 0
+        self.client_ports: list[int] = []
+        self.paths: list[str] = []
+        self._lock = threading.Lock()
+        self._httpd = _QuietHTTPServer((host, 0), _StubHandler)
+        self._httpd.stub = self
+        self._thread: threading.Thread | None = None
+        self.set_payload(payload if payload is not None else make_payload())
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        """URL ``daily_json.js`` на stub-сервере."""
+        return f"{self.base_url}/daily_json.js"
+
+    @property
+    def archive_url_template(self) -> str:
+        """Шаблон URL архивного файла для ``str.format(date=...)``."""
+        return f"{self.base_url}/archive/{{date:%Y/%m/%d}}/daily_json.js"
+
+    def archive_body(self, path: str) -> bytes | None:
+        """Тело архивного файла для пути ``/archive/YYYY/MM/DD/...``."""
+        key = path[len("/archive/"):].rsplit("/", 1)[0]
+        payload = self.archive.get(key)
+        if payload is None:
+            return None
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    def set_payload(self, payload: dict[str, Any]) -> None:
+        """Подменить отдаваемые данные (меняет и ETag)."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        etag = last_modified = None
+        if self.conditional:
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            last_modified = formatdate(usegmt=True)
+        with self._lock:
+            self._current = (body, etag, last_modified)
+
+    def current(self) -> tuple[bytes, str | None, str | None]:
+        with self._lock:
+            return self._current
+
+    def record_request(self, client_address: tuple, path: str = "") -> None:
+        with self._lock:
+            self.requests += 1
+            self.client_ports.append(client_address[1])
+            self.paths.append(path)
+
+    def start(self) -> StubCbrServer:
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        kwargs={"poll_interval": 0.05},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> StubCbrServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
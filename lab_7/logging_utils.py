@@ -1,19 +1,396 @@
 from __future__ import annotations
 
+import atexit
+import contextvars
 import functools
+import hashlib
+import inspect
+import itertools
+import json
 import logging
+import logging.handlers
 import math
+import os
+import queue
+import reprlib
 import sys
+import threading
+import time
 from typing import Any, Callable, Iterable, TextIO
 
 import requests
+import requests.adapters
 
 LoggerOrStream = logging.Logger | TextIO
 FuncType = Callable[..., Any]
 
+CBR_DAILY_URL = "https://www.cbr-xml-daily.ru/daily_json.js"
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+RATES_TTL = 3600.0
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop")
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_BYTES_TYPES = (bytes, bytearray, memoryview)
+_COLLECTION_TYPES = (list, tuple, dict, set, frozenset)
+
+
+class ReprPolicy:
+    """
+    Политика ограниченного ``repr`` для аргументов и результатов в логах.
+
+    Построена на :class:`reprlib.Repr`: вложенные контейнеры обрезаются
+    по глубине и числу элементов, строки и байты — по длине ещё до
+    вызова ``repr``. Итоговая строка для одного значения никогда не
+    длиннее ``max_length`` символов, поэтому объём лога и время
+    форматирования не зависят от размера данных.
+
+    Параметры
+    ---------
+    max_length:
+        Максимальная длина представления одного значения.
+    max_depth:
+        Максимальная глубина вложенности контейнеров.
+    max_items:
+        Максимальное число выводимых элементов контейнера.
+    summary_threshold:
+        Если задан, байтовые строки и коллекции длиннее порога
+        заменяются сводкой вида ``<dict len=100000>``.
+    hash_bytes:
+        Добавлять ли в сводку байтов префикс SHA-256 (стоит O(n)).
+    """
+
+    def __init__(self, max_length: int = 500, max_depth: int = 3,
+                 max_items: int = 20, summary_threshold: int | None = None,
+                 hash_bytes: bool = False) -> None:
+        if max_length < 4:
+            raise ValueError("max_length must be at least 4")
+        self.max_length = max_length
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.summary_threshold = summary_threshold
+        self.hash_bytes = hash_bytes
+        self._repr = _BoundedRepr(self)
+
+    def __call__(self, value: Any) -> str:
+        """Вернуть ограниченное представление одного значения."""
+        return self.truncate(self._repr.repr(value))
+
+    def truncate(self, text: str) -> str:
+        """Обрезать строку до ``max_length`` символов."""
+        if len(text) <= self.max_length:
+            return text
+        return text[:self.max_length - 3] + "..."
+
+    def summarize(self, value: Any) -> str | None:
+        """Вернуть сводку для крупного значения или ``None``."""
+        threshold = self.summary_threshold
+        if threshold is None:
+            return None
+        if isinstance(value, _BYTES_TYPES):
+            size = value.nbytes if isinstance(value, memoryview) \
+                else len(value)
+            if size <= threshold:
+                return None
+            summary = f"<{type(value).__name__} len={size}"
+            if self.hash_bytes:
+                digest = hashlib.sha256(value).hexdigest()[:16]
+                summary += f" sha256={digest}"
+            return summary + ">"
+        if isinstance(value, _COLLECTION_TYPES) and len(value) > threshold:
+            return f"<{type(value).__name__} len={len(value)}>"
+        return None
+
+    def repr_args(self, args: tuple) -> str:
+        """Представление кортежа позиционных аргументов."""
+        parts = [self(arg) for arg in args[:self.max_items]]
+        if len(args) > self.max_items:
+            parts.append("...")
+        if len(args) == 1:
+            return f"({parts[0]},)"
+        return f"({', '.join(parts)})"
+
+    def repr_kwargs(self, kwargs: dict[str, Any]) -> str:
+        """Представление словаря именованных аргументов."""
+        items = list(kwargs.items())
+        parts = [f"{key!r}: {self(value)}"
+                 for key, value in items[:self.max_items]]
+        if len(items) > self.max_items:
+            parts.append("...")
+        return f"{{{', '.join(parts)}}}"
+
+
+class _BoundedRepr(reprlib.Repr):
+    """``reprlib.Repr`` с лимитами из :class:`ReprPolicy` и сводками."""
+
+    def __init__(self, policy: ReprPolicy) -> None:
+        super().__init__()
+        self._policy = policy
+        self.maxlevel = policy.max_depth
+        for attr in ("maxtuple", "maxlist", "maxarray", "maxdict",
+                     "maxset", "maxfrozenset", "maxdeque"):
+            setattr(self, attr, policy.max_items)
+        self.maxstring = self.maxlong = self.maxother = policy.max_length
+
+    def repr1(self, x: Any, level: int) -> str:
+        summary = self._policy.summarize(x)
+        if summary is not None:
+            return summary
+        return super().repr1(x, level)
+
+    def repr_bytes(self, x: bytes, level: int) -> str:
+        if len(x) <= self.maxstring:
+            return repr(x)
+        return repr(x[:self.maxstring]) + "..."
+
+    repr_bytearray = repr_bytes
+
+    def repr_dict(self, x: dict, level: int) -> str:
+        # В отличие от reprlib, ключи не сортируются: это O(n log n)
+        # на весь словарь, а порядок вставки совпадает со встроенным repr.
+        if not x:
+            return "{}"
+        if level <= 0:
+            return "{...}"
+        pieces = [
+            f"{self.repr1(key, level - 1)}: {self.repr1(value, level - 1)}"
+            for key, value in itertools.islice(x.items(), self.maxdict)
+        ]
+        if len(x) > self.maxdict:
+            pieces.append("...")
+        return f"{{{', '.join(pieces)}}}"
+
+
+class _LazyRepr:
+    """Откладывает форматирование значения до момента записи в лог."""
+
+    __slots__ = ("_render", "_value")
+
+    def __init__(self, render: Callable[[Any], str], value: Any) -> None:
+        self._render = render
+        self._value = value
+
+    def __str__(self) -> str:
+        return self._render(self._value)
+
+    __repr__ = __str__
+
+
+DEFAULT_REPR_POLICY = ReprPolicy()
+
+_HIST_SUB_BITS = 4
+_HIST_SUB = 1 << _HIST_SUB_BITS
+_HIST_BUCKETS = 64 * _HIST_SUB
+
+
+def _bucket_index(ns: int) -> int:
+    """Номер корзины лог-линейной гистограммы для длительности в нс."""
+    if ns < 2 * _HIST_SUB:
+        return ns if ns > 0 else 0
+    shift = ns.bit_length() - _HIST_SUB_BITS - 1
+    return shift * _HIST_SUB + (ns >> shift)
+
+
+def _bucket_upper(index: int) -> int:
+    """Верхняя граница (включительно) корзины с номером ``index``."""
+    if index < 2 * _HIST_SUB:
+        return index
+    shift = index // _HIST_SUB - 1
+    mantissa = index - shift * _HIST_SUB
+    return ((mantissa + 1) << shift) - 1
+
+
+class _HistogramShard:
+    """Часть гистограммы, в которую пишет только один поток."""
+
+    __slots__ = ("counts", "max_ns")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _HIST_BUCKETS
+        self.max_ns = 0
+
+
+class LatencyHistogram:
+    """
+    Гистограмма длительностей вызовов с низкими накладными расходами.
+
+    Длительности (в наносекундах) раскладываются по лог-линейным корзинам:
+    16 корзин на каждую степень двойки, т.е. относительная погрешность
+    перцентилей не больше 1/16. У каждого потока своя копия счётчиков
+    (``threading.local``), поэтому :meth:`record` не берёт блокировок;
+    :meth:`stats` суммирует копии всех потоков.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: list[_HistogramShard] = []
+        self._shards_lock = threading.Lock()
+
+    def _new_shard(self) -> _HistogramShard:
+        shard = _HistogramShard()
+        self._local.shard = shard
+        with self._shards_lock:
+            self._shards.append(shard)
+        return shard
+
+    def record(self, ns: int) -> None:
+        """Учесть одну длительность в наносекундах."""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard.counts[_bucket_index(ns)] += 1
+        if ns > shard.max_ns:
+            shard.max_ns = ns
+
+    def stats(self) -> dict[str, int]:
+        """
+        Вернуть сводку: ``count``, ``p50``, ``p95``, ``p99``, ``max``.
+
+        Перцентили и максимум — в наносекундах; перцентиль равен верхней
+        границе корзины, в которую он попал.
+        """
+        with self._shards_lock:
+            shards = list(self._shards)
+
+        counts = [0] * _HIST_BUCKETS
+        max_ns = 0
+        for shard in shards:
+            for index, value in enumerate(shard.counts):
+                if value:
+                    counts[index] += value
+            max_ns = max(max_ns, shard.max_ns)
+
+        total = sum(counts)
+        result = {"count": total, "p50": 0, "p95": 0, "p99": 0,
+                  "max": max_ns}
+        if not total:
+            return result
+
+        targets = [("p50", 0.50), ("p95", 0.95), ("p99", 0.99)]
+        seen = 0
+        for index, value in enumerate(counts):
+            if not value:
+                continue
+            seen += value
+            while targets and seen >= targets[0][1] * total:
+                key, _ = targets.pop(0)
+                result[key] = min(_bucket_upper(index), max_ns)
+            if not targets:
+                break
+        return result
+
+    def reset(self) -> None:
+        """Обнулить накопленные данные всех потоков."""
+        with self._shards_lock:
+            self._shards = []
+            self._local = threading.local()
+
+
+_call_suppressed: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "logger_call_suppressed", default=False)
+
+
+class SuppressedCallFilter(logging.Filter):
+    """
+    Фильтр логгера: отбрасывает записи ниже ERROR, сделанные внутри
+    вызова, который не попал в выборку :class:`CallSampler`.
+
+    Так сэмплирование распространяется и на записи, которые функция
+    пишет сама (например, DEBUG/WARNING в ``solve_quadratic``).
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.ERROR or not _call_suppressed.get()
+
+
+class CallSampler:
+    """
+    Решает, логировать ли очередной вызов декорированной функции.
+
+    Вызов логируется, если он проходит оба ограничения:
+
+    * сэмплирование — каждый ``sample_every``-й вызов;
+    * token bucket — не больше ``rate_limit`` вызовов в секунду
+      с запасом ``burst``.
+
+    Пропущенные вызовы считаются; :meth:`take_report` раз в
+    ``report_interval`` секунд отдаёт их число для сводной записи.
+    """
+
+    def __init__(self, sample_every: int = 1,
+                 rate_limit: float | None = None, burst: int | None = None,
+                 report_interval: float = 60.0) -> None:
+        if sample_every < 1:
+            raise ValueError("sample_every must be >= 1")
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError("rate_limit must be positive")
+        self.sample_every = sample_every
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else \
+            max(1, int(rate_limit or 1))
+        self.report_interval = report_interval
+        self.suppressed = 0
+
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._pending = 0
+        self._next_report = time.monotonic() + report_interval
+
+    def admit(self) -> bool:
+        """Вернуть ``True``, если текущий вызов нужно залогировать."""
+        if self.sample_every > 1 and next(self._counter) % self.sample_every:
+            self._suppress()
+            return False
+        if self.rate_limit is None:
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._refilled_at) * self.rate_limit)
+            self._refilled_at = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            self.suppressed += 1
+            self._pending += 1
+        return False
+
+    def _suppress(self) -> None:
+        with self._lock:
+            self.suppressed += 1
+            self._pending += 1
+
+    def take_report(self) -> int:
+        """
+        Вернуть число пропущенных вызовов с прошлой сводки, если пора её
+        писать, иначе 0.
+        """
+        now = time.monotonic()
+        if now < self._next_report:
+            return 0
+        with self._lock:
+            if now < self._next_report:
+                return 0
+            self._next_report = now + self.report_interval
+            pending, self._pending = self._pending, 0
+        return pending
+
 
 def logger(func: FuncType | None = None, *,
-           handle: LoggerOrStream = sys.stdout) -> FuncType:
+           handle: LoggerOrStream = sys.stdout,
+           repr_policy: ReprPolicy | None = DEFAULT_REPR_POLICY,
+           timing: bool = False,
+           summary_interval: float | None = None,
+           sample_every: int = 1,
+           rate_limit: float | None = None,
+           burst: int | None = None,
+           suppressed_report_interval: float = 60.0) -> FuncType:
     """
     Декоратор для логирования вызовов функций.
 
@@ -41,34 +418,283 @@ def logger(func: FuncType | None = None, *,
 
     Параметризуемый декоратор: может использоваться как
     ``@logger`` и как ``@logger(handle=...)``.
+
+    Если ``handle`` — ``logging.Logger``, уровень проверяется через
+    ``isEnabledFor`` один раз на вызов, а сообщения передаются логгеру
+    в ``%``-стиле. Поэтому при выключенном уровне INFO ``repr`` аргументов
+    и результата не вычисляется вовсе.
+
+    Аргументы и результат форматируются через ``repr_policy``
+    (см. :class:`ReprPolicy`), так что длина строки лога ограничена
+    независимо от размера данных. ``repr_policy=None`` возвращает
+    полный ``repr`` без ограничений.
+
+    Корутинные функции, генераторы и асинхронные генераторы
+    оборачиваются с сохранением своей природы: старт логируется при
+    фактическом запуске тела, завершение — после ``await`` или
+    исчерпания генератора, элементы не буферизуются.
+
+    ``timing=True`` измеряет каждый вызов через ``perf_counter_ns`` и
+    копит длительности в :class:`LatencyHistogram`; сводка доступна как
+    ``wrapper.stats()``. Если дополнительно задан ``summary_interval``
+    (в секундах), построчные INFO-записи о вызовах отключаются, и вместо
+    них не чаще раза в интервал пишется сводка по задержкам. Ошибки
+    логируются всегда.
+
+    Для часто вызываемых функций есть выборочное логирование
+    (см. :class:`CallSampler`): ``sample_every=N`` пишет каждый N-й вызов,
+    ``rate_limit``/``burst`` ограничивают число залогированных вызовов в
+    секунду. Ошибки пишутся всегда, а число пропущенных вызовов
+    выводится сводкой раз в ``suppressed_report_interval`` секунд. Если
+    ``handle`` — логгер, на него ставится :class:`SuppressedCallFilter`,
+    и записи ниже ERROR внутри пропущенного вызова тоже отбрасываются
+    (у генераторов — записи из их тела, но не из кода потребителя).
     """
+    if summary_interval is not None and not timing:
+        raise ValueError("summary_interval requires timing=True")
+
+    if repr_policy is None:
+        render_args = render_kwargs = str
+        render_value = repr
+        render_error = str
+    else:
+        render_args = repr_policy.repr_args
+        render_kwargs = repr_policy.repr_kwargs
+        render_value = repr_policy
+
+        def render_error(exc: Exception) -> str:
+            return repr_policy.truncate(str(exc))
+
+    sampling = sample_every > 1 or rate_limit is not None
+    if sampling and isinstance(handle, logging.Logger) and not any(
+            isinstance(f, SuppressedCallFilter) for f in handle.filters):
+        handle.addFilter(SuppressedCallFilter())
 
     def _decorate(fn: FuncType) -> FuncType:
+        name = fn.__name__
+        sampler = CallSampler(sample_every, rate_limit, burst,
+                              suppressed_report_interval) if sampling else None
+
         if isinstance(handle, logging.Logger):
             info = handle.info
             error = handle.error
+            is_enabled = handle.isEnabledFor
         else:
 
-            def info(message: str) -> None:
-                handle.write(f"INFO: {message}\n")
+            def info(message: str, *args: Any) -> None:
+                handle.write(f"INFO: {message % args}\n")
+
+            def error(message: str, *args: Any) -> None:
+                handle.write(f"ERROR: {message % args}\n")
+
+            def is_enabled(level: int) -> bool:
+                return True
+
+        per_call = summary_interval is None
+        histogram = LatencyHistogram() if timing else None
+        interval_ns = int((summary_interval or 0) * 1e9)
+        next_summary_ns = [time.perf_counter_ns() + interval_ns]
+        summary_lock = threading.Lock()
+
+        def admit() -> bool:
+            return sampler is None or sampler.admit()
+
+        # Генератор выполняется в контексте того, кто его итерирует, и
+        # между шагами управление у потребителя. Поэтому для невыбранного
+        # вызова флаг _call_suppressed ставится только на время каждого
+        # шага исходного генератора, а не на всю итерацию.
+        def suppress(sampled: bool) -> contextvars.Token | None:
+            return None if sampled else _call_suppressed.set(True)
+
+        def restore(token: contextvars.Token | None) -> None:
+            if token is not None:
+                _call_suppressed.reset(token)
+
+        def report_suppressed() -> None:
+            suppressed = sampler.take_report()
+            if suppressed and is_enabled(logging.INFO):
+                info("%s: %d calls not logged (sampling)", name, suppressed)
+
+        def log_call(args: tuple, kwargs: dict[str, Any],
+                     sampled: bool = True) -> bool:
+            info_enabled = per_call and sampled and is_enabled(logging.INFO)
+            if info_enabled:
+                info("Calling %s with args=%s, kwargs=%s", name,
+                     _LazyRepr(render_args, args),
+                     _LazyRepr(render_kwargs, kwargs))
+            return info_enabled
+
+        def log_error(e: Exception) -> None:
+            if is_enabled(logging.ERROR):
+                error("Function %s raised %s: %s",
+                      name, type(e).__name__, _LazyRepr(render_error, e))
+
+        def log_result(result: Any) -> None:
+            info("%s returned %s", name, _LazyRepr(render_value, result))
+
+        def log_summary() -> None:
+            if is_enabled(logging.INFO):
+                stats = histogram.stats()
+                info("%s latency: count=%d p50=%dns p95=%dns p99=%dns "
+                     "max=%dns", name, stats["count"], stats["p50"],
+                     stats["p95"], stats["p99"], stats["max"])
+
+        def record_timing(start_ns: int) -> None:
+            now = time.perf_counter_ns()
+            histogram.record(now - start_ns)
+            if per_call or now < next_summary_ns[0]:
+                return
+            if summary_lock.acquire(blocking=False):
+                try:
+                    if now >= next_summary_ns[0]:
+                        next_summary_ns[0] = now + interval_ns
+                        log_summary()
+                finally:
+                    summary_lock.release()
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                sampled = admit()
+                info_enabled = log_call(args, kwargs, sampled)
+                token = None if sampled else _call_suppressed.set(True)
+                start_ns = time.perf_counter_ns() if timing else 0
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as e:
+                    log_error(e)
+                    raise
+                finally:
+                    if token is not None:
+                        _call_suppressed.reset(token)
+                    if timing:
+                        record_timing(start_ns)
+                    if sampler is not None:
+                        report_suppressed()
+                if info_enabled:
+                    log_result(result)
+                return result
+
+        elif inspect.isasyncgenfunction(fn):
+
+            @functools.wraps(fn)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                sampled = admit()
+                info_enabled = log_call(args, kwargs, sampled)
+                start_ns = time.perf_counter_ns() if timing else 0
+                agen = fn(*args, **kwargs)
+                # Ручная делегация по PEP 525 (аналог ``yield from``):
+                # значения asend() и исключения athrow() передаются в
+                # исходный генератор, а не обрабатываются обёрткой.
+                step, value = agen.asend, None
+                try:
+                    while True:
+                        token = suppress(sampled)
+                        try:
+                            item = await step(value)
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            restore(token)
+                        try:
+                            value = yield item
+                        except GeneratorExit:
+                            raise
+                        except BaseException as thrown:
+                            step, value = agen.athrow, thrown
+                        else:
+                            step = agen.asend
+                except Exception as e:
+                    log_error(e)
+                    raise
+                finally:
+                    token = suppress(sampled)
+                    try:
+                        await agen.aclose()
+                    finally:
+                        restore(token)
+                    if timing:
+                        record_timing(start_ns)
+                    if sampler is not None:
+                        report_suppressed()
+                if info_enabled:
+                    info("%s finished", name)
+
+        elif inspect.isgeneratorfunction(fn):
+
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                sampled = admit()
+                info_enabled = log_call(args, kwargs, sampled)
+                start_ns = time.perf_counter_ns() if timing else 0
+                gen = fn(*args, **kwargs)
+                # Та же делегация, что у ``yield from``, но по шагам: флаг
+                # подавления нужен только на время шага генератора.
+                step, value = gen.send, None
+                try:
+                    while True:
+                        token = suppress(sampled)
+                        try:
+                            item = step(value)
+                        except StopIteration as stop:
+                            result = stop.value
+                            break
+                        finally:
+                            restore(token)
+                        try:
+                            value = yield item
+                        except GeneratorExit:
+                            raise
+                        except BaseException as thrown:
+                            step, value = gen.throw, thrown
+                        else:
+                            step = gen.send
+                except Exception as e:
+                    log_error(e)
+                    raise
+                finally:
+                    token = suppress(sampled)
+                    try:
+                        gen.close()
+                    finally:
+                        restore(token)
+                    if timing:
+                        record_timing(start_ns)
+                    if sampler is not None:
+                        report_suppressed()
+                if info_enabled:
+                    log_result(result)
+                return result
 
-            def error(message: str) -> None:
-                handle.write(f"ERROR: {message}\n")
+        else:
 
-        @functools.wraps(fn)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            info(f"Calling {fn.__name__} with args={args}, kwargs={kwargs}")
-            try:
-                result = fn(*args, **kwargs)
-            except Exception as e:
-                error(
-                    f"Function {fn.__name__} raised {type(e).__name__}: {e}"
-                )
-                raise
-            else:
-                info(f"{fn.__name__} returned {result!r}")
+            @functools.wraps(fn)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                sampled = admit()
+                info_enabled = log_call(args, kwargs, sampled)
+                token = None if sampled else _call_suppressed.set(True)
+                start_ns = time.perf_counter_ns() if timing else 0
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    log_error(e)
+                    raise
+                finally:
+                    if token is not None:
+                        _call_suppressed.reset(token)
+                    if timing:
+                        record_timing(start_ns)
+                    if sampler is not None:
+                        report_suppressed()
+                if info_enabled:
+                    log_result(result)
                 return result
 
+        if histogram is not None:
+            wrapper.histogram = histogram
+            wrapper.stats = histogram.stats
+
         return wrapper
 
     if func is None:
@@ -76,9 +702,186 @@ def logger(func: FuncType | None = None, *,
     return _decorate(func)
 
 
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+# url -> (ETag, Last-Modified, снимок курсов RatesSnapshot)
+_conditional_cache: dict[str, tuple[str | None, str | None,
+                                    RatesSnapshot]] = {}
+
+
+def get_session() -> requests.Session:
+    """
+    Вернуть общую для модуля ``requests.Session``.
+
+    Сессия создаётся при первом обращении; соединения к API
+    переиспользуются (keep-alive) через пул ``HTTPAdapter``.
+    """
+    global _session
+    session = _session
+    if session is None:
+        with _session_lock:
+            session = _session
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return session
+
+
+def _reset_session_after_fork() -> None:
+    """Не делить сокеты пула с родителем: потомок создаст свою сессию."""
+    global _session, _session_lock
+    _session = None
+    _session_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_session_after_fork)
+
+
+class RatesSnapshot:
+    """
+    Разобранный ответ API ЦБ РФ: курсы, проиндексированные по коду валюты.
+
+    Снимок строится один раз на версию данных и дальше только читается,
+    поэтому его можно разделять между вызовами и потоками. Из ``Valute``
+    сохраняются лишь числовые курсы: вложенные словари всех валют после
+    разбора не удерживаются. :meth:`select` для ``k`` кодов — ``k``
+    обращений к словарю без повторного разбора JSON.
+    """
+
+    __slots__ = ("_rates", "_invalid")
+
+    def __init__(self, rates: dict[str, float],
+                 invalid: dict[str, str] | None = None) -> None:
+        self._rates = rates
+        # код -> имя типа некорректного значения курса
+        self._invalid = invalid or {}
+
+    @classmethod
+    def from_valute(cls, valute_dict: dict[str, dict]) -> RatesSnapshot:
+        """Построить снимок из словаря ``Valute``."""
+        rates: dict[str, float] = {}
+        invalid: dict[str, str] = {}
+        for code, currency_info in valute_dict.items():
+            value = (currency_info.get("Value")
+                     if isinstance(currency_info, dict) else None)
+            if isinstance(value, (int, float)):
+                rates[code] = float(value)
+            else:
+                invalid[code] = type(value).__name__
+        return cls(rates, invalid)
+
+    @classmethod
+    def from_payload(cls, body: bytes | str) -> RatesSnapshot:
+        """Разобрать тело ответа API (см. :func:`parse_payload`)."""
+        return cls.from_valute(parse_payload(body))
+
+    def __len__(self) -> int:
+        return len(self._rates) + len(self._invalid)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._rates or code in self._invalid
+
+    def select(self, currency_codes: Iterable[str]) -> dict[str, float]:
+        """
+        Курсы валют ``currency_codes``.
+
+        Исключения ``KeyError``/``TypeError`` — как у :func:`get_currencies`.
+        """
+        rates = self._rates
+        result: dict[str, float] = {}
+        for code in currency_codes:
+            try:
+                result[code] = rates[code]
+            except KeyError:
+                if code in self._invalid:
+                    raise TypeError(
+                        f"Курс валюты {code!r} имеет неверный тип:"
+                        f" {self._invalid[code]}"
+                    ) from None
+                raise KeyError(
+                    f"Валюта {code!r} отсутствует в данных API") from None
+        return result
+
+
+def fetch_snapshot(url: str = CBR_DAILY_URL,
+                   timeout: float = 5.0) -> RatesSnapshot:
+    """
+    Загрузить курсы с API ЦБ РФ в виде :class:`RatesSnapshot`.
+
+    Повторные запросы к тому же ``url`` отправляются с ``ETag`` и
+    ``Last-Modified`` предыдущего ответа; если сервер отвечает ``304``,
+    возвращается тот же снимок без загрузки и разбора JSON.
+
+    Исключения те же, что у :func:`get_currencies`, кроме ошибок
+    отдельных валют.
+    """
+    cached = _conditional_cache.get(url)
+    headers = {}
+    if cached is not None:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    try:
+        response = get_session().get(url, timeout=timeout, headers=headers)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise ConnectionError(f"Ошибка при запросе к API: {e}") from e
+
+    if response.status_code == 304:
+        if cached is None:
+            raise ConnectionError(
+                "Ошибка при запросе к API: неожиданный ответ 304")
+        return cached[2]
+
+    snapshot = RatesSnapshot.from_payload(response.content)
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        _conditional_cache[url] = (etag, last_modified, snapshot)
+    else:
+        _conditional_cache.pop(url, None)
+
+    return snapshot
+
+
+def parse_payload(body: bytes | str) -> dict[str, dict]:
+    """
+    Разобрать тело ответа API ЦБ РФ и вернуть словарь ``Valute``.
+
+    Общая часть синхронного и асинхронного клиентов.
+
+    Исключения
+    ----------
+    ValueError
+        Если тело не является корректным JSON-объектом.
+    KeyError
+        Если отсутствует ключ ``"Valute"``.
+    """
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise ValueError("Некорректный JSON в ответе API") from e
+
+    try:
+        return data["Valute"]
+    except (KeyError, TypeError) as e:
+        raise KeyError('В ответе JSON отсутствует ключ "Valute"') from e
+
+
 def get_currencies(
         currency_codes: Iterable[str],
-        url: str = "https://www.cbr-xml-daily.ru/daily_json.js",
+        url: str = CBR_DAILY_URL,
         timeout: float = 5.0,
 ) -> dict[str, float]:
     """
@@ -109,59 +912,437 @@ def get_currencies(
         Если отсутствует ключ ``"Valute"`` или указанная валюта.
     TypeError
         Если курс валюты имеет некорректный тип (не число).
+
+    Запросы идут через общую ``requests.Session`` (см. :func:`get_session`)
+    с пулом keep-alive соединений и условными заголовками
+    ``If-None-Match``/``If-Modified-Since``: на ответ ``304`` повторно
+    используется снимок курсов :class:`RatesSnapshot` для этого URL.
     """
-    try:
-        response = requests.get(url, timeout=timeout)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise ConnectionError(f"Ошибка при запросе к API: {e}") from e
+    return fetch_snapshot(url, timeout=timeout).select(currency_codes)
 
-    try:
-        data = response.json()
-    except ValueError as e:
-        raise ValueError("Некорректный JSON в ответе API") from e
 
-    try:
-        valute_dict = data["Valute"]
-    except KeyError as e:
-        raise KeyError('В ответе JSON отсутствует ключ "Valute"') from e
+class _Flight:
+    """Один текущий запрос к API, результат которого ждут остальные."""
+
+    __slots__ = ("done", "value", "error")
 
-    result: dict[str, float] = {}
-    for code in currency_codes:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class RatesCache:
+    """
+    Потокобезопасный кэш курсов с TTL и stale-while-revalidate.
+
+    Хранит то, что возвращает ``fetch`` (по умолчанию
+    :func:`fetch_snapshot` — общий для всех вызывающих
+    :class:`RatesSnapshot`).
+
+    * Пока возраст данных меньше ``ttl`` — отдаются из кэша (hit).
+    * Устаревшие данные отдаются сразу, а обновление запускается в одном
+      фоновом потоке (stale-while-revalidate).
+    * Если данных нет (или они старше ``ttl + max_stale``), запрос
+      выполняет один поток, остальные ждут его результата
+      (single-flight).
+    * При ``ConnectionError`` во время обновления продолжают отдаваться
+      устаревшие данные, если они есть и не старше ``ttl + max_stale``.
+
+    Счётчики для мониторинга доступны через :meth:`stats`.
+    """
+
+    def __init__(self, ttl: float = RATES_TTL, max_stale: float | None = None,
+                 fetch: Callable[[str, float], Any] | None = None
+                 ) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._fetch = fetch if fetch is not None else fetch_snapshot
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self._flights: dict[str, _Flight] = {}
+        self._refreshing: set[str] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.stale_fallbacks = 0
+
+    def stats(self) -> dict[str, int]:
+        """Счётчики обращений к кэшу."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "stale_fallbacks": self.stale_fallbacks,
+            }
+
+    def clear(self) -> None:
+        """Забыть все закэшированные данные."""
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, url: str = CBR_DAILY_URL,
+            timeout: float = 5.0) -> Any:
+        """Вернуть данные для ``url`` с учётом политики кэша."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                fetched_at, value = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    return value
+                if self._may_serve_stale(age):
+                    self.stale_hits += 1
+                    if url not in self._refreshing:
+                        self._refreshing.add(url)
+                        self.refreshes += 1
+                        threading.Thread(target=self._refresh,
+                                         args=(url, timeout),
+                                         daemon=True).start()
+                    return value
+
+            self.misses += 1
+            flight = self._flights.get(url)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[url] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._load(url, timeout, stale=entry)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[url]
+            flight.done.set()
+
+    def _may_serve_stale(self, age: float) -> bool:
+        """Можно ли отдать данные возраста ``age`` вместо свежих."""
+        return self.max_stale is None or age < self.ttl + self.max_stale
+
+    def _load(self, url: str, timeout: float,
+              stale: tuple[float, Any] | None) -> Any:
         try:
-            currency_info = valute_dict[code]
-        except KeyError as e:
-            raise KeyError(f"Валюта {code!r} отсутствует в данных API") from e
+            value = self._fetch(url, timeout)
+        except ConnectionError:
+            if stale is None or not self._may_serve_stale(
+                    time.monotonic() - stale[0]):
+                raise
+            with self._lock:
+                self.stale_fallbacks += 1
+            return stale[1]
+        with self._lock:
+            self._entries[url] = (time.monotonic(), value)
+        return value
+
+    def _refresh(self, url: str, timeout: float) -> None:
+        try:
+            value = self._fetch(url, timeout)
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+        else:
+            with self._lock:
+                self._entries[url] = (time.monotonic(), value)
+        finally:
+            with self._lock:
+                self._refreshing.discard(url)
 
-        value = currency_info.get("Value")
-        if not isinstance(value, (int, float)):
-            raise TypeError(
-                f"Курс валюты {code!r} имеет неверный тип:"
-                f" {type(value).__name__}"
-            )
 
-        result[code] = float(value)
+rates_cache = RatesCache(ttl=RATES_TTL)
+
 
-    return result
+def get_cached_currencies(
+        currency_codes: Iterable[str],
+        url: str = CBR_DAILY_URL,
+        timeout: float = 5.0,
+        cache: RatesCache | None = None,
+) -> dict[str, float]:
+    """
+    То же, что :func:`get_currencies`, но через кэш :class:`RatesCache`
+    (по умолчанию — общий ``rates_cache``).
+    """
+    cache = cache if cache is not None else rates_cache
+    return cache.get(url, timeout=timeout).select(currency_codes)
 
 
 @logger
 def logged_get_currencies(
         currency_codes: Iterable[str],
-        url: str = "https://www.cbr-xml-daily.ru/daily_json.js",
+        url: str = CBR_DAILY_URL,
         timeout: float = 5.0,
 ) -> dict[str, float]:
     """
     Обёртка над :func:`get_currencies` с логированием через декоратор.
 
     Здесь бизнес-логика остаётся внутри ``get_currencies``, а декоратор
-    отвечает только за логирование.
+    отвечает только за логирование. Курсы берутся через общий кэш
+    ``rates_cache`` (см. :func:`get_cached_currencies`).
+    """
+    return get_cached_currencies(currency_codes, url=url, timeout=timeout)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    ``QueueHandler`` для ограниченной очереди с политикой переполнения.
+
+    Политики (``overflow``):
+
+    * ``"block"`` — вызывающий поток ждёт освобождения места;
+    * ``"drop_oldest"`` — из очереди выбрасывается самая старая запись;
+    * ``"drop"`` — новая запись отбрасывается.
+
+    Во всех политиках с потерями увеличивается счётчик ``dropped``.
+    ``enqueue`` вызывается из ``Handler.handle`` под блокировкой
+    обработчика, поэтому счётчик не требует отдельной синхронизации.
+
+    Если задан ``listener``, его поток запускается при первой записи:
+    процессы, которые ничего не логируют, не создают лишних потоков.
+    """
+
+    def __init__(self, log_queue: queue.Queue,
+                 overflow: str = "block") -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"overflow must be one of {OVERFLOW_POLICIES}, "
+                f"got {overflow!r}")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+        self.listener: logging.handlers.QueueListener | None = None
+        self.listener_started = False
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.listener is not None and not self.listener_started:
+            self.listener.start()
+            self.listener_started = True
+
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+
+        if self.overflow == "drop":
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self.queue.task_done()
+                self.dropped += 1
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    """``QueueListener``, который не теряет сигнал остановки."""
+
+    def enqueue_sentinel(self) -> None:
+        # Стандартная реализация использует put_nowait и падает с
+        # queue.Full на заполненной ограниченной очереди.
+        self.queue.put(self._sentinel)
+
+
+class QueuedLogging:
+    """
+    Асинхронный режим записи логов для одного ``logging.Logger``.
+
+    Исходные обработчики логгера (например, ``FileHandler``) переносятся
+    в фоновый ``QueueListener``, а на их место ставится
+    :class:`BoundedQueueHandler`. Декорированные вызовы только кладут
+    запись в очередь и не ждут записи на диск.
+
+    :meth:`stop` дописывает всё, что осталось в очереди, и возвращает
+    логгеру исходные обработчики; вызывается автоматически при выходе
+    из интерпретатора. Фоновый поток запускается лениво, при первой
+    записи в лог.
+
+    Поток записи не переживает ``fork``, поэтому в дочернем процессе
+    логгер возвращается к исходным синхронным обработчикам
+    (см. :func:`_reinit_logging_after_fork`).
+    """
+
+    def __init__(self, logger_obj: logging.Logger, maxsize: int = 10_000,
+                 overflow: str = "block") -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.logger = logger_obj
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.handler = BoundedQueueHandler(self.queue, overflow)
+        self._targets = list(logger_obj.handlers)
+        self.handler.listener = _DrainingQueueListener(
+            self.queue, *self._targets, respect_handler_level=True)
+        self._running = False
+        self.start()
+
+    @property
+    def dropped(self) -> int:
+        """Сколько записей потеряно из-за переполнения очереди."""
+        return self.handler.dropped
+
+    @property
+    def running(self) -> bool:
+        """Включён ли асинхронный режим."""
+        return self._running
+
+    def start(self) -> None:
+        """Подменить обработчики логгера очередью."""
+        if self._running:
+            return
+        for target in self._targets:
+            self.logger.removeHandler(target)
+        self.logger.addHandler(self.handler)
+        self._running = True
+        atexit.register(self.stop)
+
+    def _restore_targets(self) -> None:
+        self._running = False
+        atexit.unregister(self.stop)
+        self.logger.removeHandler(self.handler)
+        for target in self._targets:
+            self.logger.addHandler(target)
+
+    def stop(self) -> None:
+        """Дописать очередь и вернуть логгеру исходные обработчики."""
+        if not self._running:
+            return
+        self._restore_targets()
+
+        self.handler.acquire()
+        try:
+            if self.handler.listener_started:
+                self.handler.listener.stop()
+                self.handler.listener_started = False
+        finally:
+            self.handler.release()
+        for target in self._targets:
+            target.flush()
+
+        if self.dropped:
+            self.logger.warning(
+                "Queued logging dropped %d records (overflow=%s)",
+                self.dropped, self.handler.overflow)
+
+    def detach_after_fork(self) -> None:
+        """
+        Выключить асинхронный режим в дочернем процессе после ``fork``.
+
+        Поток-слушатель в потомке не существует, поэтому очередь
+        не дописывается, а логгер сразу получает исходные обработчики.
+        """
+        if not self._running:
+            return
+        self._restore_targets()
+        self.handler.listener_started = False
+
+
+_queued_loggers: dict[str, QueuedLogging] = {}
+
+
+def enable_queued_logging(logger_obj: logging.Logger, maxsize: int = 10_000,
+                          overflow: str = "block") -> QueuedLogging:
+    """
+    Перевести логгер в асинхронный режим (см. :class:`QueuedLogging`).
+
+    Повторный вызов для того же логгера возвращает уже работающий режим.
     """
-    return get_currencies(currency_codes, url=url, timeout=timeout)
+    queued = _queued_loggers.get(logger_obj.name)
+    if queued is not None and queued.running:
+        return queued
+
+    queued = QueuedLogging(logger_obj, maxsize=maxsize, overflow=overflow)
+    _queued_loggers[logger_obj.name] = queued
+    return queued
+
+
+def stop_queued_logging() -> None:
+    """Остановить асинхронный режим у всех логгеров, дописав очереди."""
+    for queued in list(_queued_loggers.values()):
+        queued.stop()
+    _queued_loggers.clear()
+
+
+_file_handlers: list[logging.FileHandler] = []
+
+
+def _reinit_logging_after_fork() -> None:
+    """
+    Подготовить логирование в дочернем процессе после ``fork``.
+
+    Асинхронные логгеры возвращаются к синхронным обработчикам, а
+    унаследованные файлы логов закрываются: потомок, который ничего не
+    пишет (например, воркер пула процессов), не держит лишних
+    дескрипторов, а пишущий откроет файл заново при первой записи.
+    """
+    for queued in list(_queued_loggers.values()):
+        queued.detach_after_fork()
+    _queued_loggers.clear()
+
+    for handler in _file_handlers:
+        stream, handler.stream = handler.stream, None
+        if stream is not None:
+            stream.close()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_logging_after_fork)
+
+
+def _setup_file_logger(name: str, filename: str, level: int,
+                       queued: bool, queue_size: int,
+                       overflow: str) -> logging.Logger:
+    """
+    Общая настройка файлового логгера для валют и квадратных уравнений.
+
+    Файл открывается лениво (``delay=True``) — при первой записи, а не
+    при импорте модуля.
+    """
+    logger_obj = logging.getLogger(name)
+    logger_obj.setLevel(level)
+
+    if not logger_obj.handlers:
+        file_handler = logging.FileHandler(filename, encoding="utf-8",
+                                           delay=True)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger_obj.addHandler(file_handler)
+        _file_handlers.append(file_handler)
+
+    if queued:
+        enable_queued_logging(logger_obj, maxsize=queue_size,
+                              overflow=overflow)
+
+    return logger_obj
 
 
 def setup_currency_file_logger(
-        filename: str = "currency.log") -> logging.Logger:
+        filename: str = "currency.log", *, queued: bool = False,
+        queue_size: int = 10_000, overflow: str = "block") -> logging.Logger:
     """
     Создать и настроить логгер для записи логов работы с валютами в файл.
 
@@ -169,24 +1350,22 @@ def setup_currency_file_logger(
     ---------
     filename:
         Имя файла лога.
+    queued:
+        Писать ли в файл асинхронно через очередь
+        (см. :func:`enable_queued_logging`).
+    queue_size:
+        Размер очереди в асинхронном режиме.
+    overflow:
+        Политика переполнения очереди: ``"block"``, ``"drop_oldest"``
+        или ``"drop"``.
 
     Возвращает
     ----------
     logging.Logger
         Настроенный логгер.
     """
-    logger_obj = logging.getLogger("currency_file")
-    logger_obj.setLevel(logging.INFO)
-
-    if not logger_obj.handlers:
-        file_handler = logging.FileHandler(filename, encoding="utf-8")
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        file_handler.setFormatter(formatter)
-        logger_obj.addHandler(file_handler)
-
-    return logger_obj
+    return _setup_file_logger("currency_file", filename, logging.INFO,
+                              queued, queue_size, overflow)
 
 
 file_logger = setup_currency_file_logger("currency.log")
@@ -195,26 +1374,30 @@ file_logger = setup_currency_file_logger("currency.log")
 @logger(handle=file_logger)
 def file_logged_get_currencies(
         currency_codes: Iterable[str],
-        url: str = "https://www.cbr-xml-daily.ru/daily_json.js",
+        url: str = CBR_DAILY_URL,
         timeout: float = 5.0,
 ) -> dict[str, float]:
     """
     Обёртка над :func:`get_currencies` с логированием в файл.
+
+    Курсы берутся через общий кэш ``rates_cache``.
+    """
+    return get_cached_currencies(currency_codes, url=url, timeout=timeout)
+
+
+def setup_quadratic_file_logger(
+        filename: str = "quadratic.log", *, queued: bool = False,
+        queue_size: int = 10_000, overflow: str = "block") -> logging.Logger:
     """
-    return get_currencies(currency_codes, url=url, timeout=timeout)
+    Создать и настроить логгер решателя квадратных уравнений.
 
+    Параметры совпадают с :func:`setup_currency_file_logger`.
+    """
+    return _setup_file_logger("quadratic", filename, logging.DEBUG,
+                              queued, queue_size, overflow)
 
-quad_logger = logging.getLogger("quadratic")
-quad_logger.setLevel(logging.DEBUG)
 
-if not quad_logger.handlers:
-    quad_file_handler = logging.FileHandler("quadratic.log",
-                                            encoding="utf-8")
-    quad_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    quad_file_handler.setFormatter(quad_formatter)
-    quad_logger.addHandler(quad_file_handler)
+quad_logger = setup_quadratic_file_logger("quadratic.log")
 
 
 @logger(handle=quad_logger)
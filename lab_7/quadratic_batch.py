@@ -0,0 +1,145 @@
+"""Пакетное решение квадратных уравнений на массивах NumPy.
+
+:func:`solve_quadratic_batch` — векторный аналог
+:func:`logging_utils.solve_quadratic` для миллионов уравнений за вызов:
+вместо исключения или ``None`` на каждое уравнение возвращаются массивы
+корней и маски особых случаев, а в ``quad_logger`` пишется одна сводная
+запись на пакет.
+
+Корни считаются по устойчивой формуле
+
+    q = -(b + sign(b) * sqrt(d)) / 2,   x = q / a,   x = c / q,
+
+которая не вычитает близкие числа при ``b * b >> 4 * a * c``.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import NamedTuple
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from logging_utils import quad_logger
+
+_NUMERIC_KINDS = "biuf"
+
+
+class QuadraticBatchResult(NamedTuple):
+    """
+    Результат :func:`solve_quadratic_batch`.
+
+    ``x1 <= x2`` — действительные корни (при ``d == 0`` совпадают), ``NaN``
+    там, где действительных корней нет или уравнение вырождено.
+    ``no_real`` — маска ``d < 0``, ``degenerate`` — маска ``a == 0``.
+    ``z1``/``z2`` — комплексные корни (только при ``complex_roots=True``,
+    для вырожденных уравнений — ``NaN``).
+    """
+
+    x1: np.ndarray
+    x2: np.ndarray
+    no_real: np.ndarray
+    degenerate: np.ndarray
+    z1: np.ndarray | None = None
+    z2: np.ndarray | None = None
+
+
+def _as_coefficient(name: str, value: ArrayLike) -> np.ndarray:
+    array = np.asarray(value)
+    if array.dtype.kind not in _NUMERIC_KINDS:
+        quad_logger.critical(
+            "Parameter %r must be numeric, got array of dtype %r",
+            name, str(array.dtype))
+        raise TypeError(f"Coefficient '{name}' must be numeric")
+    return array.astype(np.float64, copy=False)
+
+
+def solve_quadratic_batch(a: ArrayLike, b: ArrayLike, c: ArrayLike, *,
+                          complex_roots: bool = False,
+                          strict: bool = False) -> QuadraticBatchResult:
+    """
+    Решить уравнения ``a[i] * x^2 + b[i] * x + c[i] = 0``.
+
+    Параметры
+    ---------
+    a, b, c:
+        Коэффициенты — массивы (или скаляры) одинаковой либо совместимой
+        для broadcasting формы.
+    complex_roots:
+        Дополнительно вернуть комплексные корни ``z1``/``z2``.
+    strict:
+        Проверять уравнения так же, как :func:`solve_quadratic`:
+        ``ValueError``, если хотя бы в одном ``a == 0``. По умолчанию
+        такие уравнения только отмечаются в маске ``degenerate``.
+
+    Возвращает
+    ----------
+    QuadraticBatchResult
+        Массивы корней и маски особых случаев.
+
+    Исключения
+    ----------
+    TypeError
+        Если коэффициенты не числовые.
+    ValueError
+        Если формы массивов несовместимы или (при ``strict=True``)
+        есть уравнения с ``a == 0``.
+    """
+    start = time.perf_counter()
+    a, b, c = np.broadcast_arrays(_as_coefficient("a", a),
+                                  _as_coefficient("b", b),
+                                  _as_coefficient("c", c))
+
+    degenerate = a == 0
+    if strict and degenerate.any():
+        if (degenerate & (b == 0)).any():
+            quad_logger.critical(
+                "Both coefficients a and b are zero — invalid equation")
+            raise ValueError("Both a and b cannot be zero at the same time")
+        quad_logger.error(
+            "Coefficient 'a' is zero — equation is not quadratic")
+        raise ValueError(
+            "Coefficient 'a' cannot be zero for quadratic equation")
+
+    d = b * b - 4 * a * c
+    no_real = (d < 0) & ~degenerate
+    has_real = (d >= 0) & ~degenerate
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sqrt_d = np.sqrt(np.where(has_real, d, 0.0))
+        # sign(0) должен быть 1, иначе при b == 0 получится q == 0.
+        q = -0.5 * (b + np.where(b >= 0, 1.0, -1.0) * sqrt_d)
+        r1 = q / a
+        # q == 0 только при b == 0 и d == 0, то есть c == 0: x = 0.
+        r2 = np.where(q == 0, r1, c / q)
+        x1 = np.where(has_real, np.minimum(r1, r2), np.nan)
+        x2 = np.where(has_real, np.maximum(r1, r2), np.nan)
+
+        z1 = z2 = None
+        if complex_roots:
+            re = -b / (2 * a)
+            im = np.sqrt(np.where(no_real, -d, 0.0)) / np.abs(2 * a)
+            z1 = np.where(no_real, re - 1j * im, x1)
+            z2 = np.where(no_real, re + 1j * im, x2)
+
+    total = d.size
+    n_degenerate = int(np.count_nonzero(degenerate))
+    n_no_real = int(np.count_nonzero(no_real))
+    n_one = int(np.count_nonzero(has_real & (d == 0)))
+    if n_degenerate:
+        level = logging.ERROR
+    elif n_no_real:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    if quad_logger.isEnabledFor(level):
+        quad_logger.log(
+            level,
+            "solve_quadratic_batch: n=%d two_roots=%d one_root=%d "
+            "no_real=%d degenerate=%d in %.3f ms",
+            total, total - n_degenerate - n_no_real - n_one, n_one,
+            n_no_real, n_degenerate, (time.perf_counter() - start) * 1000)
+
+    return QuadraticBatchResult(x1, x2, no_real, degenerate, z1, z2)
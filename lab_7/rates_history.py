@@ -0,0 +1,294 @@
+"""Загрузка архива курсов ЦБ РФ за период в локальную базу SQLite.
+
+API отдаёт курсы на прошедшие даты по адресам вида
+``/archive/YYYY/MM/DD/daily_json.js``; в выходные и праздники файла нет
+(ответ ``404``). :func:`download_history` запрашивает дни параллельно с
+ограничением числа одновременных запросов и сохраняет каждый день
+отдельной транзакцией, поэтому прерванная загрузка продолжается с места
+остановки: повторный запуск запрашивает только дни, которых ещё нет в
+:class:`RatesArchive` (дни без данных тоже запоминаются).
+
+Запуск:
+    python rates_history.py 2023-01-01 2023-12-31 --db rates_history.sqlite3
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Iterator
+
+import requests
+
+from logging_utils import get_session, parse_payload
+
+ARCHIVE_URL_TEMPLATE = (
+    "https://www.cbr-xml-daily.ru/archive/{date:%Y/%m/%d}/daily_json.js")
+DEFAULT_WORKERS = 8
+
+DAY_STORED = "stored"
+DAY_NO_DATA = "no_data"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate (
+    char_code TEXT NOT NULL,
+    day TEXT NOT NULL,
+    nominal INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (char_code, day)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fetched_day (
+    day TEXT PRIMARY KEY,
+    status TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def iter_days(start: dt.date, end: dt.date) -> Iterator[dt.date]:
+    """Даты от ``start`` до ``end`` включительно."""
+    day = start
+    while day <= end:
+        yield day
+        day += dt.timedelta(days=1)
+
+
+class RatesArchive:
+    """
+    Локальный архив курсов в SQLite.
+
+    Таблица ``rate`` хранит курс каждой валюты за день (первичный ключ
+    ``(char_code, day)`` — история одной валюты читается подряд),
+    ``fetched_day`` — какие дни уже загружены или известны как дни без
+    данных. Для работы в памяти можно передать ``":memory:"``.
+    """
+
+    def __init__(self, path: str = "rates_history.sqlite3") -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> RatesArchive:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def known_days(self, start: dt.date, end: dt.date) -> set[dt.date]:
+        """Дни периода, которые уже есть в архиве (с данными или без)."""
+        rows = self._conn.execute(
+            "SELECT day FROM fetched_day WHERE day BETWEEN ? AND ?",
+            (start.isoformat(), end.isoformat()),
+        )
+        return {dt.date.fromisoformat(day) for (day,) in rows}
+
+    def missing_days(self, start: dt.date, end: dt.date) -> list[dt.date]:
+        """Дни периода, которые ещё нужно загрузить."""
+        known = self.known_days(start, end)
+        return [day for day in iter_days(start, end) if day not in known]
+
+    def store_day(self, day: dt.date, valute_dict: dict[str, dict]) -> int:
+        """
+        Сохранить курсы за день одной транзакцией.
+
+        Возвращает число сохранённых валют. Если какая-то запись
+        некорректна, день не сохраняется целиком (``KeyError``,
+        ``TypeError`` или ``ValueError``).
+        """
+        iso = day.isoformat()
+        rows = []
+        for code, info in valute_dict.items():
+            if not isinstance(info, dict):
+                raise TypeError(
+                    f"Запись валюты {code!r} имеет неверный тип:"
+                    f" {type(info).__name__}"
+                )
+            rows.append((code, iso, int(info.get("Nominal", 1)),
+                         float(info["Value"])))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rate (char_code, day, nominal, value)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetched_day (day, status)"
+                " VALUES (?, ?)",
+                (iso, DAY_STORED),
+            )
+        return len(rows)
+
+    def mark_no_data(self, day: dt.date) -> None:
+        """Запомнить, что за день курсов нет (выходной или праздник)."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetched_day (day, status)"
+                " VALUES (?, ?)",
+                (day.isoformat(), DAY_NO_DATA),
+            )
+
+    def history(self, char_code: str, start: dt.date | None = None,
+                end: dt.date | None = None) -> list[tuple[dt.date, float]]:
+        """Курсы валюты ``char_code`` по дням в порядке возрастания даты."""
+        rows = self._conn.execute(
+            "SELECT day, value FROM rate WHERE char_code = ?"
+            " AND day BETWEEN ? AND ? ORDER BY day",
+            (
+                char_code,
+                (start or dt.date.min).isoformat(),
+                (end or dt.date.max).isoformat(),
+            ),
+        )
+        return [(dt.date.fromisoformat(day), value) for day, value in rows]
+
+    def codes(self) -> list[str]:
+        """Коды валют, встречающиеся в архиве."""
+        rows = self._conn.execute(
+            "SELECT DISTINCT char_code FROM rate ORDER BY char_code")
+        return [code for (code,) in rows]
+
+
+def fetch_archive_day(day: dt.date,
+                      url_template: str = ARCHIVE_URL_TEMPLATE,
+                      timeout: float = 10.0) -> dict[str, dict] | None:
+    """
+    Загрузить словарь ``Valute`` за день ``day``.
+
+    Возвращает ``None``, если за этот день курсов нет (ответ ``404``).
+    Использует общую сессию :func:`logging_utils.get_session`.
+
+    Исключения
+    ----------
+    ConnectionError
+        Если API недоступен или вернул иной код ошибки.
+    ValueError, KeyError
+        Если ответ не удалось разобрать (см. :func:`parse_payload`).
+    """
+    url = url_template.format(date=day)
+    try:
+        response = get_session().get(url, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        raise ConnectionError(f"Ошибка при запросе к API: {e}") from e
+
+    if response.status_code == 404:
+        return None
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        raise ConnectionError(f"Ошибка при запросе к API: {e}") from e
+
+    return parse_payload(response.content)
+
+
+def download_history(start: dt.date, end: dt.date, archive: RatesArchive,
+                     url_template: str = ARCHIVE_URL_TEMPLATE,
+                     max_workers: int = DEFAULT_WORKERS,
+                     timeout: float = 10.0) -> dict[str, Any]:
+    """
+    Загрузить в ``archive`` курсы за период от ``start`` до ``end``.
+
+    Параметры
+    ---------
+    start, end:
+        Границы периода (включительно).
+    archive:
+        Архив, в который сохраняются данные; дни, уже известные архиву,
+        не запрашиваются.
+    url_template:
+        Шаблон URL архивного файла с полем ``{date}``.
+    max_workers:
+        Максимальное число одновременных запросов; в работе находится не
+        больше ``2 * max_workers`` дней, поэтому память не растёт с
+        длиной периода. Значения больше ``HTTP_POOL_MAXSIZE`` не
+        ускоряют загрузку — соединений в пуле сессии больше не станет.
+    timeout:
+        Таймаут одного запроса в секундах.
+
+    Возвращает
+    ----------
+    dict[str, Any]
+        Сводку ``{"requested", "skipped", "stored", "no_data", "failed",
+        "errors"}``, где ``errors`` — словарь ``{дата: текст ошибки}``.
+        Дни с ошибками не запоминаются и будут запрошены при следующем
+        запуске.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be >= 1")
+    if end < start:
+        raise ValueError("end must not be earlier than start")
+
+    days = archive.missing_days(start, end)
+    total = (end - start).days + 1
+    summary: dict[str, Any] = {
+        "requested": len(days),
+        "skipped": total - len(days),
+        "stored": 0,
+        "no_data": 0,
+        "failed": 0,
+        "errors": {},
+    }
+
+    pending: dict[Future, dt.date] = {}
+
+    # Запись в SQLite идёт только из этого потока; рабочие потоки лишь
+    # загружают и разбирают ответы.
+    def collect(done: set[Future]) -> None:
+        for future in done:
+            day = pending.pop(future)
+            try:
+                valute_dict = future.result()
+                if valute_dict is None:
+                    archive.mark_no_data(day)
+                    summary["no_data"] += 1
+                else:
+                    archive.store_day(day, valute_dict)
+                    summary["stored"] += 1
+            except (ConnectionError, ValueError, KeyError, TypeError) as e:
+                summary["failed"] += 1
+                summary["errors"][day] = f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for day in days:
+            if len(pending) >= 2 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = executor.submit(fetch_archive_day, day, url_template,
+                                     timeout)
+            pending[future] = day
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    return summary
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Загрузить архив курсов ЦБ РФ за период.")
+    parser.add_argument("start", type=dt.date.fromisoformat,
+                        help="первый день, YYYY-MM-DD")
+    parser.add_argument("end", type=dt.date.fromisoformat,
+                        help="последний день, YYYY-MM-DD")
+    parser.add_argument("--db", default="rates_history.sqlite3",
+                        help="файл архива SQLite")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="число одновременных запросов")
+    args = parser.parse_args(argv)
+
+    with RatesArchive(args.db) as archive:
+        summary = download_history(args.start, args.end, archive,
+                                   max_workers=args.workers)
+
+    errors = summary.pop("errors")
+    print(", ".join(f"{key}={value}" for key, value in summary.items()))
+    for day, message in sorted(errors.items()):
+        print(f"{day}: {message}")
+
+
+if __name__ == "__main__":
+    main()
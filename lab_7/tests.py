@@ -1,13 +1,39 @@
 from __future__ import annotations
 
+import asyncio
+import datetime as dt
+import inspect
 import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 
+import numpy as np
+
+import logging_utils
+from async_currencies import aget_currencies
+from cbr_stub import StubCbrServer, make_payload, make_valute
 from logging_utils import (
+    CallSampler,
+    LatencyHistogram,
+    QueuedLogging,
+    RatesCache,
+    RatesSnapshot,
+    ReprPolicy,
+    enable_queued_logging,
     get_currencies,
     logger,
     solve_quadratic,
 )
+from quadratic_batch import solve_quadratic_batch
+from rates_history import RatesArchive, download_history
 
 MAX_RATE_VALUE = 1000.0
 
@@ -39,6 +65,406 @@ class TestGetCurrencies(unittest.TestCase):
             get_currencies(["USD"], url="https://invalid-url")
 
 
+class TestPooledConditionalRequests(unittest.TestCase):
+    """Общая сессия и условные запросы get_currencies (stub-сервер)."""
+
+    def setUp(self) -> None:
+        self.server = StubCbrServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_rates_from_stub(self) -> None:
+        rates = get_currencies(["USD", "EUR"], url=self.server.url)
+        self.assertEqual(rates, {"USD": 11.0, "EUR": 12.0})
+
+    def test_not_modified_reuses_parsed_payload(self) -> None:
+        first = logging_utils.fetch_snapshot(self.server.url)
+        second = logging_utils.fetch_snapshot(self.server.url)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(self.server.not_modified, 1)
+
+    def test_changed_payload_is_downloaded(self) -> None:
+        get_currencies(["USD"], url=self.server.url)
+        valute = make_valute()
+        valute["USD"]["Value"] = 99.5
+        self.server.set_payload(make_payload(valute))
+
+        self.assertEqual(get_currencies(["USD"], url=self.server.url),
+                         {"USD": 99.5})
+        self.assertEqual(self.server.not_modified, 0)
+
+    def test_connection_is_reused(self) -> None:
+        for _ in range(3):
+            get_currencies(["USD"], url=self.server.url)
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+    def test_http_error_is_connection_error(self) -> None:
+        self.server.fail_status = 503
+        with self.assertRaises(ConnectionError):
+            get_currencies(["USD"], url=self.server.url)
+
+    def test_validation_errors(self) -> None:
+        valute = make_valute()
+        valute["EUR"]["Value"] = "много"
+        self.server.set_payload(make_payload(valute))
+
+        with self.assertRaises(KeyError):
+            get_currencies(["XXX"], url=self.server.url)
+        with self.assertRaises(TypeError):
+            get_currencies(["EUR"], url=self.server.url)
+
+
+class TestRatesSnapshot(unittest.TestCase):
+    """Разобранный снимок курсов и его переиспользование get_currencies."""
+
+    def test_select_subsets(self) -> None:
+        snapshot = RatesSnapshot.from_valute(make_valute())
+        self.assertEqual(snapshot.select(["EUR", "USD"]),
+                         {"EUR": 12.0, "USD": 11.0})
+        self.assertEqual(snapshot.select([]), {})
+        self.assertIn("GBP", snapshot)
+        self.assertEqual(len(snapshot), 45)
+
+    def test_snapshot_shared_between_calls_and_threads(self) -> None:
+        parse = mock.patch.object(RatesSnapshot, "from_payload",
+                                  wraps=RatesSnapshot.from_payload)
+        with StubCbrServer() as server, parse as from_payload:
+            get_currencies(["USD"], url=server.url)
+            results = []
+            threads = [threading.Thread(target=lambda code=code: results.append(
+                get_currencies([code], url=server.url)))
+                for code in ("USD", "EUR", "GBP", "CNY")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(from_payload.call_count, 1)
+            self.assertEqual(len(results), 4)
+            self.assertEqual(server.not_modified, 4)
+
+
+class _FakeFetch:
+    """Подменяемая функция загрузки Valute со счётчиком вызовов."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.value = 1.0
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, url: str, timeout: float) -> dict[str, dict]:
+        self.calls += 1
+        self.release.wait(timeout=5)
+        if self.fail:
+            raise ConnectionError("API недоступен")
+        return {"USD": {"Value": self.value}}
+
+
+class TestRatesCache(unittest.TestCase):
+    """TTL-кэш курсов: hit/miss, stale-while-revalidate, single-flight."""
+
+    def setUp(self) -> None:
+        self.fetch = _FakeFetch()
+
+    def test_hit_within_ttl(self) -> None:
+        cache = RatesCache(ttl=60, fetch=self.fetch)
+        first = cache.get("u")
+        self.assertIs(cache.get("u"), first)
+        self.assertEqual(self.fetch.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_concurrent_misses_share_one_request(self) -> None:
+        cache = RatesCache(ttl=60, fetch=self.fetch)
+        self.fetch.release.clear()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            cache.get("u"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        self.fetch.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.fetch.calls, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_stale_served_while_refreshing(self) -> None:
+        cache = RatesCache(ttl=0.2, fetch=self.fetch)
+        cache.get("u")
+        time.sleep(0.25)
+        self.fetch.value = 2.0
+
+        self.assertEqual(cache.get("u")["USD"]["Value"], 1.0)
+        for _ in range(100):
+            if not cache._refreshing:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get("u")["USD"]["Value"], 2.0)
+        stats = cache.stats()
+        self.assertEqual(stats["stale_hits"], 1)
+        self.assertEqual(stats["refreshes"], 1)
+
+    def test_too_old_data_is_not_a_fallback(self) -> None:
+        cache = RatesCache(ttl=0.01, max_stale=0.0, fetch=self.fetch)
+        cache.get("u")
+        time.sleep(0.02)
+        self.fetch.fail = True
+
+        with self.assertRaises(ConnectionError):
+            cache.get("u")
+        self.assertEqual(cache.stats()["stale_fallbacks"], 0)
+
+    def test_miss_without_data_raises(self) -> None:
+        self.fetch.fail = True
+        cache = RatesCache(ttl=60, fetch=self.fetch)
+        with self.assertRaises(ConnectionError):
+            cache.get("u")
+
+    def test_logged_wrapper_uses_cache(self) -> None:
+        with StubCbrServer() as server:
+            for _ in range(3):
+                rates = logging_utils.get_cached_currencies(
+                    ["USD"], url=server.url, cache=RatesCache(ttl=60))
+            self.assertEqual(rates, {"USD": 11.0})
+            cache = RatesCache(ttl=60)
+            for _ in range(3):
+                logging_utils.get_cached_currencies(["USD"], url=server.url,
+                                                    cache=cache)
+            self.assertEqual(server.requests, 4)
+
+
+class _AsyncStubSource:
+    """Источник курсов на asyncio-сервере: задержка, статус, chunked."""
+
+    def __init__(self, usd: float = 11.0, delay: float = 0.0,
+                 status: int = 200, chunked: bool = False) -> None:
+        valute = make_valute(extra=0)
+        valute["USD"]["Value"] = usd
+        self.body = json.dumps(make_payload(valute)).encode("utf-8")
+        self.delay = delay
+        self.status = status
+        self.chunked = chunked
+        self.requests = 0
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/daily_json.js"
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        self.requests += 1
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        try:
+            await asyncio.sleep(self.delay)
+            head = f"HTTP/1.1 {self.status} X\r\nConnection: close\r\n"
+            if self.chunked:
+                half = len(self.body) // 2
+                chunks = [self.body[:half], self.body[half:]]
+                body = b"".join(b"%x\r\n%s\r\n" % (len(c), c)
+                                for c in chunks) + b"0\r\n\r\n"
+                head += "Transfer-Encoding: chunked\r\n"
+            else:
+                body = self.body
+                head += f"Content-Length: {len(body)}\r\n"
+            writer.write(head.encode() + b"\r\n" + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+class TestAsyncGetCurrencies(unittest.IsolatedAsyncioTestCase):
+    """aget_currencies против локальных asyncio-источников."""
+
+    async def _urls(self, *sources: _AsyncStubSource) -> list[str]:
+        urls = []
+        for source in sources:
+            urls.append(await source.start())
+            self.addAsyncCleanup(source.stop)
+        return urls
+
+    async def test_single_source(self) -> None:
+        urls = await self._urls(_AsyncStubSource(chunked=True))
+        rates = await aget_currencies(["USD", "EUR"], sources=urls)
+        self.assertEqual(rates, {"USD": 11.0, "EUR": 12.0})
+
+    async def test_first_success_skips_slow_and_broken(self) -> None:
+        slow = _AsyncStubSource(usd=1.0, delay=2.0)
+        broken = _AsyncStubSource(status=500)
+        fast = _AsyncStubSource(usd=3.0, delay=0.05)
+        urls = await self._urls(slow, broken, fast)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        rates = await aget_currencies(["USD"], sources=urls)
+        self.assertEqual(rates, {"USD": 3.0})
+        self.assertLess(loop.time() - start, 1.0)
+
+    async def test_quorum_median(self) -> None:
+        urls = await self._urls(_AsyncStubSource(usd=10.0),
+                                _AsyncStubSource(usd=30.0),
+                                _AsyncStubSource(usd=20.0))
+        rates = await aget_currencies(["USD"], sources=urls, mode="quorum",
+                                      quorum=3)
+        self.assertEqual(rates, {"USD": 20.0})
+
+    async def test_timeout_per_source(self) -> None:
+        urls = await self._urls(_AsyncStubSource(delay=1.0))
+        with self.assertRaises(ConnectionError):
+            await aget_currencies(["USD"], sources=urls, timeout=0.1)
+
+    async def test_bounded_concurrency(self) -> None:
+        sources = [_AsyncStubSource(delay=0.05, status=503)
+                   for _ in range(4)]
+        sources.append(_AsyncStubSource(usd=5.0))
+        urls = await self._urls(*sources)
+
+        rates = await aget_currencies(["USD"], sources=urls,
+                                      max_concurrency=1)
+        self.assertEqual(rates, {"USD": 5.0})
+        self.assertEqual([s.requests for s in sources], [1, 1, 1, 1, 1])
+
+    async def test_shared_validation(self) -> None:
+        urls = await self._urls(_AsyncStubSource(),
+                                _AsyncStubSource(usd="много"))
+        with self.assertRaises(KeyError):
+            await aget_currencies(["XXX"], sources=urls[:1])
+        with self.assertRaisesRegex(TypeError, "str"):
+            await aget_currencies(["USD"], sources=urls[1:])
+
+    async def test_invalid_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            await aget_currencies(["USD"], mode="majority")
+
+
+def _archive_payloads(start: dt.date, days: int) -> dict[str, dict]:
+    """Архив stub-сервера: курсы есть только в будние дни."""
+    archive = {}
+    for offset in range(days):
+        day = start + dt.timedelta(days=offset)
+        if day.weekday() < 5:
+            valute = make_valute(extra=2)
+            valute["USD"]["Value"] = 90.0 + offset
+            archive[f"{day:%Y/%m/%d}"] = make_payload(valute, day.isoformat())
+    return archive
+
+
+class TestRatesHistory(unittest.TestCase):
+    """download_history против stub-сервера с архивными файлами."""
+
+    START = dt.date(2024, 1, 1)  # понедельник
+
+    def setUp(self) -> None:
+        self.archive = RatesArchive(":memory:")
+        self.addCleanup(self.archive.close)
+        self.server = StubCbrServer(
+            archive=_archive_payloads(self.START, 14)).start()
+        self.addCleanup(self.server.stop)
+
+    def _download(self, days: int, **kwargs) -> dict:
+        end = self.START + dt.timedelta(days=days - 1)
+        return download_history(self.START, end, self.archive,
+                                url_template=self.server.archive_url_template,
+                                **kwargs)
+
+    def test_stores_weekdays_and_remembers_days_without_data(self) -> None:
+        summary = self._download(14, max_workers=3)
+
+        self.assertEqual(summary["requested"], 14)
+        self.assertEqual(summary["stored"], 10)
+        self.assertEqual(summary["no_data"], 4)
+        self.assertEqual(summary["failed"], 0)
+
+        usd = self.archive.history("USD")
+        self.assertEqual(len(usd), 10)
+        self.assertEqual(usd[0], (self.START, 90.0))
+        self.assertEqual(usd[-1], (self.START + dt.timedelta(days=11), 101.0))
+        self.assertIn("EUR", self.archive.codes())
+
+    def test_rerun_fetches_only_missing_days(self) -> None:
+        self._download(7)
+        self.assertEqual(self.server.requests, 7)
+
+        summary = self._download(14)
+        self.assertEqual(summary["skipped"], 7)
+        self.assertEqual(summary["requested"], 7)
+        self.assertEqual(self.server.requests, 14)
+
+        self._download(14)
+        self.assertEqual(self.server.requests, 14)
+
+    def test_failed_days_are_retried_on_next_run(self) -> None:
+        failing = f"/archive/{self.START + dt.timedelta(days=2):%Y/%m/%d}" \
+                  "/daily_json.js"
+        self.server.fail_paths.add(failing)
+
+        summary = self._download(7)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(list(summary["errors"]),
+                         [self.START + dt.timedelta(days=2)])
+        self.assertEqual(len(self.archive.history("USD")), 4)
+
+        self.server.fail_paths.clear()
+        paths_before = len(self.server.paths)
+        summary = self._download(7)
+        self.assertEqual(summary["stored"], 1)
+        self.assertEqual(self.server.paths[paths_before:], [failing])
+        self.assertEqual(len(self.archive.history("USD")), 5)
+
+    def test_malformed_day_is_marked_failed(self) -> None:
+        bad_day = self.START + dt.timedelta(days=1)
+        payload = self.server.archive[f"{bad_day:%Y/%m/%d}"]
+        payload["Valute"]["EUR"] = "нет данных"
+
+        summary = self._download(7)
+        self.assertEqual(summary["failed"], 1)
+        self.assertIn("TypeError", summary["errors"][bad_day])
+        self.assertEqual(summary["stored"], 4)
+        self.assertNotIn(bad_day, self.archive.known_days(
+            self.START, self.START + dt.timedelta(days=6)))
+
+    def test_bounded_concurrency(self) -> None:
+        self.server.delay = 0.05
+        start = time.perf_counter()
+        self._download(8, max_workers=4)
+        elapsed = time.perf_counter() - start
+        # 8 дней по 50 мс при 4 потоках — около двух «волн» запросов.
+        self.assertGreaterEqual(elapsed, 0.1)
+        self.assertLess(elapsed, 0.35)
+
+    def test_archive_survives_reopen(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history.sqlite3")
+            with RatesArchive(path) as archive:
+                download_history(
+                    self.START, self.START + dt.timedelta(days=6), archive,
+                    url_template=self.server.archive_url_template)
+            with RatesArchive(path) as archive:
+                self.assertEqual(
+                    archive.missing_days(self.START,
+                                         self.START + dt.timedelta(days=9)),
+                    [self.START + dt.timedelta(days=d) for d in (7, 8, 9)])
+                self.assertEqual(len(archive.history("EUR")), 5)
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(ValueError):
+            self._download(3, max_workers=0)
+        with self.assertRaises(ValueError):
+            download_history(self.START, self.START - dt.timedelta(days=1),
+                             self.archive)
+
+
 class TestLoggerDecorator(unittest.TestCase):
     """Тестирование поведения декоратора logger через io.StringIO."""
 
@@ -86,6 +512,536 @@ class TestLoggerDecorator(unittest.TestCase):
         print(logs)
 
 
+class _ReprCounter:
+    """Объект, который считает, сколько раз у него вызывали ``repr``."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __repr__(self) -> str:
+        self.calls += 1
+        return "<counter>"
+
+
+class TestLoggerLevelGating(unittest.TestCase):
+    """Сообщения не должны строиться, если уровень логгера выключен."""
+
+    def setUp(self) -> None:
+        self.log = logging.getLogger("tests.level_gating")
+        self.log.propagate = False
+        self.log.handlers = []
+        self.stream = io.StringIO()
+        handler = logging.StreamHandler(self.stream)
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
+        self.log.addHandler(handler)
+
+        @logger(handle=self.log)
+        def identity(value: object) -> object:
+            return value
+
+        @logger(handle=self.log)
+        def failing() -> None:
+            raise ValueError("boom")
+
+        self.identity = identity
+        self.failing = failing
+
+    def test_repr_skipped_when_info_disabled(self) -> None:
+        """При уровне WARNING repr аргументов и результата не вызывается."""
+        self.log.setLevel(logging.WARNING)
+        counter = _ReprCounter()
+
+        self.assertIs(self.identity(counter), counter)
+        self.assertEqual(counter.calls, 0)
+        self.assertEqual(self.stream.getvalue(), "")
+
+    def test_level_change_is_picked_up(self) -> None:
+        """После понижения уровня сообщения снова пишутся."""
+        self.log.setLevel(logging.WARNING)
+        self.identity(1)
+        self.log.setLevel(logging.INFO)
+        self.identity(2)
+
+        logs = self.stream.getvalue()
+        self.assertNotIn("args=(1,)", logs)
+        self.assertIn("Calling identity with args=(2,), kwargs={}", logs)
+        self.assertIn("identity returned 2", logs)
+
+    def test_error_logged_when_info_disabled(self) -> None:
+        """ERROR пишется даже при выключенном INFO."""
+        self.log.setLevel(logging.ERROR)
+        with self.assertRaises(ValueError):
+            self.failing()
+
+        self.assertEqual(self.stream.getvalue(),
+                         "ERROR:Function failing raised ValueError: boom\n")
+
+
+class TestReprPolicy(unittest.TestCase):
+    """Ограниченный repr аргументов и результата в логах."""
+
+    def _log_call(self, policy: ReprPolicy | None, value: object) -> str:
+        stream = io.StringIO()
+
+        @logger(handle=stream, repr_policy=policy)
+        def identity(x: object) -> object:
+            return x
+
+        identity(value)
+        return stream.getvalue()
+
+    def test_long_string_is_truncated(self) -> None:
+        policy = ReprPolicy(max_length=50)
+        text = policy("x" * 1_000_000)
+        self.assertLessEqual(len(text), 50)
+        self.assertIn("...", text)
+
+    def test_container_items_and_depth_are_limited(self) -> None:
+        policy = ReprPolicy(max_length=1000, max_depth=2, max_items=3)
+        self.assertEqual(policy(list(range(100))), "[0, 1, 2, ...]")
+        self.assertEqual(policy([[[1]]]), "[[[...]]]")
+
+    def test_summary_for_large_bytes_and_collections(self) -> None:
+        policy = ReprPolicy(summary_threshold=10, hash_bytes=True)
+        self.assertRegex(policy(b"\x00" * 1024),
+                         r"^<bytes len=1024 sha256=[0-9a-f]{16}>$")
+        self.assertEqual(policy({i: i for i in range(11)}),
+                         "<dict len=11>")
+        self.assertEqual(policy([1, 2]), "[1, 2]")
+
+    def test_log_line_is_bounded_for_large_payload(self) -> None:
+        """Размер лога не зависит от размера аргумента и результата."""
+        payload = {f"key_{i}": "v" * 10_000 for i in range(10_000)}
+        logs = self._log_call(ReprPolicy(max_length=200), payload)
+        self.assertLess(len(logs), 1000)
+        self.assertIn("identity returned {", logs)
+
+    def test_policy_none_keeps_full_repr(self) -> None:
+        logs = self._log_call(None, "y" * 5000)
+        self.assertIn("y" * 5000, logs)
+
+
+class _GatedHandler(logging.Handler):
+    """Обработчик, который ждёт разрешения перед записью каждой записи."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.entered.set()
+        self.gate.wait(timeout=5)
+        self.messages.append(record.getMessage())
+
+
+class TestQueuedLogging(unittest.TestCase):
+    """Асинхронная запись логов через ограниченную очередь."""
+
+    def setUp(self) -> None:
+        self.log = logging.getLogger(f"tests.queued.{self._testMethodName}")
+        self.log.propagate = False
+        self.log.setLevel(logging.INFO)
+        self.target = _GatedHandler()
+        self.log.addHandler(self.target)
+
+    def _fill(self, queued: QueuedLogging) -> None:
+        """Занять фоновый поток первой записью и записать ещё четыре."""
+        self.log.info("m0")
+        self.assertTrue(self.target.entered.wait(timeout=5))
+        for i in range(1, 5):
+            self.log.info("m%d", i)
+
+    def test_calls_do_not_wait_for_handler(self) -> None:
+        """Запись в лог не ждёт медленного обработчика."""
+        queued = QueuedLogging(self.log, maxsize=100)
+
+        @logger(handle=self.log)
+        def double(x: int) -> int:
+            return x * 2
+
+        self.assertEqual(double(21), 42)
+        self.assertEqual(self.target.messages, [])
+
+        self.target.gate.set()
+        queued.stop()
+        self.assertEqual(self.target.messages, [
+            "Calling double with args=(21,), kwargs={}",
+            "double returned 42",
+        ])
+        self.assertIs(self.log.handlers[0], self.target)
+
+    def test_drop_counts_lost_records(self) -> None:
+        queued = QueuedLogging(self.log, maxsize=2, overflow="drop")
+        self._fill(queued)
+        self.target.gate.set()
+        queued.stop()
+
+        self.assertEqual(queued.dropped, 2)
+        self.assertEqual(self.target.messages[:3], ["m0", "m1", "m2"])
+        self.assertIn("dropped 2 records", self.target.messages[-1])
+
+    def test_drop_oldest_keeps_newest(self) -> None:
+        queued = QueuedLogging(self.log, maxsize=2, overflow="drop_oldest")
+        self._fill(queued)
+        self.target.gate.set()
+        queued.stop()
+
+        self.assertEqual(queued.dropped, 2)
+        self.assertEqual(self.target.messages[:3], ["m0", "m3", "m4"])
+
+    def test_invalid_overflow_policy(self) -> None:
+        with self.assertRaises(ValueError):
+            QueuedLogging(self.log, overflow="explode")
+
+
+class TestLoggerCoroutinesAndGenerators(unittest.TestCase):
+    """Корутины и генераторы логируются по факту выполнения."""
+
+    def setUp(self) -> None:
+        self.stream = io.StringIO()
+
+    def test_coroutine_result_is_awaited(self) -> None:
+        @logger(handle=self.stream)
+        async def add(a: int, b: int) -> int:
+            await asyncio.sleep(0)
+            return a + b
+
+        self.assertTrue(inspect.iscoroutinefunction(add))
+        coro = add(2, 3)
+        self.assertEqual(self.stream.getvalue(), "")
+
+        self.assertEqual(asyncio.run(coro), 5)
+        logs = self.stream.getvalue()
+        self.assertIn("Calling add with args=(2, 3)", logs)
+        self.assertIn("add returned 5", logs)
+        self.assertNotIn("coroutine", logs)
+
+    def test_coroutine_exception(self) -> None:
+        @logger(handle=self.stream)
+        async def broken() -> None:
+            raise RuntimeError("async boom")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(broken())
+        self.assertIn("ERROR: Function broken raised RuntimeError: async boom",
+                      self.stream.getvalue())
+
+    def test_generator_finishes_after_exhaustion(self) -> None:
+        @logger(handle=self.stream)
+        def count(n: int):
+            for i in range(n):
+                yield i
+            return "done"
+
+        gen = count(3)
+        self.assertEqual(self.stream.getvalue(), "")
+        self.assertEqual(next(gen), 0)
+        self.assertIn("Calling count", self.stream.getvalue())
+        self.assertNotIn("returned", self.stream.getvalue())
+
+        self.assertEqual(list(gen), [1, 2])
+        self.assertIn("count returned 'done'", self.stream.getvalue())
+
+    def test_generator_send_is_forwarded(self) -> None:
+        @logger(handle=self.stream)
+        def echo():
+            received = yield "ready"
+            yield received
+
+        gen = echo()
+        self.assertEqual(next(gen), "ready")
+        self.assertEqual(gen.send("ping"), "ping")
+
+    def test_async_generator_asend_and_athrow_are_forwarded(self) -> None:
+        @logger(handle=self.stream)
+        async def echo():
+            received = yield "ready"
+            while True:
+                try:
+                    received = yield received
+                except KeyError as e:
+                    received = f"caught {e.args[0]}"
+
+        async def talk() -> list[str]:
+            agen = echo()
+            replies = [await agen.asend(None), await agen.asend("ping"),
+                       await agen.athrow(KeyError("key")),
+                       await agen.asend("pong")]
+            with self.assertRaises(ValueError):
+                await agen.athrow(ValueError("stop"))
+            return replies
+
+        self.assertEqual(asyncio.run(talk()),
+                         ["ready", "ping", "caught key", "pong"])
+        logs = self.stream.getvalue()
+        self.assertNotIn("KeyError", logs)
+        self.assertIn("Function echo raised ValueError: stop", logs)
+
+    def test_async_generator(self) -> None:
+        @logger(handle=self.stream)
+        async def ticks(n: int):
+            for i in range(n):
+                await asyncio.sleep(0)
+                yield i
+            raise ValueError("no more ticks")
+
+        self.assertTrue(inspect.isasyncgenfunction(ticks))
+
+        async def consume() -> list[int]:
+            items = []
+            async for item in ticks(2):
+                items.append(item)
+                self.assertNotIn("ERROR", self.stream.getvalue())
+            return items
+
+        with self.assertRaises(ValueError):
+            asyncio.run(consume())
+        logs = self.stream.getvalue()
+        self.assertIn("Calling ticks with args=(2,)", logs)
+        self.assertIn("Function ticks raised ValueError: no more ticks", logs)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Гистограмма задержок и режим timing=True."""
+
+    def test_percentiles_within_bucket_error(self) -> None:
+        histogram = LatencyHistogram()
+        for ns in range(1, 10_001):
+            histogram.record(ns * 1000)
+
+        stats = histogram.stats()
+        self.assertEqual(stats["count"], 10_000)
+        self.assertEqual(stats["max"], 10_000_000)
+        for key, expected in (("p50", 5_000_000), ("p95", 9_500_000),
+                              ("p99", 9_900_000)):
+            self.assertAlmostEqual(stats[key] / expected, 1.0, delta=1 / 16)
+
+    def test_empty_and_reset(self) -> None:
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.stats(),
+                         {"count": 0, "p50": 0, "p95": 0, "p99": 0, "max": 0})
+        histogram.record(42)
+        histogram.reset()
+        self.assertEqual(histogram.stats()["count"], 0)
+
+    def test_counts_from_all_threads(self) -> None:
+        stream = io.StringIO()
+
+        @logger(handle=stream, timing=True, summary_interval=3600)
+        def work(x: int) -> int:
+            return x + 1
+
+        threads = [threading.Thread(target=lambda: [work(i)
+                                                    for i in range(250)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = work.stats()
+        self.assertEqual(stats["count"], 1000)
+        self.assertGreater(stats["max"], 0)
+        self.assertLessEqual(stats["p50"], stats["p99"])
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_summary_replaces_per_call_lines(self) -> None:
+        stream = io.StringIO()
+
+        @logger(handle=stream, timing=True, summary_interval=0)
+        def work(x: int) -> int:
+            if x < 0:
+                raise ValueError("negative")
+            return x
+
+        work(1)
+        with self.assertRaises(ValueError):
+            work(-1)
+
+        logs = stream.getvalue()
+        self.assertNotIn("Calling", logs)
+        self.assertIn("INFO: work latency: count=1 p50=", logs)
+        self.assertIn("INFO: work latency: count=2 p50=", logs)
+        self.assertIn("ERROR: Function work raised ValueError", logs)
+
+    def test_timing_keeps_per_call_lines_by_default(self) -> None:
+        stream = io.StringIO()
+
+        @logger(handle=stream, timing=True)
+        def work() -> int:
+            return 7
+
+        work()
+        self.assertIn("work returned 7", stream.getvalue())
+        self.assertEqual(work.stats()["count"], 1)
+
+    def test_summary_interval_requires_timing(self) -> None:
+        with self.assertRaises(ValueError):
+            logger(handle=io.StringIO(), summary_interval=1.0)
+
+
+class TestLoggerSampling(unittest.TestCase):
+    """Выборочное логирование часто вызываемых функций."""
+
+    def test_sample_every_n(self) -> None:
+        stream = io.StringIO()
+
+        @logger(handle=stream, sample_every=4,
+                suppressed_report_interval=3600)
+        def work(x: int) -> int:
+            return x
+
+        for i in range(8):
+            work(i)
+
+        logs = stream.getvalue()
+        self.assertEqual(logs.count("Calling work"), 2)
+        self.assertIn("args=(0,)", logs)
+        self.assertIn("args=(4,)", logs)
+
+    def test_rate_limit_allows_burst(self) -> None:
+        sampler = CallSampler(rate_limit=0.001, burst=3)
+        admitted = [sampler.admit() for _ in range(10)]
+        self.assertEqual(admitted, [True] * 3 + [False] * 7)
+        self.assertEqual(sampler.suppressed, 7)
+
+    def test_errors_always_logged(self) -> None:
+        stream = io.StringIO()
+
+        @logger(handle=stream, rate_limit=0.001, burst=1,
+                suppressed_report_interval=3600)
+        def check(x: int) -> int:
+            if x < 0:
+                raise ValueError(f"bad {x}")
+            return x
+
+        check(1)
+        for x in (-1, -2):
+            with self.assertRaises(ValueError):
+                check(x)
+
+        logs = stream.getvalue()
+        self.assertEqual(logs.count("Calling check"), 1)
+        self.assertIn("ValueError: bad -1", logs)
+        self.assertIn("ValueError: bad -2", logs)
+
+    def test_suppressed_calls_are_reported(self) -> None:
+        stream = io.StringIO()
+
+        @logger(handle=stream, sample_every=5, suppressed_report_interval=0)
+        def work() -> None:
+            return None
+
+        for _ in range(5):
+            work()
+
+        logs = stream.getvalue()
+        self.assertEqual(logs.count("work: 1 calls not logged (sampling)"), 4)
+
+    def test_inner_records_follow_sampling(self) -> None:
+        log = logging.getLogger("tests.sampling.inner")
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        log.handlers = []
+        log.filters = []
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
+        log.addHandler(handler)
+
+        @logger(handle=log, sample_every=2, suppressed_report_interval=3600)
+        def work(x: int) -> None:
+            log.debug("inner debug %d", x)
+            log.error("inner error %d", x)
+
+        for i in range(4):
+            work(i)
+
+        logs = stream.getvalue()
+        self.assertIn("inner debug 0", logs)
+        self.assertNotIn("inner debug 1", logs)
+        self.assertIn("inner debug 2", logs)
+        for i in range(4):
+            self.assertIn(f"inner error {i}", logs)
+
+    def test_generator_records_follow_sampling(self) -> None:
+        log = logging.getLogger("tests.sampling.generators")
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        log.handlers = []
+        log.filters = []
+        stream = io.StringIO()
+        log.addHandler(logging.StreamHandler(stream))
+
+        @logger(handle=log, sample_every=2, suppressed_report_interval=3600)
+        def items(x: int):
+            log.debug("gen debug %d", x)
+            yield x
+            log.debug("gen done %d", x)
+
+        @logger(handle=log, sample_every=2, suppressed_report_interval=3600)
+        async def aitems(x: int):
+            log.debug("agen debug %d", x)
+            yield x
+
+        async def consume_async() -> None:
+            for i in range(2):
+                async for _ in aitems(i):
+                    log.debug("consumer async %d", i)
+
+        for i in range(2):
+            for _ in items(i):
+                # Потребитель не относится к пропущенному вызову.
+                log.debug("consumer %d", i)
+        asyncio.run(consume_async())
+
+        logs = stream.getvalue()
+        for text in ("gen debug 0", "gen done 0", "agen debug 0",
+                     "consumer 0", "consumer 1",
+                     "consumer async 0", "consumer async 1"):
+            self.assertIn(text, logs)
+        for text in ("gen debug 1", "gen done 1", "agen debug 1"):
+            self.assertNotIn(text, logs)
+
+
+class TestLazyLoggerSetup(unittest.TestCase):
+    """Файлы логов не открываются при импорте и переоткрываются после fork."""
+
+    def test_import_does_not_create_log_files(self) -> None:
+        module_dir = os.path.dirname(os.path.abspath(logging_utils.__file__))
+        with tempfile.TemporaryDirectory() as tmp:
+            subprocess.run(
+                [sys.executable, "-c", "import logging_utils"],
+                cwd=tmp, check=True,
+                env={**os.environ, "PYTHONPATH": module_dir},
+            )
+            self.assertEqual(os.listdir(tmp), [])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_child_after_fork_gets_sync_handlers(self) -> None:
+        log = logging.getLogger("tests.lazy.fork")
+        log.propagate = False
+        log.handlers = []
+        target = logging.StreamHandler(io.StringIO())
+        log.addHandler(target)
+        queued = enable_queued_logging(log)
+        self.addCleanup(queued.stop)
+        log.warning("parent record")
+
+        pid = os.fork()
+        if pid == 0:
+            ok = (log.handlers == [target] and not queued.running
+                  and all(h.stream is None
+                          for h in logging_utils._file_handlers))
+            os._exit(0 if ok else 1)
+
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertTrue(queued.running)
+
+
 class TestStreamWriteExample(unittest.TestCase):
     """
     Пример теста с контекстом из задания.
@@ -140,5 +1096,71 @@ class TestSolveQuadratic(unittest.TestCase):
             solve_quadratic(0, 0, 1)
 
 
+class TestSolveQuadraticBatch(unittest.TestCase):
+    """Векторный решатель: корни, маски, устойчивость, сводный лог."""
+
+    def test_matches_scalar_solver(self) -> None:
+        a = [1, 2, 1, 1]
+        b = [-3, 4, 2, 0]
+        c = [2, -6, 1, 1]
+        result = solve_quadratic_batch(a, b, c)
+
+        for i in range(3):
+            roots = solve_quadratic(a[i], b[i], c[i])
+            expected = sorted(roots * 2 if len(roots) == 1 else roots)
+            self.assertAlmostEqual(result.x1[i], expected[0])
+            self.assertAlmostEqual(result.x2[i], expected[1])
+        self.assertTrue(np.isnan(result.x1[3]) and np.isnan(result.x2[3]))
+        self.assertEqual(result.no_real.tolist(), [False, False, False, True])
+        self.assertFalse(result.degenerate.any())
+        self.assertIsNone(result.z1)
+
+    def test_stable_small_root(self) -> None:
+        """При b^2 >> 4ac малый корень не теряется при вычитании."""
+        result = solve_quadratic_batch([1.0], [1e8], [1.0])
+        self.assertAlmostEqual(result.x2[0] / -1e-8, 1.0, places=12)
+        self.assertAlmostEqual(result.x1[0] / -1e8, 1.0, places=12)
+
+    def test_zero_b_and_c(self) -> None:
+        result = solve_quadratic_batch([1.0, 4.0], [0.0, 0.0], [0.0, -1.0])
+        self.assertEqual(result.x1.tolist(), [0.0, -0.5])
+        self.assertEqual(result.x2.tolist(), [0.0, 0.5])
+
+    def test_complex_roots(self) -> None:
+        result = solve_quadratic_batch([1, 1], [0, -3], [1, 2],
+                                       complex_roots=True)
+        np.testing.assert_allclose(result.z1, [-1j, 1.0])
+        np.testing.assert_allclose(result.z2, [1j, 2.0])
+
+    def test_degenerate_mask_and_strict(self) -> None:
+        result = solve_quadratic_batch([0, 1, 0], [1, -3, 0], [1, 2, 1])
+        self.assertEqual(result.degenerate.tolist(), [True, False, True])
+        self.assertTrue(np.isnan(result.x1[[0, 2]]).all())
+        self.assertFalse(result.no_real.any())
+
+        with self.assertRaisesRegex(ValueError, "Coefficient 'a'"):
+            solve_quadratic_batch([0, 1], [1, 1], [1, 0], strict=True)
+        with self.assertRaisesRegex(ValueError, "Both a and b"):
+            solve_quadratic_batch([0, 1], [0, 1], [1, 0], strict=True)
+
+    def test_validation(self) -> None:
+        with self.assertRaises(TypeError):
+            solve_quadratic_batch(["abc"], [2], [3])
+        with self.assertRaises(ValueError):
+            solve_quadratic_batch([1, 2], [1, 2, 3], [1])
+
+    def test_one_summary_record_per_batch(self) -> None:
+        with self.assertLogs("quadratic", level="INFO") as logs:
+            solve_quadratic_batch(np.ones(10_000), np.full(10_000, -3.0),
+                                  np.full(10_000, 2.0))
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].levelname, "INFO")
+        self.assertIn("n=10000 two_roots=10000", logs.output[0])
+
+        with self.assertLogs("quadratic", level="INFO") as logs:
+            solve_quadratic_batch([1, 1], [0, 0], [1, -1])
+        self.assertEqual([r.levelname for r in logs.records], ["WARNING"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import json
+import math
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
-from jinja2 import Environment, PackageLoader, select_autoescape
-
 from models import Author, App, User, Currency
 from utils.currencies_api import file_logged_get_currencies
+from utils.rates_refresher import RatesRefresher, RatesUnavailableError
+from utils.templates import create_environment, preload_templates
+from utils.threadpool_server import ThreadPoolHTTPServer
 
 
 main_author = Author(name="Ломаченко Ян", group="P3120")
@@ -25,11 +28,18 @@ users: list[User] = [
 CURRENCY_CODES: list[str] = ["USD", "EUR", "GBP", "AUD", "THB", "VND", "CNY",
                              "IDR", "UAH", "AED", "CAD", "JPY"]
 
+# Курсы обновляются в фоне; страницы показывают последний снимок,
+# пока он не старше RATES_MAX_STALENESS секунд.
+RATES_REFRESH_INTERVAL: float = 300.0
+RATES_MAX_STALENESS: float = 3600.0
+
+# Пул потоков сервера: число обработчиков и длина очереди соединений.
+SERVER_MAX_WORKERS: int = 8
+SERVER_MAX_QUEUE: int = 64
+
 
-env = Environment(
-    loader=PackageLoader("myapp"),
-    autoescape=select_autoescape(["html", "xml"]),
-)
+# Скомпилированные шаблоны кэшируются на диске (utils/templates.py).
+env = create_environment()
 
 
 def render_template(template_name: str, context: dict) -> str:
@@ -54,6 +64,7 @@ class MyRequestHandler(BaseHTTPRequestHandler):
       /users      — список пользователей
       /currencies — курсы валют
       /author     — страница об авторе
+      /health     — возраст данных о курсах (JSON)
     """
 
     def do_GET(self) -> None:
@@ -69,6 +80,8 @@ class MyRequestHandler(BaseHTTPRequestHandler):
             self.handle_currencies()
         elif path == "/author":
             self.handle_author()
+        elif path == "/health":
+            self.handle_health()
         else:
             self.send_error(404, "Страница не найдена")
 
@@ -97,16 +110,28 @@ class MyRequestHandler(BaseHTTPRequestHandler):
         self._send_html_response(html)
 
     def handle_currencies(self) -> None:
-        """Страница с курсами валют '/currencies'."""
+        """
+        Страница с курсами валют '/currencies'.
+
+        Если свежих курсов нет (``/health`` в этот момент сообщает
+        ``no_data`` или ``stale``), отвечает 503 с Retry-After.
+        """
+        refresher = self.server.rates_refresher
         try:
-            rates = file_logged_get_currencies(CURRENCY_CODES)
+            snapshot = refresher.current()
+        except RatesUnavailableError as e:
+            error_html = f"<h1>Ошибка при получении курсов валют</h1><p>{e}</p>"
+            self._send_html_response(
+                error_html, status_code=503,
+                headers={"Retry-After": self._retry_after(refresher)})
+            return
         except Exception as e:
             error_html = f"<h1>Ошибка при получении курсов валют</h1><p>{e}</p>"
             self._send_html_response(error_html, status_code=500)
             return
 
         currencies: list[Currency] = []
-        for idx, (code, value) in enumerate(rates.items(), start=1):
+        for idx, (code, value) in enumerate(snapshot.rates.items(), start=1):
             c = Currency(
                 currency_id=idx,
                 num_code=None,
@@ -122,6 +147,7 @@ class MyRequestHandler(BaseHTTPRequestHandler):
             {
                 "myapp": app_info.name,
                 "currencies": currencies,
+                "rates_age": int(snapshot.age()),
             },
         )
         self._send_html_response(html)
@@ -139,24 +165,87 @@ class MyRequestHandler(BaseHTTPRequestHandler):
         self._send_html_response(html)
 
 
-    def _send_html_response(self, html: str, status_code: int = 200) -> None:
+    def handle_health(self) -> None:
+        """Состояние данных о курсах '/health': 200, если они свежие."""
+        refresher = self.server.rates_refresher
+        health = refresher.health()
+        status_code = 200 if health["status"] == "ok" else 503
+        body = json.dumps(health, ensure_ascii=False).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status_code == 503:
+            self.send_header("Retry-After", self._retry_after(refresher))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _retry_after(refresher: RatesRefresher) -> str:
+        """Через сколько секунд фоновый поток снова попробует обновить курсы."""
+        return str(max(1, math.ceil(refresher.retry_interval)))
+
+    def _send_html_response(self, html: str, status_code: int = 200,
+                            headers: dict[str, str] | None = None) -> None:
         """Отправить HTML-ответ клиенту."""
         self.send_response(status_code)
         self.send_header(
             "Content-Type", "text/html; charset=utf-8")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
         self.wfile.write(html.encode("utf-8"))
 
 
-def run_server(host: str = "localhost", port: int = 8080) -> None:
-    """Запустить HTTP-сервер."""
-    httpd = HTTPServer((host, port), MyRequestHandler)
+def create_rates_refresher(
+        refresh_interval: float = RATES_REFRESH_INTERVAL,
+        max_staleness: float = RATES_MAX_STALENESS,
+) -> RatesRefresher:
+    """Фоновое обновление курсов CURRENCY_CODES с логированием в файл."""
+    return RatesRefresher(
+        CURRENCY_CODES,
+        fetch=file_logged_get_currencies,
+        interval=refresh_interval,
+        max_staleness=max_staleness,
+    )
+
+
+def run_server(host: str = "localhost", port: int = 8080,
+               rates_refresher: RatesRefresher | None = None,
+               max_workers: int | None = SERVER_MAX_WORKERS,
+               max_queue: int = SERVER_MAX_QUEUE) -> None:
+    """
+    Запустить HTTP-сервер.
+
+    Шаблоны загружаются до начала приёма запросов, поэтому первые
+    запросы не ждут их компиляции.
+
+    Parameters:
+        host, port: адрес сервера.
+        rates_refresher: источник курсов для '/currencies'; по умолчанию
+            create_rates_refresher(). Фоновый поток запускается вместе
+            с сервером и останавливается при его остановке.
+        max_workers: число потоков-обработчиков; None — обрабатывать
+            запросы по одному в основном потоке (HTTPServer).
+        max_queue: длина очереди соединений, ожидающих обработчика;
+            при переполнении клиент получает 503.
+    """
+    preload_templates(env)
+    if max_workers is None:
+        httpd = HTTPServer((host, port), MyRequestHandler)
+    else:
+        httpd = ThreadPoolHTTPServer((host, port), MyRequestHandler,
+                                     max_workers=max_workers,
+                                     max_queue=max_queue)
+    httpd.rates_refresher = (rates_refresher if rates_refresher is not None
+                             else create_rates_refresher())
+    httpd.rates_refresher.start()
     print(f"Сервер запущен: http://{host}:{port}")
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\nОстановка сервера...")
     finally:
+        httpd.rates_refresher.stop(timeout=1.0)
         httpd.server_close()
 
 
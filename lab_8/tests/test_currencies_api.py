@@ -54,13 +54,13 @@ class TestControllerRoutes(unittest.TestCase):
     def test_currencies_route(self) -> None:
         """
         Маршрут '/currencies' должен отдавать 200
-        (если API доступно) или 500 при ошибке.
+        (если API доступно) или 503, если курсов нет.
 
         В любом случае маршрут должен корректно обрабатываться,
         а не падать с исключением.
         """
         status, body = self._get("/currencies")
-        self.assertIn(status, (200, 500))
+        self.assertIn(status, (200, 503))
         if status == 200:
             self.assertIn("Курсы валют", body)
         else:
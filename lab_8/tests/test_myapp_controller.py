@@ -55,19 +55,30 @@ class TestControllerRoutes(unittest.TestCase):
     def test_currencies_route(self) -> None:
         """
         Маршрут '/currencies' должен отдавать 200
-        (если API доступно) или 500 при ошибке.
+        (если API доступно) или 503 с Retry-After, если курсов нет.
 
         В любом случае маршрут должен корректно обрабатываться,
         а не падать с исключением.
         """
-        status, body = self._get("/currencies")
-        self.assertIn(status, (200, 500))
-        if status == 200:
+        conn = HTTPConnection(self.host, self.port, timeout=10)
+        conn.request("GET", "/currencies")
+        resp = conn.getresponse()
+        body = resp.read().decode("utf-8", errors="ignore")
+        conn.close()
+        self.assertIn(resp.status, (200, 503))
+        if resp.status == 200:
             # При успешном ответе проверим, что в HTML есть слово 'Курсы'
             self.assertIn("Курсы валют", body)
         else:
             # При ошибке должен быть текст про ошибку
             self.assertIn("Ошибка при получении курсов", body)
+            self.assertGreaterEqual(int(resp.getheader("Retry-After")), 1)
+
+    def test_health_route(self) -> None:
+        """Маршрут '/health' должен отдавать возраст данных о курсах."""
+        status, body = self._get("/health")
+        self.assertIn(status, (200, 503))
+        self.assertIn("age_seconds", body)
 
     def test_author_route(self) -> None:
         """Маршрут '/author' должен отдавать 200 и содержать ФИО автора или группу."""
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+import unittest
+from http.client import HTTPConnection
+
+from myapp import run_server
+from utils.rates_refresher import RatesRefresher, RatesUnavailableError
+
+
+class FakeFetch:
+    """Подменная функция загрузки курсов со счётчиком вызовов."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.fail = False
+        self.value = 90.0
+
+    def __call__(self, codes: list[str]) -> dict[str, float]:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("API недоступен")
+        return {code: self.value for code in codes}
+
+
+class TestRatesRefresher(unittest.TestCase):
+    """Тесты фонового обновления курсов."""
+
+    def setUp(self) -> None:
+        self.fetch = FakeFetch()
+
+    def test_current_returns_last_snapshot(self) -> None:
+        refresher = RatesRefresher(["USD", "EUR"], self.fetch)
+        self.assertTrue(refresher.refresh())
+        snapshot = refresher.current()
+        self.assertEqual(snapshot.rates, {"USD": 90.0, "EUR": 90.0})
+        self.assertLess(snapshot.age(), 1.0)
+        self.assertEqual(self.fetch.calls, 1)
+
+    def test_error_keeps_previous_data(self) -> None:
+        refresher = RatesRefresher(["USD"], self.fetch)
+        refresher.refresh()
+        self.fetch.fail = True
+        self.assertFalse(refresher.refresh())
+        self.assertEqual(refresher.current().rates, {"USD": 90.0})
+        self.assertEqual(refresher.errors, 1)
+        self.assertIn("API недоступен", refresher.last_error)
+
+    def test_stale_data_is_not_served(self) -> None:
+        refresher = RatesRefresher(["USD"], self.fetch, interval=0.05,
+                                   max_staleness=0.1)
+        refresher.refresh()
+        time.sleep(0.15)
+        with self.assertRaises(RatesUnavailableError):
+            refresher.current()
+        self.assertEqual(refresher.health()["status"], "stale")
+
+    def test_no_data_after_failed_first_attempt(self) -> None:
+        self.fetch.fail = True
+        refresher = RatesRefresher(["USD"], self.fetch, initial_wait=0.0)
+        refresher.refresh()
+        with self.assertRaises(RatesUnavailableError):
+            refresher.current()
+        health = refresher.health()
+        self.assertEqual(health["status"], "no_data")
+        self.assertIsNone(health["age_seconds"])
+
+    def test_background_thread_refreshes(self) -> None:
+        refresher = RatesRefresher(["USD"], self.fetch, interval=0.05)
+        refresher.start()
+        self.addCleanup(refresher.stop)
+        self.assertEqual(refresher.current().rates, {"USD": 90.0})
+
+        self.fetch.value = 95.0
+        time.sleep(0.2)
+        self.assertEqual(refresher.current().rates, {"USD": 95.0})
+        self.assertGreaterEqual(refresher.refreshes, 2)
+
+        refresher.stop()
+        calls = self.fetch.calls
+        time.sleep(0.1)
+        self.assertEqual(self.fetch.calls, calls)
+
+    def test_invalid_policy(self) -> None:
+        with self.assertRaises(ValueError):
+            RatesRefresher(["USD"], self.fetch, interval=0)
+        with self.assertRaises(ValueError):
+            RatesRefresher(["USD"], self.fetch, interval=60, max_staleness=10)
+
+
+class TestCurrenciesFromSnapshot(unittest.TestCase):
+    """Страницы '/currencies' и '/health' без обращения к API на запрос."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.host = "localhost"
+        cls.port = 8083
+        cls.fetch = FakeFetch()
+        cls.refresher = RatesRefresher(["USD", "EUR"], cls.fetch,
+                                       interval=60)
+        threading.Thread(
+            target=run_server,
+            kwargs={"host": cls.host, "port": cls.port,
+                    "rates_refresher": cls.refresher},
+            daemon=True,
+        ).start()
+        time.sleep(0.5)
+
+    def _get(self, path: str) -> tuple[int, str]:
+        conn = HTTPConnection(self.host, self.port, timeout=5)
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        body = resp.read().decode("utf-8", errors="ignore")
+        conn.close()
+        return resp.status, body
+
+    def test_currencies_rendered_from_snapshot(self) -> None:
+        for _ in range(3):
+            status, body = self._get("/currencies")
+            self.assertEqual(status, 200)
+            self.assertIn("USD", body)
+            self.assertIn("90.0000", body)
+        self.assertEqual(self.fetch.calls, 1)
+
+    def test_health(self) -> None:
+        status, body = self._get("/health")
+        self.assertEqual(status, 200)
+        health = json.loads(body)
+        self.assertEqual(health["status"], "ok")
+        self.assertLess(health["age_seconds"], 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from utils.templates import create_environment, preload_templates
+
+
+class TestTemplateCache(unittest.TestCase):
+    """Кэш байткода шаблонов и предзагрузка."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = os.path.join(tmp.name, "cache")
+
+    def test_preload_writes_bytecode(self) -> None:
+        env = create_environment(cache_dir=self.cache_dir)
+        count = preload_templates(env)
+        self.assertEqual(count, len(env.list_templates(extensions=["html"])))
+        self.assertEqual(len(os.listdir(self.cache_dir)), count)
+
+    def test_second_environment_does_not_compile(self) -> None:
+        preload_templates(create_environment(cache_dir=self.cache_dir))
+
+        env = create_environment(cache_dir=self.cache_dir)
+        with mock.patch.object(env, "compile", wraps=env.compile) as compile:
+            preload_templates(env)
+        compile.assert_not_called()
+
+    def test_without_cache(self) -> None:
+        env = create_environment(cache_dir=None)
+        self.assertIsNone(env.bytecode_cache)
+        self.assertGreater(preload_templates(env), 0)
+
+    def test_loading_does_not_import_app(self):
+        # Предкомпиляция не должна запускать инициализацию приложения.
+        code = ("import sys; from utils.templates import create_environment, "
+                "preload_templates; "
+                "preload_templates(create_environment(cache_dir=None)); "
+                "assert 'myapp' not in sys.modules")
+        subprocess.run([sys.executable, "-c", code], check=True,
+                       cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import threading
+import time
+import unittest
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+from utils.threadpool_server import ThreadPoolHTTPServer
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Обработчик: '/slow' отвечает через 0.3 с, остальные пути — сразу."""
+
+    release = threading.Event()
+
+    def do_GET(self) -> None:
+        if self.path == "/slow":
+            self.release.wait(0.3)
+        body = self.path.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        return
+
+
+class TestThreadPoolHTTPServer(unittest.TestCase):
+    """Тесты сервера с пулом потоков."""
+
+    def _start(self, **kwargs) -> ThreadPoolHTTPServer:
+        server = ThreadPoolHTTPServer(("localhost", 0), SlowHandler, **kwargs)
+        thread = threading.Thread(target=server.serve_forever,
+                                  kwargs={"poll_interval": 0.05},
+                                  daemon=True)
+        thread.start()
+
+        def stop() -> None:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.addCleanup(stop)
+        return server
+
+    def _get(self, server: ThreadPoolHTTPServer, path: str) -> int:
+        conn = HTTPConnection("localhost", server.server_address[1],
+                              timeout=5)
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        return resp.status
+
+    def test_slow_request_does_not_block_others(self) -> None:
+        server = self._start(max_workers=4)
+        slow = threading.Thread(target=self._get, args=(server, "/slow"))
+        slow.start()
+        time.sleep(0.05)
+
+        start = time.perf_counter()
+        self.assertEqual(self._get(server, "/fast"), 200)
+        self.assertLess(time.perf_counter() - start, 0.2)
+        slow.join()
+
+    def test_full_queue_is_rejected_with_503(self) -> None:
+        server = self._start(max_workers=1, max_queue=1)
+        statuses: list[int] = []
+        threads = [
+            threading.Thread(
+                target=lambda: statuses.append(self._get(server, "/slow")))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+
+        self.assertIn(503, statuses)
+        self.assertIn(200, statuses)
+        self.assertEqual(statuses.count(503), server.rejected)
+
+    def test_invalid_pool_size(self) -> None:
+        with self.assertRaises(ValueError):
+            ThreadPoolHTTPServer(("localhost", 0), SlowHandler, max_workers=0)
+
+    def test_bind_error_is_not_masked(self) -> None:
+        server = self._start(max_workers=1)
+        with self.assertRaises(OSError):
+            ThreadPoolHTTPServer(server.server_address, SlowHandler)
+
+
+class TestSharedModule(unittest.TestCase):
+    """Копии модуля в lab_8 и lab_9 не расходятся."""
+
+    def test_copies_are_identical(self) -> None:
+        here = Path(__file__).resolve().parents[1]
+        other = here.parent / "lab_9" / "utils" / "threadpool_server.py"
+        if not other.exists():
+            self.skipTest("lab_9 is not available")
+        self.assertEqual(
+            (here / "utils" / "threadpool_server.py").read_bytes(),
+            other.read_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
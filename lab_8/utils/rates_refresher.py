@@ -0,0 +1,174 @@
+"""Фоновое обновление курсов валют для страниц приложения."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple
+
+RatesFetch = Callable[[list[str]], dict[str, float]]
+
+
+class RatesUnavailableError(RuntimeError):
+    """Нет данных о курсах, достаточно свежих для отображения."""
+
+
+class RatesSnapshot(NamedTuple):
+    """Последние полученные курсы и момент их получения."""
+
+    rates: dict[str, float]
+    fetched_at: float
+    fetched_monotonic: float
+
+    def age(self) -> float:
+        """Возраст данных в секундах."""
+        return time.monotonic() - self.fetched_monotonic
+
+
+class RatesRefresher:
+    """
+    Держит в памяти последние курсы валют и обновляет их в фоновом потоке.
+
+    Обработчики запросов читают готовый снимок (:meth:`current`) и не
+    ждут API. При ошибке обновления остаются прежние данные, следующая
+    попытка — через ``retry_interval``. Данные старше ``max_staleness``
+    секунд не отдаются: :meth:`current` бросает
+    :class:`RatesUnavailableError`.
+
+    Параметры:
+        currency_codes: коды валют, которые нужно обновлять.
+        fetch: функция загрузки курсов (например, ``get_currencies``).
+        interval: период обновления в секундах.
+        max_staleness: максимальный допустимый возраст данных в секундах.
+        retry_interval: пауза перед повтором после ошибки
+            (по умолчанию ``min(interval, 30)``).
+        initial_wait: сколько :meth:`current` ждёт первой попытки
+            загрузки, если данных ещё нет.
+    """
+
+    def __init__(
+            self,
+            currency_codes: Iterable[str],
+            fetch: RatesFetch,
+            interval: float = 300.0,
+            max_staleness: float = 3600.0,
+            retry_interval: float | None = None,
+            initial_wait: float = 5.0,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if max_staleness < interval:
+            raise ValueError("max_staleness must not be less than interval")
+
+        self.currency_codes = list(currency_codes)
+        self.fetch = fetch
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.retry_interval = (min(interval, 30.0) if retry_interval is None
+                               else retry_interval)
+        self.initial_wait = initial_wait
+
+        self._snapshot: RatesSnapshot | None = None
+        self._first_attempt = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+        self.refreshes = 0
+        self.errors = 0
+        self.last_error: str | None = None
+
+    @property
+    def snapshot(self) -> RatesSnapshot | None:
+        """Последний успешно полученный снимок (возможно, устаревший)."""
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        """
+        Загрузить курсы сейчас.
+
+        Возвращает ``True`` при успехе; при ошибке прежний снимок
+        сохраняется, а текст ошибки доступен в ``last_error``.
+        """
+        try:
+            rates = self.fetch(self.currency_codes)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        else:
+            snapshot = RatesSnapshot(dict(rates), time.time(),
+                                     time.monotonic())
+            with self._lock:
+                self._snapshot = snapshot
+                self.refreshes += 1
+                self.last_error = None
+            return True
+        finally:
+            self._first_attempt.set()
+
+    def current(self) -> RatesSnapshot:
+        """
+        Вернуть снимок курсов для отображения.
+
+        Исключения:
+            RatesUnavailableError: данных нет или они старше
+                ``max_staleness``.
+        """
+        snapshot = self._snapshot
+        if snapshot is None and not self._first_attempt.is_set():
+            self._first_attempt.wait(self.initial_wait)
+            snapshot = self._snapshot
+
+        if snapshot is None:
+            raise RatesUnavailableError(
+                f"Курсы ещё не получены: {self.last_error or 'нет ответа'}")
+        if snapshot.age() > self.max_staleness:
+            raise RatesUnavailableError(
+                f"Курсы устарели ({snapshot.age():.0f} с):"
+                f" {self.last_error or 'нет обновлений'}")
+        return snapshot
+
+    def health(self) -> dict:
+        """Состояние данных для страницы ``/health``."""
+        snapshot = self._snapshot
+        age = snapshot.age() if snapshot is not None else None
+        if snapshot is None:
+            status = "no_data"
+        elif age > self.max_staleness:
+            status = "stale"
+        else:
+            status = "ok"
+        return {
+            "status": status,
+            "age_seconds": None if age is None else round(age, 3),
+            "fetched_at": None if snapshot is None else snapshot.fetched_at,
+            "refresh_interval": self.interval,
+            "max_staleness": self.max_staleness,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+    def start(self) -> RatesRefresher:
+        """Запустить фоновый поток (повторный вызов ничего не делает)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run,
+                                            name="rates-refresher",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Остановить фоновый поток."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            ok = self.refresh()
+            self._stop.wait(self.interval if ok else self.retry_interval)
@@ -0,0 +1,73 @@
+"""Окружение Jinja с кэшем байткода и предзагрузкой шаблонов.
+
+Скомпилированные шаблоны сохраняются в ``TEMPLATE_CACHE_DIR``, поэтому
+следующий процесс сервера не компилирует их заново, а только загружает
+байткод. Jinja сверяет контрольную сумму исходника, так что изменённый
+шаблон перекомпилируется автоматически.
+
+Предкомпиляция (например, при сборке или перед запуском):
+    python -m utils.templates
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    select_autoescape,
+)
+
+# Каталог шаблонов задаётся путём, а не через PackageLoader("myapp"):
+# иначе загрузка шаблонов импортирует myapp со всей его инициализацией.
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
+TEMPLATE_CACHE_DIR = Path(__file__).resolve().parent.parent / ".jinja_cache"
+
+
+def create_environment(template_dir: str | os.PathLike = TEMPLATE_DIR,
+                       cache_dir: str | os.PathLike | None = TEMPLATE_CACHE_DIR
+                       ) -> Environment:
+    """
+    Создать окружение Jinja для шаблонов из каталога ``template_dir``.
+
+    Parameters:
+        template_dir: каталог с шаблонами.
+        cache_dir: каталог для кэша байткода; None — без кэша. Если
+            каталог нельзя создать, окружение работает без кэша.
+    """
+    bytecode_cache = None
+    if cache_dir is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            pass
+        else:
+            bytecode_cache = FileSystemBytecodeCache(os.fspath(cache_dir))
+
+    return Environment(
+        loader=FileSystemLoader(os.fspath(template_dir)),
+        autoescape=select_autoescape(["html", "xml"]),
+        bytecode_cache=bytecode_cache,
+    )
+
+
+def preload_templates(env: Environment) -> int:
+    """
+    Загрузить все HTML-шаблоны окружения заранее.
+
+    Шаблоны попадают во внутренний кэш окружения (и в кэш байткода),
+    так что первый запрос к каждой странице не тратит время на
+    компиляцию. Возвращает число загруженных шаблонов.
+    """
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+if __name__ == "__main__":
+    count = preload_templates(create_environment())
+    print(f"Скомпилировано шаблонов: {count} ({TEMPLATE_CACHE_DIR})")
@@ -0,0 +1,118 @@
+"""HTTP-сервер с пулом рабочих потоков и ограниченной очередью запросов.
+
+Лабораторные запускаются независимо, поэтому модуль лежит и в lab_8, и
+в lab_9. Копии должны совпадать байт в байт (это проверяет тест lab_8):
+исправления вносятся в обе.
+"""
+
+from __future__ import annotations
+
+import queue
+import socket
+import threading
+from http.server import HTTPServer
+from typing import Any
+
+# Ответ, которым сервер отклоняет соединение при переполненной очереди.
+OVERLOADED_RESPONSE = (
+    b"HTTP/1.0 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain; charset=utf-8\r\n"
+    b"Retry-After: 1\r\n"
+    b"Content-Length: 19\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"Server overloaded\r\n"
+)
+
+_STOP = None
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """
+    ``HTTPServer``, который обрабатывает запросы в пуле потоков.
+
+    Принятые соединения кладутся в очередь длиной ``max_queue`` и
+    обрабатываются ``max_workers`` потоками, поэтому один медленный
+    запрос не блокирует остальных клиентов, а число потоков не растёт
+    с нагрузкой. Если очередь заполнена, клиент сразу получает ``503``
+    (счётчик ``rejected``).
+
+    Parameters
+    ----------
+    server_address : tuple[str, int]
+        Адрес ``(host, port)``.
+    handler_class : type
+        Класс обработчика запросов.
+    max_workers : int
+        Число рабочих потоков.
+    max_queue : int
+        Сколько принятых соединений может ждать обработки.
+    """
+
+    daemon_threads = True
+    # listen() backlog: при значении по умолчанию (5) одновременные
+    # подключения теряют SYN и ждут повторной попытки около секунды.
+    request_queue_size = 128
+
+    def __init__(self, server_address: tuple[str, int],
+                 handler_class: type, max_workers: int = 8,
+                 max_queue: int = 64,
+                 bind_and_activate: bool = True) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        if max_queue < 1:
+            raise ValueError("max_queue must be >= 1")
+        self.max_workers = max_workers
+        self.rejected = 0
+        self._requests: queue.Queue = queue.Queue(maxsize=max_queue)
+        # Если bind() не удастся, socketserver вызовет server_close() до
+        # запуска потоков: пустой список позволяет ему отработать и не
+        # скрыть исходную ошибку.
+        self._workers: list[threading.Thread] = []
+        super().__init__(server_address, handler_class, bind_and_activate)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"http-worker-{i}",
+                             daemon=self.daemon_threads)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def waiting(self) -> int:
+        """Сколько принятых соединений ждут свободного потока."""
+        return self._requests.qsize()
+
+    def process_request(self, request: socket.socket,
+                        client_address: Any) -> None:
+        """Поставить соединение в очередь или отклонить его с ``503``."""
+        try:
+            self._requests.put_nowait((request, client_address))
+        except queue.Full:
+            self.rejected += 1
+            try:
+                request.sendall(OVERLOADED_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def _work(self) -> None:
+        while True:
+            item = self._requests.get()
+            if item is _STOP:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        """Закрыть сокет и дождаться завершения рабочих потоков."""
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(_STOP)
+        for worker in self._workers:
+            worker.join()
@@ -0,0 +1,275 @@
+"""Бенчмарк запросов к SQLite до и после миграции схемы.
+
+База заполняется ``users`` пользователями с ``per_user`` подписками
+(по умолчанию 10⁵ и 10⁶ подписок) в исходной схеме без индексов, затем
+замеряются типичные запросы приложения, выполняется миграция до
+SCHEMA_VERSION и те же запросы замеряются снова.
+
+Отдельно сравнивается чтение страницы пользователя из нескольких потоков,
+пока другой поток обновляет курсы: через одно общее подключение под
+блокировкой и через пулы подключений к файлу в режиме WAL, а также
+скорость записи: отдельный commit на каждое обновление против
+CurrencyController.update_many в одной транзакции, и чтение валют через
+кэш CurrencyController против запроса к базе на каждый вызов.
+
+Запуск:
+    python bench_db.py
+    python bench_db.py --users 10000 --queries 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from controllers.connectionpool import (
+    DEFAULT_PRAGMAS,
+    ConnectionPool,
+    SharedConnection,
+)
+from controllers.currencycontroller import CurrencyController
+from controllers.databasecontroller import SCHEMA_VERSION, CurrencyRatesCRUD
+
+CURRENCIES = 100
+
+# Запрос страницы пользователя (как в myapp.get_user_with_currencies).
+USER_CURRENCIES_SQL = """
+    SELECT c.*
+    FROM currency AS c
+    JOIN user_currency AS uc ON uc.currency_id = c.id
+    WHERE uc.user_id = ?
+"""
+
+
+def _seed(conn: sqlite3.Connection, users: int, per_user: int) -> None:
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO currency(id, num_code, char_code, name, value, nominal)"
+        " VALUES (?, ?, ?, ?, ?, 1)",
+        ((i, f"{i:03d}", f"K{i:03d}", f"Валюта {i}", 1.0 + i)
+         for i in range(1, CURRENCIES + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO user(id, name) VALUES (?, ?)",
+        ((i, f"user{i}") for i in range(1, users + 1)),
+    )
+    currency_ids = range(1, CURRENCIES + 1)
+    conn.executemany(
+        "INSERT INTO user_currency(user_id, currency_id) VALUES (?, ?)",
+        ((user_id, currency_id)
+         for user_id in range(1, users + 1)
+         for currency_id in rng.sample(currency_ids, per_user)),
+    )
+    conn.commit()
+
+
+def _timed(queries: int, run) -> float:
+    """Среднее время одного вызова ``run(i)`` в микросекундах."""
+    start = time.perf_counter()
+    for i in range(queries):
+        run(i)
+    return (time.perf_counter() - start) / queries * 1e6
+
+
+def _measure(db: CurrencyRatesCRUD, conn: sqlite3.Connection, users: int,
+             queries: int) -> dict[str, float]:
+    rng = random.Random(1)
+    user_ids = [rng.randint(1, users) for _ in range(queries)]
+    codes = [f"K{rng.randint(1, CURRENCIES):03d}" for _ in range(queries)]
+
+    def subscribe(i: int) -> None:
+        conn.execute(
+            "INSERT OR IGNORE INTO user_currency(user_id, currency_id)"
+            " VALUES (?, (SELECT id FROM currency WHERE char_code = ?))",
+            (user_ids[i], codes[i]),
+        )
+
+    result = {
+        "get_by_char_code": _timed(
+            queries, lambda i: db.get_by_char_code(codes[i])),
+        "страница пользователя": _timed(
+            queries,
+            lambda i: conn.execute(USER_CURRENCIES_SQL,
+                                   (user_ids[i],)).fetchall()),
+        "подписка (INSERT OR IGNORE)": _timed(queries, subscribe),
+    }
+    conn.rollback()
+    return result
+
+
+def _read_throughput(db: CurrencyRatesCRUD, users: int, threads: int,
+                     queries: int) -> tuple[float, float]:
+    """
+    Чтений страницы пользователя из ``threads`` потоков и обновлений
+    курса в секунду.
+
+    Параллельно отдельный поток непрерывно обновляет курсы, как обработчик
+    '/currency/update'.
+    """
+    barrier = threading.Barrier(threads + 1)
+    done = threading.Event()
+    writes = 0
+
+    def writer() -> None:
+        nonlocal writes
+        rng = random.Random(-1)
+        while not done.is_set():
+            db.update(f"K{rng.randint(1, CURRENCIES):03d}", rng.random())
+            writes += 1
+
+    def reader(seed: int) -> None:
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(queries):
+            with db.lock:
+                db.read_connection().execute(
+                    USER_CURRENCIES_SQL, (rng.randint(1, users),)).fetchall()
+
+    workers = [threading.Thread(target=reader, args=(i,))
+               for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    update_thread = threading.Thread(target=writer)
+    update_thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    update_thread.join()
+    return threads * queries / elapsed, writes / elapsed
+
+
+def bench_readers(users: int = 10_000, per_user: int = 10,
+                  queries: int = 2000) -> None:
+    """Чтение под нагрузкой записи: общее подключение vs пул WAL."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        writers = ConnectionPool(path)
+        CurrencyRatesCRUD(writers)
+        _seed(writers.connection(), users, per_user)
+
+        print(f"{'':<10}{'общее подключение':>24}{'пулы WAL':>24}")
+        print(f"{'потоков':<10}" + f"{'чтений/с':>12}{'записей/с':>12}" * 2)
+        for threads in (1, 2, 4, 8):
+            shared = SharedConnection(
+                sqlite3.connect(path, check_same_thread=False))
+            readers = ConnectionPool(path, readonly=True)
+            try:
+                locked = _read_throughput(CurrencyRatesCRUD(shared), users,
+                                          threads, queries // threads)
+                pooled = _read_throughput(
+                    CurrencyRatesCRUD(writers, read_pool=readers), users,
+                    threads, queries // threads)
+            finally:
+                shared.close()
+                readers.close()
+            print(f"{threads:<10}{locked[0]:>12.0f}{locked[1]:>12.0f}"
+                  f"{pooled[0]:>12.0f}{pooled[1]:>12.0f}")
+        writers.close()
+
+
+def bench_writes(updates: int = 1000) -> None:
+    """Обновлений курса в секунду: commit на каждое vs одна транзакция."""
+    print(f"{'synchronous':<14}{'commit на запись':>20}{'update_many':>14}"
+          "  (обновлений/с)")
+    for synchronous in ("NORMAL", "FULL"):
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = ConnectionPool(
+                os.path.join(tmp, "bench.db"),
+                pragmas={**DEFAULT_PRAGMAS, "synchronous": synchronous})
+            db = CurrencyRatesCRUD(pool)
+            controller = CurrencyController(db)
+            codes = [f"W{i:04d}" for i in range(updates)]
+            pool.connection().executemany(
+                "INSERT INTO currency(num_code, char_code, name, value,"
+                " nominal) VALUES ('000', ?, 'Валюта', 1.0, 1)",
+                ((code,) for code in codes))
+            pool.connection().commit()
+
+            start = time.perf_counter()
+            for code in codes:
+                controller.update_currency(code, 2.0)
+            single = updates / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            controller.update_many(dict.fromkeys(codes, 3.0))
+            batched = updates / (time.perf_counter() - start)
+            pool.close()
+        print(f"{synchronous:<14}{single:>20.0f}{batched:>14.0f}")
+
+
+def bench_controller_reads(queries: int = 10_000) -> None:
+    """list_currencies/get_currency: кэш контроллера vs запрос к базе."""
+    conn = sqlite3.connect(":memory:")
+    db = CurrencyRatesCRUD(conn)
+    _seed(conn, users=0, per_user=0)
+    controller = CurrencyController(db)
+    codes = [f"K{i % CURRENCIES + 1:03d}" for i in range(queries)]
+
+    print(f"{'чтение':<30}{'база, мкс':>12}{'кэш, мкс':>12}")
+    rows = [
+        ("list_currencies",
+         lambda i: db.read_all(),
+         lambda i: controller.list_currencies()),
+        ("get_currency",
+         lambda i: db.get_by_char_code(codes[i]),
+         lambda i: controller.get_currency(codes[i])),
+    ]
+    for name, direct, cached in rows:
+        print(f"{name:<30}{_timed(queries, direct):>12.2f}"
+              f"{_timed(queries, cached):>12.2f}")
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--per-user", type=int, default=10,
+                        help=f"подписок на пользователя (≤ {CURRENCIES})")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(":memory:")
+    # Исходная схема: помечаем базу как уже мигрированную, чтобы
+    # контроллер только создал таблицы.
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    db = CurrencyRatesCRUD(conn)
+
+    start = time.perf_counter()
+    _seed(conn, args.users, args.per_user)
+    print(f"заполнение: {args.users} пользователей, "
+          f"{args.users * args.per_user} подписок, "
+          f"{time.perf_counter() - start:.1f} с")
+
+    before = _measure(db, conn, args.users, args.queries)
+
+    conn.execute("PRAGMA user_version = 0")
+    start = time.perf_counter()
+    db = CurrencyRatesCRUD(conn)
+    print(f"миграция до версии {db.schema_version}: "
+          f"{time.perf_counter() - start:.1f} с")
+
+    after = _measure(db, conn, args.users, args.queries)
+
+    print()
+    print(f"{'запрос':<30}{'до, мкс':>12}{'после, мкс':>12}")
+    for name, value in before.items():
+        print(f"{name:<30}{value:>12.1f}{after[name]:>12.1f}")
+
+    print()
+    bench_readers()
+    print()
+    bench_writes()
+    print()
+    bench_controller_reads()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""Нагрузочный бенчмарк HTTP-сервера приложения.
+
+Локальный генератор нагрузки: ``clients`` потоков по очереди запрашивают
+маршруты и замеряют время ответа. По умолчанию сервер приложения
+поднимается в этом же процессе в двух режимах — обычный ``HTTPServer``
+и пул потоков — а часть запросов идёт на медленный маршрут ``/slow``
+(имитация живого запроса к API), чтобы было видно, как он задерживает
+остальных клиентов.
+
+Отдельно замеряется сценарий подписки с редиректами
+(``/subscription/add`` → ``/user`` → ``/subscription/delete`` → ``/user``)
+с новым TCP-соединением на каждый запрос (HTTP/1.0) и с keep-alive,
+а также объём ответов без сжатия, с gzip и при повторной проверке по ETag.
+
+Запуск с холодным и прогретым кэшем байткода шаблонов замеряется
+в отдельном процессе: время от старта до первого ответа сервера.
+
+Бенчмарки работают с временной базой, рабочий файл currencies.db не
+изменяется.
+
+Запуск:
+    python bench_server.py
+    python bench_server.py --url http://localhost:8080 --paths /currencies
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import myapp
+from models import Currency
+from utils.page_cache import CachedPage, PageCache
+from utils.templates import (
+    TEMPLATE_CACHE_DIR,
+    create_environment,
+    preload_templates,
+)
+
+FAST_PATHS = ["/", "/currencies", "/user?id=1", "/users"]
+SLOW_DELAY = 0.05
+
+
+class SlowRouteHandler(myapp.MyRequestHandler):
+    """Обработчик приложения с дополнительным маршрутом '/slow'."""
+
+    def do_GET(self) -> None:
+        if self.path == "/slow":
+            time.sleep(SLOW_DELAY)
+            self._send_html("<p>slow</p>")
+            return
+        super().do_GET()
+
+    def log_message(self, format: str, *args) -> None:
+        return
+
+
+class Http10Handler(myapp.MyRequestHandler):
+    """Обработчик приложения в режиме HTTP/1.0 (соединение на запрос)."""
+
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format: str, *args) -> None:
+        return
+
+
+class NoPageCache(PageCache):
+    """Кэш, который всегда промахивается: страницы рендерятся на запрос."""
+
+    def lookup(self, route: str) -> tuple[int, CachedPage | None]:
+        with self._lock:
+            self.misses += 1
+            return self._version, None
+
+
+def _seed_currencies() -> None:
+    """
+    Заполнить базу синтетическими валютами, если API недоступен.
+
+    База приложения должна быть открыта (см. myapp.init_app).
+    """
+    if myapp.currency_controller.list_currencies():
+        return
+    myapp.currency_controller.add_many(
+        Currency(currency_id=None, char_code=code, value=10.0 + i,
+                 nominal=1, num_code=f"{i:03d}", name=f"Валюта {code}")
+        for i, code in enumerate(myapp.CURRENCY_CODES, start=1)
+    )
+    myapp.init_db_with_users_and_subscriptions()
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index]
+
+
+def load(base_url: str, paths: list[str], clients: int = 16,
+         requests_per_client: int = 100) -> dict:
+    """
+    Выполнить ``clients * requests_per_client`` GET-запросов.
+
+    Returns
+    -------
+    dict
+        ``requests``, ``errors``, ``rps`` и перцентили задержки
+        ``p50_ms``/``p95_ms``/``p99_ms``.
+    """
+    parts = urlsplit(base_url)
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client(offset: int) -> None:
+        nonlocal errors
+        local: list[float] = []
+        local_errors = 0
+        cycle = itertools.islice(itertools.cycle(paths), offset, None)
+        barrier.wait()
+        for path in itertools.islice(cycle, requests_per_client):
+            start = time.perf_counter()
+            try:
+                conn = HTTPConnection(parts.hostname, parts.port, timeout=10)
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                conn.close()
+                if resp.status >= 500:
+                    local_errors += 1
+            except OSError:
+                local_errors += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    threads = [threading.Thread(target=client, args=(i,))
+               for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+def _print_row(label: str, result: dict) -> None:
+    print(f"{label:<34}{result['rps']:>9.0f}{result['p50_ms']:>9.2f}"
+          f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+          f"{result['errors']:>8}")
+
+
+def bench_modes(clients: int = 16, requests_per_client: int = 100) -> None:
+    """Сравнить обычный HTTPServer и пул потоков на одном приложении."""
+    _seed_currencies()
+    scenarios = {
+        "быстрые маршруты": FAST_PATHS,
+        "+ 1 из 20 на /slow": FAST_PATHS * 5 + ["/slow"],
+    }
+    modes = {"HTTPServer": None, "пул, 8 потоков": 8}
+
+    print(f"{'режим / нагрузка':<34}{'rps':>9}{'p50 мс':>9}{'p95 мс':>9}"
+          f"{'p99 мс':>9}{'ошибки':>8}")
+    for scenario, paths in scenarios.items():
+        for mode, workers in modes.items():
+            server = myapp.make_server("localhost", 0, max_workers=workers,
+                                       max_queue=256,
+                                       handler_class=SlowRouteHandler)
+            thread = threading.Thread(target=server.serve_forever,
+                                      daemon=True)
+            thread.start()
+            try:
+                port = server.server_address[1]
+                result = load(f"http://localhost:{port}", paths,
+                              clients=clients,
+                              requests_per_client=requests_per_client)
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+            _print_row(f"{mode}, {scenario}", result)
+
+
+def bench_page_cache(clients: int = 8, requests_per_client: int = 200) -> None:
+    """Страницы из page_cache vs рендеринг на каждый запрос."""
+    _seed_currencies()
+    print(f"{'кэш страниц':<34}{'rps':>9}{'p50 мс':>9}{'p95 мс':>9}"
+          f"{'p99 мс':>9}{'ошибки':>8}")
+    original = myapp.page_cache
+    try:
+        for label, cache in (("без кэша", NoPageCache()),
+                             ("page_cache", PageCache())):
+            myapp.page_cache = cache
+            server = myapp.make_server("localhost", 0, max_workers=clients,
+                                       max_queue=256,
+                                       handler_class=SlowRouteHandler)
+            thread = threading.Thread(target=server.serve_forever,
+                                      daemon=True)
+            thread.start()
+            try:
+                result = load(f"http://localhost:{server.server_address[1]}",
+                              FAST_PATHS, clients=clients,
+                              requests_per_client=requests_per_client)
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+            _print_row(label, result)
+            print(f"{'':<34}{cache.stats()}")
+    finally:
+        myapp.page_cache = original
+
+
+def _subscription_flow(get) -> None:
+    """Подписаться на валюту и отписаться, следуя редиректам."""
+    currency_id = myapp.currency_controller.get_currency("GBP")["id"]
+    for path in ("/subscription/add?user_id=1&char_code=GBP",
+                 f"/subscription/delete?user_id=1&currency_id={currency_id}"):
+        status, location = get(path)
+        if status != 302:
+            raise RuntimeError(f"{path}: ожидался редирект, получен {status}")
+        get(location)
+
+
+def bench_keepalive(clients: int = 8, flows_per_client: int = 100) -> None:
+    """Сценарий подписки: соединение на запрос vs keep-alive."""
+    _seed_currencies()
+    print(f"{'режим':<34}{'запросов/с':>12}{'соединений':>12}")
+
+    for label, handler, reuse in (
+            ("HTTP/1.0, соединение на запрос", Http10Handler, False),
+            ("HTTP/1.1 keep-alive", SlowRouteHandler, True)):
+        server = myapp.make_server("localhost", 0, max_workers=clients,
+                                   max_queue=256, handler_class=handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+        connections = 0
+        lock = threading.Lock()
+
+        def client() -> None:
+            nonlocal connections
+            conn = None
+            opened = 0
+
+            def get(path: str) -> tuple[int, str | None]:
+                nonlocal conn, opened
+                if conn is None or not reuse:
+                    conn = HTTPConnection("localhost", port, timeout=10)
+                    opened += 1
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                if not reuse or resp.will_close:
+                    conn.close()
+                    conn = None
+                return resp.status, resp.getheader("Location")
+
+            for _ in range(flows_per_client):
+                _subscription_flow(get)
+            if conn is not None:
+                conn.close()
+            with lock:
+                connections += opened
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        server.shutdown()
+        server.server_close()
+        thread.join()
+        total = clients * flows_per_client * 4
+        print(f"{label:<34}{total / elapsed:>12.0f}{connections:>12}")
+
+
+def bench_compression(rounds: int = 200) -> None:
+    """Байты тела на запрос: без сжатия, gzip и повторная проверка (304)."""
+    _seed_currencies()
+    server = myapp.make_server("localhost", 0, max_workers=2, max_queue=16,
+                               handler_class=SlowRouteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    conn = HTTPConnection("localhost", server.server_address[1], timeout=10)
+    etags: dict[str, str] = {}
+
+    def fetch(path: str, headers: dict[str, str]) -> int:
+        conn.request("GET", path, headers=headers)
+        resp = conn.getresponse()
+        body = resp.read()
+        etags[path] = resp.getheader("ETag")
+        return len(body)
+
+    print(f"{'режим':<34}{'байт/запрос':>12}{'запросов/с':>12}")
+    modes = {
+        "без сжатия": lambda path: {},
+        "gzip": lambda path: {"Accept-Encoding": "gzip"},
+        "If-None-Match (304)": lambda path: {"Accept-Encoding": "gzip",
+                                             "If-None-Match": etags[path]},
+    }
+    try:
+        for label, headers in modes.items():
+            total = 0
+            start = time.perf_counter()
+            for path in itertools.islice(itertools.cycle(FAST_PATHS),
+                                         rounds):
+                total += fetch(path, headers(path))
+            elapsed = time.perf_counter() - start
+            print(f"{label:<34}{total / rounds:>12.0f}"
+                  f"{rounds / elapsed:>12.0f}")
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def _time_to_first_response(db_path: Path, timeout: float = 30.0) -> float:
+    """Запустить сервер с базой ``db_path`` в новом процессе и дождаться
+    ответа на '/'."""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c",
+         f"import myapp; myapp.run_server('localhost', {port}, "
+         f"db_path={str(db_path)!r})"],
+        cwd=Path(__file__).resolve().parent,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                conn = HTTPConnection("localhost", port, timeout=timeout)
+                conn.request("GET", "/")
+                status = conn.getresponse().status
+                conn.close()
+                if status == 200:
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError("сервер не ответил за отведённое время")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def bench_startup(rounds: int = 5) -> None:
+    """Загрузка шаблонов и время до первого ответа: без кэша и с кэшем."""
+    print(f"{'шаблоны':<34}{'загрузка мс':>12}{'1-й ответ мс':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "startup.db"
+        for label, warm in (("компиляция (кэш пуст)", False),
+                            ("байткод из кэша", True)):
+            loads, first = [], []
+            for _ in range(rounds):
+                if not warm:
+                    shutil.rmtree(TEMPLATE_CACHE_DIR, ignore_errors=True)
+                start = time.perf_counter()
+                preload_templates(create_environment())
+                loads.append(time.perf_counter() - start)
+                if not warm:
+                    shutil.rmtree(TEMPLATE_CACHE_DIR, ignore_errors=True)
+                first.append(_time_to_first_response(db_path))
+            print(f"{label:<34}{statistics.median(loads) * 1000:>12.2f}"
+                  f"{statistics.median(first) * 1000:>14.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="нагрузить уже запущенный сервер")
+    parser.add_argument("--paths", nargs="+", default=FAST_PATHS)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100,
+                        help="запросов на одного клиента")
+    args = parser.parse_args()
+
+    if args.url:
+        _print_row(args.url, load(args.url, args.paths, args.clients,
+                                  args.requests))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        myapp.init_app(Path(tmp) / "bench.db")
+        try:
+            bench_modes(args.clients, args.requests)
+            print()
+            bench_keepalive()
+            print()
+            bench_page_cache()
+            print()
+            bench_compression()
+        finally:
+            myapp.close_app()
+    print()
+    bench_startup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Подключения к SQLite для многопоточного сервера.
+
+Модуль содержит два источника подключений с общим интерфейсом
+(``connection()``, ``lock``, ``close()``), которые принимает
+CurrencyRatesCRUD:
+
+* ConnectionPool — файл базы в режиме WAL, отдельное подключение для
+  каждого потока. Читатели не блокируют друг друга и писателя, поэтому
+  внешняя блокировка не нужна. Пул в режиме ``readonly`` открывает базу
+  только для чтения — его используют обработчики GET-запросов.
+* SharedConnection — одно подключение на все потоки под общей
+  блокировкой; так работает база в памяти (``:memory:``), у которой
+  у каждого подключения была бы своя отдельная база.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# Настройки каждого нового подключения пула. synchronous=NORMAL в режиме
+# WAL не теряет согласованность при сбое, но не вызывает fsync на каждый
+# коммит; отрицательный cache_size задаётся в КиБ.
+DEFAULT_PRAGMAS: dict[str, str | int] = {
+    "synchronous": "NORMAL",
+    "cache_size": -16_000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+
+class SharedConnection:
+    """
+    Одно подключение SQLite, общее для всех потоков.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Открытое подключение. Если оно используется из разных потоков,
+        оно должно быть открыто с ``check_same_thread=False``.
+    lock : threading.RLock | None
+        Блокировка, под которой выполняются все обращения к подключению;
+        по умолчанию создаётся своя.
+    """
+
+    def __init__(self, connection: sqlite3.Connection,
+                 lock: threading.RLock | None = None) -> None:
+        self._connection = connection
+        self._connection.row_factory = sqlite3.Row
+        self.lock = lock if lock is not None else threading.RLock()
+        with self.lock:
+            # Проверка внешних ключей включается для каждого подключения
+            # и не действует внутри открытой транзакции.
+            self._connection.execute("PRAGMA foreign_keys = ON")
+
+    def connection(self) -> sqlite3.Connection:
+        """Вернуть общее подключение."""
+        return self._connection
+
+    def close(self) -> None:
+        """Закрыть подключение."""
+        self._connection.close()
+
+
+class ConnectionPool:
+    """
+    Подключения к файлу базы SQLite, по одному на поток.
+
+    Подключение открывается при первом вызове :meth:`connection` в потоке
+    и дальше переиспользуется этим потоком. База переводится в режим WAL
+    (он сохраняется в файле), поэтому пулы на чтение и на запись могут
+    работать с ней одновременно.
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        Путь к файлу базы.
+    readonly : bool
+        Открывать базу только для чтения (файл должен существовать).
+    pragmas : dict | None
+        Настройки подключений; по умолчанию DEFAULT_PRAGMAS.
+    timeout : float
+        Сколько секунд ждать снятия блокировки записи другим подключением.
+    """
+
+    # Подключения разных потоков не мешают друг другу, поэтому обращения
+    # к ним не нужно сериализовать (в отличие от SharedConnection).
+    lock = contextlib.nullcontext()
+
+    def __init__(self, path: str | os.PathLike, readonly: bool = False,
+                 pragmas: dict[str, str | int] | None = None,
+                 timeout: float = 5.0) -> None:
+        self.path = Path(path)
+        if str(self.path) == ":memory:":
+            raise ValueError("use SharedConnection for an in-memory database")
+        self.readonly = readonly
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """Вернуть подключение текущего потока (открыть, если его нет)."""
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.connection = conn
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.readonly:
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro",
+                                   uri=True, timeout=self.timeout,
+                                   check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self.readonly:
+            conn.execute("PRAGMA query_only = ON")
+
+        # check_same_thread=False нужен только для close() из другого
+        # потока; само подключение используется одним потоком.
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    @property
+    def size(self) -> int:
+        """Сколько подключений открыто."""
+        with self._connections_lock:
+            return len(self._connections)
+
+    def close(self) -> None:
+        """Закрыть подключения всех потоков."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -7,11 +7,17 @@ CurrencyRatesCRUD для доступа к базе данных и предос
 
 from __future__ import annotations
 
-from typing import Iterable
+import contextlib
+import threading
+from types import MappingProxyType
+from typing import Iterable, Iterator, Mapping
 
-from controllers.databasecontroller import CurrencyRatesCRUD
+from controllers.databasecontroller import ChangeSet, CurrencyRatesCRUD
 from models.currency import Currency
 
+# Кэш валют: строки в порядке из базы и те же строки по char_code.
+_Cache = tuple[tuple[Mapping, ...], dict[str, Mapping]]
+
 
 class CurrencyController:
     """
@@ -21,6 +27,13 @@ class CurrencyController:
     таблиц. Вместо этого он использует CurrencyRatesCRUD для работы
     с базой данных и предоставляет более высокоуровневый интерфейс
     для HTTP-обработчика и шаблонов.
+
+    Контроллер хранит кэш валют: неизменяемый снимок (кортеж строк
+    только для чтения) и словарь ``char_code -> строка``. Снимок
+    загружается из базы при первом чтении; изменения через методы
+    контроллера сначала записываются в базу, а затем обновляют или
+    сбрасывают кэш. Если валюты изменены в обход контроллера, нужно
+    вызвать :meth:`invalidate`.
     """
 
     def __init__(self, db: CurrencyRatesCRUD) -> None:
@@ -34,20 +47,95 @@ class CurrencyController:
             работу с SQLite.
         """
         self._db = db
+        # None, если кэш сброшен.
+        self._cache: _Cache | None = None
+        # Номер изменения: загрузка, начатая до очередной записи, не
+        # должна положить в кэш устаревшие строки.
+        self._generation = 0
+        self._cache_lock = threading.Lock()
+
+    # ====================== CACHE ======================
+
+    def _load(self) -> _Cache:
+        """Вернуть кэш, загрузив его из базы при необходимости."""
+        cache = self._cache
+        if cache is not None:
+            return cache
+
+        generation = self._generation
+        rows = tuple(MappingProxyType(row) for row in self._db.read_all())
+        cache = (rows, {row["char_code"]: row for row in rows})
+        if self._db.in_transaction:
+            # Внутри транзакции видны незафиксированные изменения.
+            return cache
+        with self._cache_lock:
+            if generation == self._generation:
+                self._cache = cache
+        return cache
+
+    def invalidate(self) -> None:
+        """Сбросить кэш; следующее чтение загрузит валюты из базы."""
+        with self._cache_lock:
+            self._generation += 1
+            self._cache = None
 
-    def list_currencies(self) -> list[dict]:
+    def _patch(self, char_code: str, generation: int, **changes) -> None:
+        """
+        Обновить строку валюты в кэше после записи в базу.
+
+        ``generation`` — номер изменения, прочитанный до записи. Если с тех
+        пор кэш менял кто-то ещё, записи могли зафиксироваться в одном
+        порядке, а дойти до кэша в другом: тогда кэш сбрасывается, а не
+        обновляется.
+        """
+        with self._cache_lock:
+            stale = generation != self._generation
+            self._generation += 1
+            if self._cache is None:
+                return
+            if stale:
+                self._cache = None
+                return
+            rows, by_code = self._cache
+            old = by_code.get(char_code)
+            if old is None:
+                self._cache = None
+                return
+            new = MappingProxyType({**old, **changes})
+            self._cache = (
+                tuple(new if row is old else row for row in rows),
+                {**by_code, char_code: new},
+            )
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[CurrencyController]:
+        """
+        Выполнить несколько изменений одной транзакцией базы.
+
+        Кэш сбрасывается после её завершения (фиксации или отката),
+        поэтому незафиксированные данные в него не попадают.
+        """
+        try:
+            with self._db.transaction():
+                self.invalidate()
+                yield self
+        finally:
+            self.invalidate()
+
+    def list_currencies(self) -> tuple[Mapping, ...]:
         """
         Получить список всех валют для отображения.
 
         Returns
         -------
-        list[dict]
-            Список словарей с данными валют. Формат подходит для передачи
-            напрямую в шаблон Jinja2 (currencies.html).
+        tuple[Mapping, ...]
+            Снимок из кэша: строки валют только для чтения с ключами по
+            названиям столбцов. Формат подходит для передачи напрямую
+            в шаблон Jinja2 (currencies.html).
         """
-        return self._db.read_all()
+        return self._load()[0]
 
-    def get_currency(self, char_code: str) -> dict | None:
+    def get_currency(self, char_code: str) -> Mapping | None:
         """
         Найти валюту по символьному коду.
 
@@ -58,10 +146,14 @@ class CurrencyController:
 
         Returns
         -------
-        dict | None
-            Словарь с данными валюты или None, если запись не найдена.
+        Mapping | None
+            Строка валюты из кэша или None, если запись не найдена.
         """
-        return self._db.get_by_char_code(char_code)
+        by_code = self._load()[1]
+        row = by_code.get(char_code)
+        if row is None:
+            row = by_code.get(char_code.upper())
+        return row
 
     def add_currency(self, currency: Currency) -> int:
         """
@@ -77,7 +169,9 @@ class CurrencyController:
         int
             Идентификатор созданной записи (поле id).
         """
-        return self._db.create(currency)
+        currency_id = self._db.create(currency)
+        self.invalidate()
+        return currency_id
 
     def add_many(self, currencies: Iterable[Currency]) -> None:
         """
@@ -89,6 +183,24 @@ class CurrencyController:
             Набор объектов Currency, которые нужно сохранить в базе.
         """
         self._db.create_many(currencies)
+        self.invalidate()
+
+    def sync_currencies(self, currencies: Iterable[Currency]) -> ChangeSet:
+        """
+        Привести курсы в базе к свежим данным (например, из API ЦБ).
+
+        Новые валюты добавляются, изменившиеся обновляются, id и подписки
+        существующих валют сохраняются.
+
+        Returns
+        -------
+        ChangeSet
+            Коды добавленных, обновлённых и неизменившихся валют.
+        """
+        changes = self._db.upsert_many(currencies)
+        if changes:
+            self.invalidate()
+        return changes
 
     def update_currency(self, char_code: str, value: float) -> bool:
         """
@@ -107,7 +219,37 @@ class CurrencyController:
             True, если курс был успешно обновлён.
             False, если валюты с таким кодом не существует.
         """
-        return self._db.update(char_code, value)
+        generation = self._generation
+        updated = self._db.update(char_code, value)
+        if not updated:
+            return False
+        if self._db.in_transaction:
+            # Откат транзакции вернёт старый курс: не обновляем кэш,
+            # а сбрасываем его (и ещё раз — после завершения транзакции
+            # в transaction()).
+            self.invalidate()
+        else:
+            self._patch(char_code.upper(), generation, value=value)
+        return True
+
+    def update_many(self, rates: Mapping[str, float]) -> int:
+        """
+        Обновить курсы нескольких валют одной транзакцией.
+
+        Parameters
+        ----------
+        rates : Mapping[str, float]
+            Новые курсы по символьным кодам, например {"USD": 95.5}.
+
+        Returns
+        -------
+        int
+            Сколько валют было обновлено (коды, которых нет в базе,
+            пропускаются).
+        """
+        with self.transaction():
+            return sum(self._db.update(code, value)
+                       for code, value in rates.items())
 
     # ====================== DELETE ======================
 
@@ -126,4 +268,25 @@ class CurrencyController:
             True, если запись была удалена.
             False, если запись с таким id не найдена.
         """
-        return self._db.delete(currency_id)
+        deleted = self._db.delete(currency_id)
+        if deleted:
+            self.invalidate()
+        return deleted
+
+    def delete_many(self, currency_ids: Iterable[int]) -> int:
+        """
+        Удалить несколько валют одной транзакцией.
+
+        Parameters
+        ----------
+        currency_ids : Iterable[int]
+            Значения поля id строк, которые нужно удалить.
+
+        Returns
+        -------
+        int
+            Сколько записей было удалено.
+        """
+        with self.transaction():
+            return sum(self._db.delete(currency_id)
+                       for currency_id in currency_ids)
@@ -4,39 +4,217 @@
 за создание структуры БД и выполнение CRUD-операций (Create, Read,
 Update, Delete) над таблицей currency. Контроллер является уровнем
 доступа к данным (Data Access Layer) и не содержит бизнес-логики.
+
+Схема базы версионируется: номер версии хранится в ``PRAGMA user_version``,
+а недостающие миграции из ``MIGRATIONS`` применяются при создании
+контроллера.
 """
 
 from __future__ import annotations
 
+import contextlib
 import sqlite3
-from typing import Iterable
+import threading
+from typing import Iterable, Iterator, NamedTuple
 
+from controllers.connectionpool import ConnectionPool, SharedConnection
 from models.currency import Currency
 
+# Миграции схемы: MIGRATIONS[i] переводит базу с версии i на версию i + 1.
+# Каждая миграция выполняется в одной транзакции вместе с обновлением
+# user_version, поэтому прерванная миграция не оставляет базу
+# в промежуточном состоянии.
+MIGRATIONS: tuple[str, ...] = (
+    # 1: уникальный char_code, уникальные подписки, каскадное удаление.
+    """
+    -- Повторяющиеся коды валют: подписки переносятся на первую запись,
+    -- остальные записи удаляются.
+    UPDATE user_currency
+    SET currency_id = (
+        SELECT MIN(dup.id)
+        FROM currency AS c
+        JOIN currency AS dup ON dup.char_code = c.char_code
+        WHERE c.id = user_currency.currency_id
+    )
+    WHERE currency_id IN (
+        SELECT id FROM currency
+        WHERE id NOT IN (SELECT MIN(id) FROM currency GROUP BY char_code)
+    );
+    DELETE FROM currency
+    WHERE id NOT IN (SELECT MIN(id) FROM currency GROUP BY char_code);
+    CREATE UNIQUE INDEX currency_char_code ON currency(char_code);
+
+    -- Ограничения внешних ключей в SQLite нельзя изменить через
+    -- ALTER TABLE, поэтому таблица подписок пересоздаётся. Повторы и
+    -- подписки на несуществующие записи при переносе отбрасываются.
+    CREATE TABLE user_currency_new (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id     INTEGER NOT NULL
+                    REFERENCES user(id) ON DELETE CASCADE,
+        currency_id INTEGER NOT NULL
+                    REFERENCES currency(id) ON DELETE CASCADE,
+        UNIQUE (user_id, currency_id)
+    );
+    INSERT INTO user_currency_new(id, user_id, currency_id)
+    SELECT MIN(id), user_id, currency_id
+    FROM user_currency
+    WHERE user_id IN (SELECT id FROM user)
+      AND currency_id IN (SELECT id FROM currency)
+    GROUP BY user_id, currency_id;
+    DROP TABLE user_currency;
+    ALTER TABLE user_currency_new RENAME TO user_currency;
+    -- Индекс для каскадного удаления и выборок по валюте; выборки по
+    -- пользователю покрывает индекс UNIQUE (user_id, currency_id).
+    CREATE INDEX user_currency_currency_id ON user_currency(currency_id);
+    """,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Столбцы валюты, которые обновляет upsert_many (кроме ключа char_code).
+_CURRENCY_FIELDS = ("num_code", "name", "value", "nominal")
+
+
+class ChangeSet(NamedTuple):
+    """
+    Результат upsert_many: символьные коды валют по виду изменения.
+
+    В логическом контексте истинен, если хотя бы одна строка изменилась.
+    """
+
+    inserted: tuple[str, ...]
+    updated: tuple[str, ...]
+    unchanged: tuple[str, ...]
+
+    def __bool__(self) -> bool:
+        return bool(self.inserted or self.updated)
+
 
 class CurrencyRatesCRUD:
     """
     Контроллер для выполнения CRUD-операций над таблицей `currency`.
 
     Класс инкапсулирует работу с базой данных SQLite: создаёт необходимые
-    таблицы при инициализации и предоставляет методы для вставки, чтения,
-    обновления и удаления данных. Используется другими слоями приложения
-    (например, контроллером бизнес-логики и веб-сервером).
+    таблицы и применяет миграции схемы при инициализации и предоставляет
+    методы для вставки, чтения, обновления и удаления данных. Используется
+    другими слоями приложения (например, контроллером бизнес-логики и
+    веб-сервером).
     """
 
-    def __init__(self, connection: sqlite3.Connection) -> None:
+    def __init__(self,
+                 connection: sqlite3.Connection | ConnectionPool
+                 | SharedConnection,
+                 lock: threading.RLock | None = None,
+                 read_pool: ConnectionPool | None = None) -> None:
         """
         Инициализация контроллера.
 
         Parameters
         ----------
-        connection : sqlite3.Connection
-            Открытое подключение к базе данных SQLite. Может быть подключением
-            к базе в памяти (:memory:) или к файлу.
+        connection : sqlite3.Connection | ConnectionPool | SharedConnection
+            Источник подключений для записи. Одиночное подключение (к базе
+            в памяти :memory: или к файлу) оборачивается в SharedConnection;
+            если методы вызываются из разных потоков, оно должно быть
+            открыто с ``check_same_thread=False``. ConnectionPool даёт
+            каждому потоку своё подключение к файлу базы.
+        lock : threading.RLock | None
+            Блокировка для одиночного подключения, под которой выполняются
+            все обращения к нему. Передайте ту же блокировку, если
+            подключение используется и вне контроллера; по умолчанию
+            создаётся своя.
+        read_pool : ConnectionPool | None
+            Пул подключений только для чтения, через который выполняются
+            выборки; по умолчанию используется ``connection``.
+        """
+        if isinstance(connection, sqlite3.Connection):
+            connection = SharedConnection(connection, lock)
+        self._pool = connection
+        self._read_pool = read_pool if read_pool is not None else connection
+        self.lock = connection.lock
+        # Глубина вложенности transaction() в текущем потоке.
+        self._local = threading.local()
+        with self.lock:
+            self._create_tables()
+            self._migrate()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Подключение для записи (своё у каждого потока в пуле)."""
+        return self._pool.connection()
+
+    def connection(self) -> sqlite3.Connection:
         """
-        self._conn = connection
-        self._conn.row_factory = sqlite3.Row
-        self._create_tables()
+        Подключение для запросов вне контроллера.
+
+        С одиночным подключением обращения к нему нужно выполнять
+        под ``lock``.
+        """
+        return self._pool.connection()
+
+    def read_connection(self) -> sqlite3.Connection:
+        """
+        Подключение для выборок (из пула только для чтения, если он есть).
+
+        Внутри transaction() возвращается подключение транзакции, чтобы
+        выборки видели её незафиксированные изменения.
+        """
+        if self.in_transaction:
+            return self._conn
+        return self._read_pool.connection()
+
+    # ===================== TRANSACTIONS =====================
+
+    @property
+    def in_transaction(self) -> bool:
+        """Выполняется ли текущий поток внутри transaction()."""
+        return getattr(self._local, "depth", 0) > 0
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[CurrencyRatesCRUD]:
+        """
+        Единица работы: объединить несколько операций в одну транзакцию.
+
+        Методы контроллера внутри блока ``with`` не фиксируют изменения
+        сами: всё фиксируется одним commit при выходе из внешнего блока
+        или откатывается, если в блоке возникло исключение. Вложенный
+        блок выполняется в точке сохранения (SAVEPOINT): его ошибка
+        откатывает только его изменения, а исключение передаётся дальше.
+
+        С одиночным подключением блокировка удерживается до конца
+        транзакции, чтобы другие потоки не зафиксировали её частично.
+        """
+        with self.lock:
+            conn = self._conn
+            depth = getattr(self._local, "depth", 0)
+            if depth == 0:
+                # Неявную транзакцию, открытую запросом вне контроллера,
+                # фиксируем так же, как это делает любой метод CRUD.
+                if conn.in_transaction:
+                    conn.commit()
+                # Блокировка записи берётся сразу: иначе при повышении
+                # блокировки чтения до записи в режиме WAL SQLite не ждёт
+                # busy_timeout, а сразу возвращает SQLITE_BUSY.
+                conn.execute("BEGIN IMMEDIATE")
+            else:
+                conn.execute(f"SAVEPOINT crud_{depth}")
+
+            self._local.depth = depth + 1
+            try:
+                yield self
+            except BaseException:
+                if depth == 0:
+                    conn.rollback()
+                else:
+                    conn.execute(f"ROLLBACK TO crud_{depth}")
+                    conn.execute(f"RELEASE crud_{depth}")
+                raise
+            else:
+                if depth == 0:
+                    conn.commit()
+                else:
+                    conn.execute(f"RELEASE crud_{depth}")
+            finally:
+                self._local.depth = depth
 
     def _create_tables(self) -> None:
         """
@@ -86,6 +264,41 @@ class CurrencyRatesCRUD:
 
         self._conn.commit()
 
+    @property
+    def schema_version(self) -> int:
+        """Версия схемы базы (``PRAGMA user_version``)."""
+        with self.lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate(self) -> None:
+        """
+        Применить миграции, которых ещё нет в базе.
+
+        Raises
+        ------
+        RuntimeError
+            Если версия схемы базы новее, чем известно этому коду.
+        """
+        version = self.schema_version
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Схема базы версии {version} новее поддерживаемой "
+                f"({SCHEMA_VERSION})."
+            )
+
+        for number in range(version, SCHEMA_VERSION):
+            try:
+                self._conn.executescript(
+                    "BEGIN;"
+                    f"{MIGRATIONS[number]};"
+                    f"PRAGMA user_version = {number + 1};"
+                    "COMMIT;"
+                )
+            except sqlite3.Error:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                raise
+
     # ===================== CREATE =====================
 
     def create(self, currency: Currency) -> int:
@@ -106,18 +319,18 @@ class CurrencyRatesCRUD:
             INSERT INTO currency(num_code, char_code, name, value, nominal)
             VALUES (?, ?, ?, ?, ?)
         """
-        cursor = self._conn.cursor()
-        cursor.execute(
-            sql,
-            (
-                currency.num_code,
-                currency.char_code,
-                currency.name,
-                currency.value,
-                currency.nominal,
-            ),
-        )
-        self._conn.commit()
+        with self.transaction():
+            cursor = self._conn.cursor()
+            cursor.execute(
+                sql,
+                (
+                    currency.num_code,
+                    currency.char_code,
+                    currency.name,
+                    currency.value,
+                    currency.nominal,
+                ),
+            )
         return int(cursor.lastrowid)
 
     def create_many(self, currencies: Iterable[Currency]) -> None:
@@ -146,10 +359,79 @@ class CurrencyRatesCRUD:
             for c in currencies
         ]
 
-        cursor = self._conn.cursor()
-        cursor.executemany(sql, data)
-        self._conn.commit()
+        with self.transaction():
+            self._conn.executemany(sql, data)
 
+    def upsert_many(self, currencies: Iterable[Currency]) -> ChangeSet:
+        """
+        Добавить новые валюты и обновить изменившиеся одной транзакцией.
+
+        Строки сопоставляются по char_code, поэтому id существующих валют
+        (и подписки на них) сохраняются. Валюты, данные которых не
+        изменились, не перезаписываются; валюты, которых нет в
+        ``currencies``, не удаляются.
+
+        Parameters
+        ----------
+        currencies : Iterable[Currency]
+            Актуальные данные валют. Если код встречается несколько раз,
+            используется последнее значение.
+
+        Returns
+        -------
+        ChangeSet
+            Коды добавленных, обновлённых и неизменившихся валют.
+        """
+        incoming = {
+            c.char_code: {
+                "char_code": c.char_code,
+                "num_code": c.num_code,
+                "name": c.name,
+                "value": c.value,
+                "nominal": c.nominal,
+            }
+            for c in currencies
+        }
+        if not incoming:
+            return ChangeSet((), (), ())
+
+        # Обновление выполняется, только если данные отличаются; условие
+        # повторяет сравнение ниже и защищает от лишней записи строки.
+        sql = f"""
+            INSERT INTO currency(num_code, char_code, name, value, nominal)
+            VALUES (:num_code, :char_code, :name, :value, :nominal)
+            ON CONFLICT(char_code) DO UPDATE SET
+                {", ".join(f"{f} = excluded.{f}" for f in _CURRENCY_FIELDS)}
+            WHERE {" OR ".join(f"currency.{f} IS NOT excluded.{f}"
+                               for f in _CURRENCY_FIELDS)}
+        """
+        placeholders = ", ".join("?" * len(incoming))
+
+        # Чтение текущих строк и запись — в одной транзакции, чтобы
+        # набор изменений соответствовал тому, что записано.
+        with self.transaction():
+            conn = self._conn
+            rows = conn.execute(
+                f"SELECT char_code, {', '.join(_CURRENCY_FIELDS)}"
+                f" FROM currency WHERE char_code IN ({placeholders})",
+                tuple(incoming),
+            ).fetchall()
+            current = {row["char_code"]: row for row in rows}
+
+            inserted, updated, unchanged = [], [], []
+            for code, data in incoming.items():
+                row = current.get(code)
+                if row is None:
+                    inserted.append(code)
+                elif any(row[f] != data[f] for f in _CURRENCY_FIELDS):
+                    updated.append(code)
+                else:
+                    unchanged.append(code)
+
+            conn.executemany(
+                sql, [incoming[code] for code in inserted + updated])
+
+        return ChangeSet(tuple(inserted), tuple(updated), tuple(unchanged))
 
     def read_all(self) -> list[dict]:
         """
@@ -161,10 +443,11 @@ class CurrencyRatesCRUD:
             Список словарей, где каждый словарь представляет одну строку
             таблицы `currency`. Ключи словаря соответствуют названиям столбцов.
         """
-        cursor = self._conn.cursor()
-        cursor.execute("SELECT * FROM currency")
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        with self.lock:
+            cursor = self.read_connection().cursor()
+            cursor.execute("SELECT * FROM currency")
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
 
     def get_by_char_code(self, char_code: str) -> dict | None:
         """
@@ -182,16 +465,16 @@ class CurrencyRatesCRUD:
             Словарь с данными валюты, если запись существует.
             Если валюта не найдена — возвращается None.
         """
-        cursor = self._conn.cursor()
-        cursor.execute(
-            "SELECT * FROM currency WHERE char_code = ?",
-            (char_code.upper(),),
-        )
-        row = cursor.fetchone()
-        if row is not None:
-            return dict(row)
-        return None
-
+        with self.lock:
+            cursor = self.read_connection().cursor()
+            cursor.execute(
+                "SELECT * FROM currency WHERE char_code = ?",
+                (char_code.upper(),),
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                return dict(row)
+            return None
 
     def update(self, char_code: str, value: float) -> bool:
         """
@@ -210,15 +493,14 @@ class CurrencyRatesCRUD:
             True, если обновлена хотя бы одна строка.
             False, если валюты с таким кодом не существует.
         """
-        cursor = self._conn.cursor()
-        cursor.execute(
-            "UPDATE currency SET value = ? WHERE char_code = ?",
-            (value, char_code.upper()),
-        )
-        self._conn.commit()
+        with self.transaction():
+            cursor = self._conn.cursor()
+            cursor.execute(
+                "UPDATE currency SET value = ? WHERE char_code = ?",
+                (value, char_code.upper()),
+            )
         return cursor.rowcount > 0
 
-
     def delete(self, currency_id: int) -> bool:
         """
         Удалить валюту по её идентификатору.
@@ -234,7 +516,7 @@ class CurrencyRatesCRUD:
             True, если одна строка была удалена.
             False, если запись не найдена.
         """
-        cursor = self._conn.cursor()
-        cursor.execute("DELETE FROM currency WHERE id = ?", (currency_id,))
-        self._conn.commit()
+        with self.transaction():
+            cursor = self._conn.cursor()
+            cursor.execute("DELETE FROM currency WHERE id = ?", (currency_id,))
         return cursor.rowcount > 0
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
-import sqlite3
+import json
+import os
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
-from jinja2 import Environment, PackageLoader, select_autoescape, TemplateError
+from jinja2 import TemplateError
 
+from controllers.connectionpool import ConnectionPool
 from controllers.currencycontroller import CurrencyController
 from controllers.databasecontroller import CurrencyRatesCRUD
 from models import Author, App, User, Currency
 from utils.currencies_api import file_logged_get_currencies
+from utils.page_cache import (
+    CachedPage,
+    PageCache,
+    choose_encoding,
+    etag_matches,
+    not_modified_since,
+)
+from utils.router import Router
+from utils.templates import create_environment, preload_templates
+from utils.threadpool_server import ThreadPoolHTTPServer
 
 main_author = Author(name="Ломаченко Ян", group="P3120")
 app_info = App(name="CurrenciesListApp", version="1.0", author=main_author)
@@ -28,11 +41,24 @@ CURRENCY_CODES: list[str] = [
     "CNY", "IDR", "UAH", "AED", "CAD", "JPY",
 ]
 
-env = Environment(
-    loader=PackageLoader("myapp"),
-    autoescape=select_autoescape(["html", "xml"]),
+# Пул потоков сервера: число обработчиков и длина очереди соединений.
+SERVER_MAX_WORKERS: int = 8
+SERVER_MAX_QUEUE: int = 64
+# Сколько секунд keep-alive соединение может простаивать: пока оно
+# открыто, за ним закреплён поток пула, поэтому таймаут короткий.
+KEEPALIVE_TIMEOUT: float = 1.0
+
+# Файл базы данных по умолчанию (режим WAL, рядом появляются файлы -wal
+# и -shm); переопределяется переменной окружения LAB9_DB_PATH или
+# параметром init_app()/run_server().
+DB_PATH: Path = Path(
+    os.environ.get("LAB9_DB_PATH")
+    or Path(__file__).resolve().parent / "currencies.db"
 )
 
+# Скомпилированные шаблоны кэшируются на диске (utils/templates.py).
+env = create_environment()
+
 
 def render_template(template_name: str, context: dict) -> str:
     """
@@ -49,18 +75,29 @@ def render_template(template_name: str, context: dict) -> str:
     return template.render(**context)
 
 
-conn = sqlite3.connect(":memory:")
-conn.row_factory = sqlite3.Row
+# База открывается в init_app(). У каждого потока сервера свои
+# подключения к файлу базы: обработчики GET читают через read_pool и не
+# блокируют друг друга, изменения идут через db_pool.
+db_pool: ConnectionPool | None = None
+read_pool: ConnectionPool | None = None
+db: CurrencyRatesCRUD | None = None
+currency_controller: CurrencyController | None = None
 
-db = CurrencyRatesCRUD(conn)
-currency_controller = CurrencyController(db)
+# Готовые страницы; любое изменение данных должно вызывать
+# page_cache.bump().
+page_cache = PageCache()
+
+# Маршруты MyRequestHandler: регистрируются декоратором router.route.
+router = Router()
 
 
 def init_db_with_currencies() -> None:
     """
-    Загрузить курсы валют из API и заполнить таблицу currency.
+    Загрузить курсы валют из API и обновить таблицу currency.
 
-    Вызывается один раз при старте приложения.
+    Вызывается при старте приложения. Существующие валюты обновляются на
+    месте (их id и подписки сохраняются), поэтому функцию можно вызывать
+    и повторно: если курсы не изменились, база и кэш страниц не трогаются.
     """
     try:
         rates = file_logged_get_currencies(CURRENCY_CODES)
@@ -68,10 +105,6 @@ def init_db_with_currencies() -> None:
         print(f"[INIT] Ошибка доступа к API: {exc}")
         return
 
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM currency")
-    conn.commit()
-
     currencies: list[Currency] = []
     for code, info in rates.items():
         c = Currency(
@@ -84,9 +117,14 @@ def init_db_with_currencies() -> None:
         )
         currencies.append(c)
 
-    if currencies:
-        currency_controller.add_many(currencies)
-        print(f"[INIT] Добавлено валют: {len(currencies)}")
+    changes = currency_controller.sync_currencies(currencies)
+    print(
+        f"[INIT] Валют добавлено: {len(changes.inserted)}, "
+        f"обновлено: {len(changes.updated)}, "
+        f"без изменений: {len(changes.unchanged)}",
+    )
+    if changes:
+        page_cache.bump()
 
 
 def init_db_with_users_and_subscriptions() -> None:
@@ -94,16 +132,21 @@ def init_db_with_users_and_subscriptions() -> None:
     Заполнить таблицы user и user_currency начальными данными.
 
     Пользователи берутся из списка `users`,
-    подписки задаются в словаре subscriptions.
+    подписки задаются в словаре subscriptions. Каждая таблица заполняется,
+    только если она пуста, поэтому изменения, сделанные через сайт,
+    сохраняются между перезапусками.
     """
-    cursor = conn.cursor()
+    cursor = db.connection().cursor()
 
-    cursor.execute("DELETE FROM user")
-    cursor.execute("DELETE FROM user_currency")
-    conn.commit()
+    user_rows: list[tuple[int, str]] = []
+    if cursor.execute("SELECT 1 FROM user LIMIT 1").fetchone() is None:
+        user_rows = [(u.id, u.name) for u in users]
+        with db.transaction():
+            cursor.executemany("INSERT INTO user(id, name) VALUES (?, ?)",
+                               user_rows)
 
-    user_rows = [(u.id, u.name) for u in users]
-    cursor.executemany("INSERT INTO user(id, name) VALUES (?, ?)", user_rows)
+    if cursor.execute("SELECT 1 FROM user_currency LIMIT 1").fetchone():
+        return
 
     cursor.execute("SELECT id, char_code FROM currency")
     code_to_id: dict[str, int] = {
@@ -131,12 +174,14 @@ def init_db_with_users_and_subscriptions() -> None:
                 user_currency_rows.append((user_id, currency_id))
 
     if user_currency_rows:
-        cursor.executemany(
-            "INSERT INTO user_currency(user_id, currency_id) VALUES (?, ?)",
-            user_currency_rows,
-        )
-        conn.commit()
+        with db.transaction():
+            cursor.executemany(
+                "INSERT INTO user_currency(user_id, currency_id)"
+                " VALUES (?, ?)",
+                user_currency_rows,
+            )
 
+    page_cache.bump()
     print(
         f"[INIT] Users: {len(user_rows)}, "
         f"subscriptions: {len(user_currency_rows)}",
@@ -155,29 +200,64 @@ def get_user_with_currencies(user_id: int) -> tuple[dict | None, list[dict]]:
         currencies : list[dict]
             Список валют из таблицы currency.
     """
-    cursor = conn.cursor()
+    with db.lock:
+        cursor = db.read_connection().cursor()
 
-    cursor.execute("SELECT * FROM user WHERE id = ?", (user_id,))
-    user_row = cursor.fetchone()
-    if user_row is None:
-        return None, []
+        cursor.execute("SELECT * FROM user WHERE id = ?", (user_id,))
+        user_row = cursor.fetchone()
+        if user_row is None:
+            return None, []
 
-    cursor.execute(
-        """
-        SELECT c.*
-        FROM currency AS c
-        JOIN user_currency AS uc ON uc.currency_id = c.id
-        WHERE uc.user_id = ?
-        """,
-        (user_id,),
-    )
-    rows = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT c.*
+            FROM currency AS c
+            JOIN user_currency AS uc ON uc.currency_id = c.id
+            WHERE uc.user_id = ?
+            """,
+            (user_id,),
+        )
+        rows = cursor.fetchall()
 
-    return dict(user_row), [dict(r) for r in rows]
+        return dict(user_row), [dict(r) for r in rows]
 
 
-init_db_with_currencies()
-init_db_with_users_and_subscriptions()
+def init_app(db_path: str | os.PathLike | None = None,
+             fetch_rates: bool = True) -> None:
+    """
+    Открыть базу приложения и заполнить её начальными данными.
+
+    Parameters
+    ----------
+    db_path : str | os.PathLike | None
+        Файл базы; по умолчанию DB_PATH.
+    fetch_rates : bool
+        Загрузить свежие курсы из API ЦБ (False — работать с тем, что
+        уже есть в базе, например в тестах).
+    """
+    global db_pool, read_pool, db, currency_controller
+
+    close_app()
+    path = Path(db_path) if db_path is not None else DB_PATH
+    db_pool = ConnectionPool(path)
+    read_pool = ConnectionPool(path, readonly=True)
+    db = CurrencyRatesCRUD(db_pool, read_pool=read_pool)
+    currency_controller = CurrencyController(db)
+    page_cache.bump()
+
+    if fetch_rates:
+        init_db_with_currencies()
+    init_db_with_users_and_subscriptions()
+
+
+def close_app() -> None:
+    """Закрыть подключения к базе, открытые init_app()."""
+    global db_pool, read_pool, db, currency_controller
+
+    for pool in (read_pool, db_pool):
+        if pool is not None:
+            pool.close()
+    db_pool = read_pool = db = currency_controller = None
 
 
 class MyRequestHandler(BaseHTTPRequestHandler):
@@ -189,41 +269,47 @@ class MyRequestHandler(BaseHTTPRequestHandler):
       /                       — главная страница (index.html)
       /author                 — страница об авторе (author.html)
       /users                  — список пользователей (users.html)
-      /user?id=...            — профиль пользователя (user.html)
+      /user?id=..., /user/<id> — профиль пользователя (user.html)
       /currencies             — список валют (currencies.html)
       /currency/delete?id=... — удалить валюту по id
       /currency/update?USD=...— обновить курс валюты
       /currency/show          — вывести список валют в консоль
+      /cache/stats            — счётчики кэша страниц (JSON)
+
+    Страницы '/', '/author', '/users', '/user' и '/currencies' отдаются
+    из page_cache, пока данные не изменились, с ETag/Last-Modified
+    (условный запрос получает 304) и сжатием по Accept-Encoding.
+
+    Работает по HTTP/1.1: каждый ответ содержит Content-Length, поэтому
+    соединение переиспользуется между запросами (в том числе после
+    редиректов) и закрывается после KEEPALIVE_TIMEOUT секунд простоя.
+    Если в очереди сервера ждут другие соединения, ответ закрывает
+    соединение (``Connection: close``), чтобы освободить поток пула.
     """
 
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # Заголовки и тело пишутся отдельно: без TCP_NODELAY keep-alive
+    # соединение ловит задержку Nagle + delayed ACK (~40 мс на ответ).
+    disable_nagle_algorithm = True
+
     def do_GET(self) -> None:
-        """Обработка всех GET-запросов."""
+        """
+        Обработка всех GET-запросов.
+
+        Обработчик ищется в таблице router; строка запроса разбирается
+        один раз и передаётся ему аргументом ``params``, параметры пути —
+        именованными аргументами.
+        """
         parsed_url = urlparse(self.path)
-        path = parsed_url.path
+        match = router.resolve(parsed_url.path)
+        if match is None:
+            self.send_error(404, "Not Found")
+            return
 
+        params = parse_qs(parsed_url.query)
         try:
-            if path == "/":
-                self.handle_index()
-            elif path == "/author":
-                self.handle_author()
-            elif path == "/users":
-                self.handle_users()
-            elif path == "/user":
-                self.handle_user()
-            elif path == "/currencies":
-                self.handle_currencies()
-            elif path == "/currency/delete":
-                self.handle_currency_delete()
-            elif path == "/currency/update":
-                self.handle_currency_update()
-            elif path == "/currency/show":
-                self.handle_currency_show()
-            elif path == "/subscription/delete":
-                self.handle_subscription_delete()
-            elif path == "/subscription/add":
-                self.handle_subscription_add()
-            else:
-                self.send_error(404, "Not Found")
+            match.handler(self, params, **match.path_params)
         except TemplateError as exc:
             print("[TEMPLATE ERROR]", exc)
             self.send_error(500, "Template error")
@@ -231,7 +317,8 @@ class MyRequestHandler(BaseHTTPRequestHandler):
             print("[UNHANDLED ERROR]", exc)
             self.send_error(500, "Internal Server Error")
 
-    def handle_index(self) -> None:
+    @router.route("/")
+    def handle_index(self, params: dict[str, list[str]]) -> None:
         """
         Главная страница '/'.
 
@@ -239,96 +326,110 @@ class MyRequestHandler(BaseHTTPRequestHandler):
         - вывести информацию об авторе;
         - вывести список валют (можно кратко).
         """
-        currencies = currency_controller.list_currencies()
+        def render() -> str:
+            return render_template(
+                "index.html",
+                {
+                    "myapp": app_info.name,
+                    "author_name": main_author.name,
+                    "group": main_author.group,
+                    "currencies": currency_controller.list_currencies(),
+                },
+            )
 
-        html = render_template(
-            "index.html",
-            {
-                "myapp": app_info.name,
-                "author_name": main_author.name,
-                "group": main_author.group,
-                "currencies": currencies,
-            },
-        )
-        self._send_html(html)
+        self._send_page(page_cache.get_or_render("/", render))
 
-    def handle_author(self) -> None:
+    @router.route("/author")
+    def handle_author(self, params: dict[str, list[str]]) -> None:
         """Страница об авторе '/author'."""
-        html = render_template(
-            "author.html",
-            {
-                "myapp": app_info.name,
-                "author_name": main_author.name,
-                "group": main_author.group,
-            },
-        )
-        self._send_html(html)
+        def render() -> str:
+            return render_template(
+                "author.html",
+                {
+                    "myapp": app_info.name,
+                    "author_name": main_author.name,
+                    "group": main_author.group,
+                },
+            )
 
-    def handle_users(self) -> None:
+        self._send_page(page_cache.get_or_render("/author", render))
+
+    @router.route("/users")
+    def handle_users(self, params: dict[str, list[str]]) -> None:
         """Страница со списком пользователей '/users'."""
-        html = render_template(
-            "users.html",
-            {"myapp": app_info.name, "users": users},
-        )
-        self._send_html(html)
+        def render() -> str:
+            return render_template(
+                "users.html",
+                {"myapp": app_info.name, "users": users},
+            )
+
+        self._send_page(page_cache.get_or_render("/users", render))
 
-    def handle_user(self) -> None:
+    @router.route("/user")
+    @router.route("/user/<int:user_id>")
+    def handle_user(self, params: dict[str, list[str]],
+                    user_id: int | None = None) -> None:
         """
-        Страница одного пользователя '/user?id=...'.
+        Страница одного пользователя '/user?id=...' или '/user/<id>'.
 
         Показывает данные пользователя и список валют,
         на которые он подписан.
         """
-        parsed_url = urlparse(self.path)
-        params = parse_qs(parsed_url.query)
-
-        user_id_str = params.get("id", [None])[0]
-        try:
-            user_id = int(user_id_str)
-        except (TypeError, ValueError):
-            self.send_error(400, "Bad Request")
-            return
+        if user_id is None:
+            try:
+                user_id = int(params.get("id", [None])[0])
+            except (TypeError, ValueError):
+                self.send_error(400, "Bad Request")
+                return
+
+        route = f"/user?id={user_id}"
+        version, page = page_cache.lookup(route)
+        if page is None:
+            user, currencies = get_user_with_currencies(user_id)
+            if user is None:
+                self.send_error(404, "Not Found")
+                return
 
-        user, currencies = get_user_with_currencies(user_id)
-        if user is None:
-            self.send_error(404, "Not Found")
-            return
+            all_currencies = currency_controller.list_currencies()
 
-        all_currencies = currency_controller.list_currencies()
+            body = render_template(
+                "user.html",
+                {
+                    "myapp": app_info.name,
+                    "user": user,
+                    "currencies": currencies,
+                    "all_currencies": all_currencies,
+                },
+            ).encode("utf-8")
+            page = page_cache.store(route, version, body)
 
-        html = render_template(
-            "user.html",
-            {
-                "myapp": app_info.name,
-                "user": user,
-                "currencies": currencies,
-                "all_currencies": all_currencies,
-            },
-        )
-        self._send_html(html)
+        self._send_page(page)
 
-    def handle_currencies(self) -> None:
+    @router.route("/currencies")
+    def handle_currencies(self, params: dict[str, list[str]]) -> None:
         """
         Страница со списком валют '/currencies'.
 
         Данные берутся из базы данных SQLite через CurrencyController.
         """
-        currencies = currency_controller.list_currencies()
-        html = render_template(
-            "currencies.html",
-            {"myapp": app_info.name, "currencies": currencies},
-        )
-        self._send_html(html)
+        def render() -> str:
+            return render_template(
+                "currencies.html",
+                {
+                    "myapp": app_info.name,
+                    "currencies": currency_controller.list_currencies(),
+                },
+            )
 
-    def handle_currency_delete(self) -> None:
+        self._send_page(page_cache.get_or_render("/currencies", render))
+
+    @router.route("/currency/delete")
+    def handle_currency_delete(self, params: dict[str, list[str]]) -> None:
         """
         Маршрут '/currency/delete?id=...'.
 
         Удаляет валюту по её идентификатору и делает редирект на /currencies.
         """
-        parsed = urlparse(self.path)
-        params = parse_qs(parsed.query)
-
         raw_id = params.get("id", [None])[0]
         try:
             currency_id = int(raw_id)
@@ -336,10 +437,12 @@ class MyRequestHandler(BaseHTTPRequestHandler):
             self.send_error(400, "Bad Request")
             return
 
-        currency_controller.delete_currency(currency_id)
+        if currency_controller.delete_currency(currency_id):
+            page_cache.bump()
         self._redirect("/currencies")
 
-    def handle_currency_update(self) -> None:
+    @router.route("/currency/update")
+    def handle_currency_update(self, params: dict[str, list[str]]) -> None:
         """
         Маршрут '/currency/update?USD=95.5'.
 
@@ -347,9 +450,6 @@ class MyRequestHandler(BaseHTTPRequestHandler):
         имя параметра — символьный код валюты (например, USD),
         значение параметра — новый курс (float).
         """
-        parsed = urlparse(self.path)
-        params = parse_qs(parsed.query)
-
         if not params:
             self.send_error(400, "Bad Request")
             return
@@ -361,10 +461,12 @@ class MyRequestHandler(BaseHTTPRequestHandler):
             self.send_error(400, "Bad Request")
             return
 
-        currency_controller.update_currency(code, value)
+        if currency_controller.update_currency(code, value):
+            page_cache.bump()
         self._redirect("/currencies")
 
-    def handle_currency_show(self) -> None:
+    @router.route("/currency/show")
+    def handle_currency_show(self, params: dict[str, list[str]]) -> None:
         """
         Маршрут '/currency/show'.
 
@@ -386,11 +488,9 @@ class MyRequestHandler(BaseHTTPRequestHandler):
         )
         self._send_html(html)
 
-    def handle_subscription_delete(self) -> None:
+    @router.route("/subscription/delete")
+    def handle_subscription_delete(self, params: dict[str, list[str]]) -> None:
         """Удалить подписку пользователя на валюту."""
-        parsed = urlparse(self.path)
-        params = parse_qs(parsed.query)
-
         try:
             user_id = int(params.get("user_id", [None])[0])
             currency_id = int(params.get("currency_id", [None])[0])
@@ -398,20 +498,24 @@ class MyRequestHandler(BaseHTTPRequestHandler):
             self.send_error(400, "Bad Request")
             return
 
-        cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM user_currency WHERE user_id = ? AND currency_id = ?",
-            (user_id, currency_id),
-        )
-        conn.commit()
+        # transaction() откатывает запись при ошибке: иначе открытая
+        # транзакция осталась бы на подключении потока и блокировала
+        # запись в других потоках.
+        with db.transaction():
+            cursor = db.connection().cursor()
+            cursor.execute(
+                "DELETE FROM user_currency"
+                " WHERE user_id = ? AND currency_id = ?",
+                (user_id, currency_id),
+            )
+        if cursor.rowcount > 0:
+            page_cache.bump()
 
         self._redirect(f"/user?id={user_id}")
 
-    def handle_subscription_add(self) -> None:
+    @router.route("/subscription/add")
+    def handle_subscription_add(self, params: dict[str, list[str]]) -> None:
         """Добавить подписку пользователя на валюту по CharCode."""
-        parsed = urlparse(self.path)
-        params = parse_qs(parsed.query)
-
         try:
             user_id = int(params.get("user_id", [None])[0])
             char_code = params.get("char_code", [None])[0]
@@ -419,42 +523,153 @@ class MyRequestHandler(BaseHTTPRequestHandler):
             self.send_error(400, "Bad Request")
             return
 
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id FROM currency WHERE char_code = ?",
-            (char_code,),
-        )
-        row = cursor.fetchone()
-        if row is None:
-            self.send_error(404, "Not Found")
-            return
-
-        currency_id = row["id"]
-        cursor.execute(
-            "INSERT OR IGNORE INTO user_currency(user_id, currency_id) VALUES (?, ?)",
-            (user_id, currency_id),
-        )
-        conn.commit()
+        # INSERT OR IGNORE не подавляет нарушение внешнего ключа, поэтому
+        # пользователь и валюта проверяются заранее — в той же транзакции.
+        with db.transaction():
+            cursor = db.connection().cursor()
+            cursor.execute(
+                "SELECT id FROM currency WHERE char_code = ?",
+                (char_code,),
+            )
+            row = cursor.fetchone()
+            user_exists = cursor.execute(
+                "SELECT 1 FROM user WHERE id = ?", (user_id,),
+            ).fetchone() is not None
+            if row is None or not user_exists:
+                self.send_error(404, "Not Found")
+                return
+            cursor.execute(
+                "INSERT OR IGNORE INTO user_currency(user_id, currency_id)"
+                " VALUES (?, ?)",
+                (user_id, row["id"]),
+            )
+        if cursor.rowcount > 0:
+            page_cache.bump()
 
         self._redirect(f"/user?id={user_id}")
 
+    @router.route("/cache/stats")
+    def handle_cache_stats(self, params: dict[str, list[str]]) -> None:
+        """Маршрут '/cache/stats': попадания и промахи кэша страниц."""
+        body = json.dumps(page_cache.stats()).encode("utf-8")
+        self._send_body(body, "application/json")
+
+    def _send_page(self, page: CachedPage) -> None:
+        """
+        Отправить страницу из кэша.
+
+        Если ETag (или дата) из условного запроса совпадает с текущими,
+        отвечает 304 без тела; иначе отдаёт сжатый вариант, если клиент
+        его принимает.
+        """
+        encoding = choose_encoding(self.headers.get("Accept-Encoding"),
+                                   len(page.body))
+        etag = page.etag(encoding)
+
+        if_none_match = self.headers.get("If-None-Match")
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, etag)
+        elif if_modified_since is not None:
+            not_modified = not_modified_since(if_modified_since,
+                                              page.modified)
+        else:
+            not_modified = False
+
+        if not_modified:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", page.last_modified)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        headers = {
+            "ETag": etag,
+            "Last-Modified": page.last_modified,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        self._send_body(page.encoded(encoding), "text/html; charset=utf-8",
+                        headers=headers)
+
+    def end_headers(self) -> None:
+        """Завершить заголовки; отказаться от keep-alive, если ждут другие."""
+        if (not self.close_connection
+                and getattr(self.server, "waiting", 0) > 0):
+            # send_header сам выставит close_connection.
+            self.send_header("Connection", "close")
+        super().end_headers()
+
     def _send_html(self, html: str, status: int = 200) -> None:
         """Отправить готовый HTML-код клиенту."""
+        self._send_body(html.encode("utf-8"), "text/html; charset=utf-8",
+                        status)
+
+    def _send_body(self, body: bytes, content_type: str,
+                   status: int = 200,
+                   headers: dict[str, str] | None = None) -> None:
+        """Отправить тело ответа с заголовками Content-Type/Length."""
         self.send_response(status)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(html.encode("utf-8"))
+        self.wfile.write(body)
 
     def _redirect(self, location: str) -> None:
         """Сделать HTTP-редирект на указанный путь."""
         self.send_response(302)
         self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
 
-def run_server(host: str = "localhost", port: int = 8080) -> None:
-    """Запустить HTTP-сервер."""
-    httpd = HTTPServer((host, port), MyRequestHandler)
+def make_server(host: str = "localhost", port: int = 8080,
+                max_workers: int | None = SERVER_MAX_WORKERS,
+                max_queue: int = SERVER_MAX_QUEUE,
+                handler_class: type | None = None) -> HTTPServer:
+    """
+    Создать HTTP-сервер приложения (без запуска).
+
+    Parameters
+    ----------
+    host, port
+        Адрес сервера.
+    max_workers : int | None
+        Число потоков-обработчиков. None — обрабатывать запросы по одному
+        в потоке serve_forever() (обычный HTTPServer).
+    max_queue : int
+        Длина очереди соединений, ожидающих обработчика; при
+        переполнении клиент получает 503.
+    handler_class : type | None
+        Класс обработчика; по умолчанию MyRequestHandler.
+    """
+    handler_class = handler_class or MyRequestHandler
+    if max_workers is None:
+        return HTTPServer((host, port), handler_class)
+    return ThreadPoolHTTPServer((host, port), handler_class,
+                                max_workers=max_workers, max_queue=max_queue)
+
+
+def run_server(host: str = "localhost", port: int = 8080,
+               max_workers: int | None = SERVER_MAX_WORKERS,
+               max_queue: int = SERVER_MAX_QUEUE,
+               db_path: str | os.PathLike | None = None) -> None:
+    """
+    Запустить HTTP-сервер (параметры — как у make_server).
+
+    Перед началом приёма запросов открывается база ``db_path`` (см.
+    init_app) и загружаются шаблоны, поэтому первые запросы не ждут их
+    компиляции.
+    """
+    init_app(db_path)
+    preload_templates(env)
+    httpd = make_server(host, port, max_workers=max_workers,
+                        max_queue=max_queue)
     print(f"Сервер запущен: http://{host}:{port}")
     try:
         httpd.serve_forever()
@@ -462,6 +677,7 @@ def run_server(host: str = "localhost", port: int = 8080) -> None:
         print("\nВыключение сервера…")
     finally:
         httpd.server_close()
+        close_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from controllers.connectionpool import ConnectionPool, SharedConnection
+from controllers.databasecontroller import CurrencyRatesCRUD
+from models.currency import Currency
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Пул подключений к файлу базы: по подключению на поток, WAL."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "test.db")
+        self.pool = ConnectionPool(self.path)
+        self.addCleanup(self.pool.close)
+
+    def _in_thread(self, func):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(func()))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_connection_per_thread(self):
+        conn = self.pool.connection()
+        self.assertIs(self.pool.connection(), conn)
+        self.assertIsNot(self._in_thread(self.pool.connection), conn)
+        self.assertEqual(self.pool.size, 2)
+
+    def test_pragmas(self):
+        conn = self.pool.connection()
+        self.assertEqual(
+            conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+        # synchronous=NORMAL
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+
+    def test_readonly_pool(self):
+        db = CurrencyRatesCRUD(self.pool)
+        db.create(Currency(currency_id=None, char_code="USD", value=90.0,
+                           nominal=1, num_code="840", name="Доллар США"))
+
+        readers = ConnectionPool(self.path, readonly=True)
+        self.addCleanup(readers.close)
+        conn = readers.connection()
+        self.assertEqual(
+            conn.execute("SELECT char_code FROM currency").fetchone()[0],
+            "USD")
+        with self.assertRaises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM currency")
+
+    def test_reader_sees_committed_writes(self):
+        readers = ConnectionPool(self.path, readonly=True)
+        self.addCleanup(readers.close)
+        db = CurrencyRatesCRUD(self.pool, read_pool=readers)
+        self.assertIsNone(db.get_by_char_code("USD"))
+
+        self._in_thread(lambda: db.create(Currency(
+            currency_id=None, char_code="USD", value=90.0, nominal=1,
+            num_code="840", name="Доллар США")))
+        self.assertEqual(db.get_by_char_code("USD")["value"], 90.0)
+
+    def test_concurrent_writes(self):
+        db = CurrencyRatesCRUD(self.pool)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(20):
+                    db.create(Currency(
+                        currency_id=None, char_code=f"C{n:02d}{i:02d}",
+                        value=1.0, nominal=1, num_code="001", name="Валюта"))
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(n,))
+                   for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(db.read_all()), 80)
+
+    def test_close_reopens_lazily(self):
+        conn = self.pool.connection()
+        self.pool.close()
+        self.assertEqual(self.pool.size, 0)
+        self.assertIsNot(self.pool.connection(), conn)
+
+    def test_memory_database_needs_shared_connection(self):
+        with self.assertRaises(ValueError):
+            ConnectionPool(":memory:")
+        shared = SharedConnection(sqlite3.connect(":memory:"))
+        self.addCleanup(shared.close)
+        db = CurrencyRatesCRUD(shared)
+        self.assertIs(db.connection(), shared.connection())
+
+
+if __name__ == "__main__":
+    unittest.main()
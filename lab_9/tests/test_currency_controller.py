@@ -1,6 +1,10 @@
+import sqlite3
 import unittest
+from unittest import mock
 from unittest.mock import MagicMock
 from controllers.currencycontroller import CurrencyController
+from controllers.databasecontroller import CurrencyRatesCRUD
+from models.currency import Currency
 
 
 class TestCurrencyController(unittest.TestCase):
@@ -34,3 +38,124 @@ class TestCurrencyController(unittest.TestCase):
         controller.delete_currency(3)
 
         mock_db.delete.assert_called_once_with(3)
+
+    def test_sync_currencies(self):
+        mock_db = MagicMock()
+        currencies = [MagicMock()]
+
+        controller = CurrencyController(mock_db)
+        result = controller.sync_currencies(currencies)
+
+        mock_db.upsert_many.assert_called_once_with(currencies)
+        self.assertIs(result, mock_db.upsert_many.return_value)
+
+    def test_update_many_uses_transaction(self):
+        mock_db = MagicMock()
+        mock_db.update.side_effect = [True, False]
+
+        controller = CurrencyController(mock_db)
+        updated = controller.update_many({"USD": 95.5, "XXX": 1.0})
+
+        self.assertEqual(updated, 1)
+        mock_db.transaction.assert_called_once_with()
+        mock_db.update.assert_any_call("USD", 95.5)
+        mock_db.update.assert_any_call("XXX", 1.0)
+
+    def test_delete_many_uses_transaction(self):
+        mock_db = MagicMock()
+        mock_db.delete.return_value = True
+
+        controller = CurrencyController(mock_db)
+        deleted = controller.delete_many([1, 2, 3])
+
+        self.assertEqual(deleted, 3)
+        mock_db.transaction.assert_called_once_with()
+        self.assertEqual(mock_db.delete.call_count, 3)
+
+
+def _currency(code, value):
+    return Currency(currency_id=None, char_code=code, value=value,
+                    nominal=1, num_code="001", name="Валюта")
+
+
+class TestCurrencyControllerCache(unittest.TestCase):
+    """Кэш валют в контроллере поверх настоящей базы."""
+
+    def setUp(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        self.db = CurrencyRatesCRUD(conn)
+        self.db.create_many([_currency("USD", 90.0), _currency("EUR", 100.0)])
+        self.controller = CurrencyController(self.db)
+
+    def test_reads_are_served_from_cache(self):
+        with mock.patch.object(self.db, "read_all",
+                               wraps=self.db.read_all) as read_all:
+            first = self.controller.list_currencies()
+            second = self.controller.list_currencies()
+            usd = self.controller.get_currency("usd")
+
+        self.assertIs(first, second)
+        self.assertIs(usd, self.controller.get_currency("USD"))
+        self.assertEqual(usd["value"], 90.0)
+        self.assertIsNone(self.controller.get_currency("GBP"))
+        read_all.assert_called_once()
+
+    def test_rows_are_read_only(self):
+        row = self.controller.get_currency("USD")
+        with self.assertRaises(TypeError):
+            row["value"] = 1.0
+
+    def test_update_writes_through(self):
+        before = self.controller.list_currencies()
+        with mock.patch.object(self.db, "read_all") as read_all:
+            self.assertTrue(self.controller.update_currency("usd", 95.0))
+            after = self.controller.list_currencies()
+        read_all.assert_not_called()
+
+        self.assertIsNot(before, after)
+        self.assertEqual(self.controller.get_currency("USD")["value"], 95.0)
+        self.assertEqual(self.db.get_by_char_code("USD")["value"], 95.0)
+        self.assertEqual(before[0]["value"], 90.0)
+
+    def test_writes_invalidate(self):
+        self.controller.list_currencies()
+        self.controller.add_currency(_currency("GBP", 110.0))
+        self.assertIsNotNone(self.controller.get_currency("GBP"))
+
+        gbp_id = self.controller.get_currency("GBP")["id"]
+        self.controller.delete_currency(gbp_id)
+        self.assertIsNone(self.controller.get_currency("GBP"))
+
+        self.controller.sync_currencies([_currency("JPY", 0.6)])
+        self.assertIsNotNone(self.controller.get_currency("JPY"))
+
+        self.controller.update_many({"USD": 91.0, "EUR": 101.0})
+        self.assertEqual(self.controller.get_currency("EUR")["value"], 101.0)
+
+    def test_rolled_back_update_is_not_cached(self):
+        self.controller.list_currencies()
+        with self.assertRaises(RuntimeError):
+            with self.controller.transaction():
+                self.controller.update_currency("USD", 1.0)
+                self.assertEqual(
+                    self.controller.get_currency("USD")["value"], 1.0)
+                raise RuntimeError("boom")
+        self.assertEqual(self.controller.get_currency("USD")["value"], 90.0)
+
+    def test_out_of_order_patches_drop_the_cache(self):
+        # Запись A фиксируется первой, но до кэша доходит после записи B.
+        self.controller.list_currencies()
+        update = self.db.update
+
+        def update_a_then_b(char_code, value):
+            result = update(char_code, value)
+            with mock.patch.object(self.db, "update", update):
+                self.controller.update_currency("USD", 92.0)
+            return result
+
+        with mock.patch.object(self.db, "update", update_a_then_b):
+            self.controller.update_currency("USD", 91.0)
+
+        self.assertEqual(self.db.get_by_char_code("USD")["value"], 92.0)
+        self.assertEqual(self.controller.get_currency("USD")["value"], 92.0)
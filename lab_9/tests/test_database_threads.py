@@ -0,0 +1,46 @@
+import sqlite3
+import threading
+import unittest
+
+from controllers.databasecontroller import CurrencyRatesCRUD
+from models.currency import Currency
+
+
+class TestCurrencyRatesCRUDThreads(unittest.TestCase):
+    """Общее подключение SQLite из нескольких потоков сервера."""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.addCleanup(self.conn.close)
+        self.db = CurrencyRatesCRUD(self.conn)
+
+    def test_concurrent_writes_and_reads(self):
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(50):
+                    code = f"C{n:02d}{i:02d}"
+                    self.db.create(Currency(
+                        currency_id=None, char_code=code, value=1.0 + i,
+                        nominal=1, num_code=f"{n:03d}", name=f"Валюта {n}",
+                    ))
+                    self.db.update(code, 2.0 + i)
+                    self.db.read_all()
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(n,))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.db.read_all()), 8 * 50)
+
+    def test_shared_lock(self):
+        lock = threading.RLock()
+        db = CurrencyRatesCRUD(self.conn, lock=lock)
+        self.assertIs(db.lock, lock)
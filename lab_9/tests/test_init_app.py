@@ -0,0 +1,64 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import myapp
+from models.currency import Currency
+
+
+class TestInitApp(unittest.TestCase):
+    """Открытие базы приложения и начальное заполнение таблиц."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "app.db")
+        self.addCleanup(myapp.close_app)
+
+    def _init(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            myapp.init_app(self.path, fetch_rates=False)
+        return myapp.db.connection()
+
+    def _count(self, conn, table):
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_uses_given_path(self):
+        self._init()
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(myapp.db_pool.path.name, "app.db")
+
+    def test_subscription_changes_survive_restart(self):
+        conn = self._init()
+        myapp.currency_controller.add_many(
+            Currency(currency_id=None, char_code=code, value=10.0 + i,
+                     nominal=1, num_code=f"{i:03d}", name=f"Валюта {code}")
+            for i, code in enumerate(myapp.CURRENCY_CODES, start=1)
+        )
+        self.assertEqual(self._count(conn, "user_currency"), 0)
+
+        # Валюты появились: подписки создаются при следующем запуске.
+        conn = self._init()
+        seeded = self._count(conn, "user_currency")
+        self.assertGreater(seeded, 0)
+
+        conn.execute("DELETE FROM user_currency WHERE user_id = 1")
+        conn.execute("DELETE FROM user WHERE id = 6")
+        conn.commit()
+        removed = seeded - self._count(conn, "user_currency")
+
+        conn = self._init()
+        self.assertEqual(self._count(conn, "user_currency"), seeded - removed)
+        self.assertEqual(self._count(conn, "user"), len(myapp.users) - 1)
+
+    def test_close_app(self):
+        self._init()
+        myapp.close_app()
+        self.assertIsNone(myapp.db)
+        self.assertIsNone(myapp.currency_controller)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.client import HTTPConnection
+
+import myapp
+
+
+class TestKeepAlive(unittest.TestCase):
+    """HTTP/1.1: ответы с Content-Length и переиспользование соединения."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Временная база: тесты не трогают рабочий currencies.db.
+        cls.tmp = tempfile.TemporaryDirectory()
+        myapp.init_app(os.path.join(cls.tmp.name, "test.db"),
+                       fetch_rates=False)
+        cls.server = myapp.make_server("localhost", 0, max_workers=2)
+        cls.thread = threading.Thread(target=cls.server.serve_forever,
+                                      daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        myapp.close_app()
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.conn = HTTPConnection("localhost", self.server.server_address[1],
+                                   timeout=5)
+        self.addCleanup(self.conn.close)
+
+    def _get(self, path):
+        self.conn.request("GET", path)
+        resp = self.conn.getresponse()
+        body = resp.read()
+        return resp, body
+
+    def test_pages_reuse_one_connection(self):
+        resp, body = self._get("/")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(int(resp.getheader("Content-Length")), len(body))
+        sock = self.conn.sock
+
+        for path in ("/users", "/currencies", "/author"):
+            resp, body = self._get(path)
+            self.assertEqual(resp.status, 200)
+            self.assertFalse(resp.will_close)
+            self.assertIs(self.conn.sock, sock)
+
+    def test_redirect_keeps_connection(self):
+        resp, body = self._get("/subscription/delete?user_id=1&currency_id=0")
+        self.assertEqual(resp.status, 302)
+        self.assertEqual(resp.getheader("Content-Length"), "0")
+        self.assertEqual(body, b"")
+        sock = self.conn.sock
+
+        resp, _ = self._get(resp.getheader("Location"))
+        self.assertEqual(resp.status, 200)
+        self.assertIs(self.conn.sock, sock)
+
+
+    def test_waiting_client_gets_the_worker(self):
+        # Один поток: keep-alive соединение не должно держать его, пока
+        # в очереди ждёт другой клиент.
+        server = myapp.make_server("localhost", 0, max_workers=1)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = server.server_address[1]
+
+        first = HTTPConnection("localhost", port, timeout=5)
+        self.addCleanup(first.close)
+        first.request("GET", "/author")
+        resp = first.getresponse()
+        resp.read()
+        self.assertFalse(resp.will_close)
+
+        second = HTTPConnection("localhost", port, timeout=5)
+        self.addCleanup(second.close)
+        second.request("GET", "/author")
+        for _ in range(200):
+            if server.waiting:
+                break
+            time.sleep(0.005)
+        self.assertEqual(server.waiting, 1)
+
+        first.request("GET", "/author")
+        resp = first.getresponse()
+        resp.read()
+        self.assertTrue(resp.will_close)
+        self.assertEqual(resp.getheader("Connection"), "close")
+
+        start = time.perf_counter()
+        self.assertEqual(second.getresponse().status, 200)
+        self.assertLess(time.perf_counter() - start, myapp.KEEPALIVE_TIMEOUT)
+
+
+if __name__ == "__main__":
+    unittest.main()
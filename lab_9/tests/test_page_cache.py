@@ -0,0 +1,193 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.client import HTTPConnection
+
+import myapp
+from models.currency import Currency
+from utils.page_cache import PageCache, choose_encoding, etag_matches
+
+
+class TestPageCache(unittest.TestCase):
+    """Кэш страниц: попадания, промахи и инвалидация по версии."""
+
+    def test_hit_after_first_render(self):
+        cache = PageCache()
+        calls = []
+
+        def render():
+            calls.append(1)
+            return "<p>страница</p>"
+
+        first = cache.get_or_render("/", render)
+        second = cache.get_or_render("/", render)
+
+        self.assertEqual(first.body, "<p>страница</p>".encode("utf-8"))
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_bump_invalidates(self):
+        cache = PageCache()
+        cache.get_or_render("/", lambda: "v0")
+        cache.bump()
+        self.assertEqual(cache.get_or_render("/", lambda: "v1").body, b"v1")
+
+    def test_page_rendered_before_bump_is_not_stored(self):
+        cache = PageCache()
+        version, page = cache.lookup("/")
+        self.assertIsNone(page)
+        cache.bump()
+        cache.store("/", version, b"old")
+        self.assertIsNone(cache.lookup("/")[1])
+
+    def test_max_entries(self):
+        cache = PageCache(max_entries=2)
+        for route in ("/a", "/b", "/c"):
+            cache.get_or_render(route, lambda: route)
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertIsNone(cache.lookup("/a")[1])
+
+    def test_etag_changes_with_version(self):
+        cache = PageCache()
+        first = cache.get_or_render("/", lambda: "v")
+        cache.bump()
+        second = cache.get_or_render("/", lambda: "v")
+        self.assertNotEqual(first.etag(), second.etag())
+        self.assertNotEqual(second.etag(), second.etag("gzip"))
+
+    def test_compressed_variant_is_reused(self):
+        page = PageCache().get_or_render("/", lambda: "x" * 1000)
+        body = page.encoded("gzip")
+        self.assertEqual(gzip.decompress(body), page.body)
+        self.assertIs(page.encoded("gzip"), body)
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding(None, 10_000), "identity")
+        self.assertEqual(choose_encoding("gzip", 10), "identity")
+        self.assertEqual(choose_encoding("gzip, deflate", 10_000), "gzip")
+        self.assertEqual(choose_encoding("gzip;q=0", 10_000), "identity")
+        self.assertEqual(choose_encoding("deflate", 10_000), "identity")
+        self.assertIn(choose_encoding("*", 10_000), ("br", "gzip"))
+        self.assertNotEqual(choose_encoding("gzip;q=0, *", 10_000), "gzip")
+        self.assertEqual(choose_encoding("gzip;q=0, br;q=0, *", 10_000),
+                         "identity")
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+
+
+class TestPageCacheRoutes(unittest.TestCase):
+    """Страницы приложения отдаются из кэша до изменения данных."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Временная база: тесты не трогают рабочий currencies.db.
+        cls.tmp = tempfile.TemporaryDirectory()
+        myapp.init_app(os.path.join(cls.tmp.name, "test.db"),
+                       fetch_rates=False)
+        myapp.currency_controller.add_currency(
+            Currency(currency_id=None, char_code="ZZZ", value=1.0,
+                     nominal=1, num_code="999", name="Тестовая валюта"))
+        cls.server = myapp.make_server("localhost", 0, max_workers=2)
+        cls.thread = threading.Thread(target=cls.server.serve_forever,
+                                      daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        myapp.close_app()
+        cls.tmp.cleanup()
+
+    def _request(self, path, headers=None):
+        conn = HTTPConnection("localhost", self.server.server_address[1],
+                              timeout=5)
+        conn.request("GET", path, headers=headers or {})
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        return resp, body
+
+    def _get(self, path):
+        resp, body = self._request(path)
+        return resp.status, body
+
+    def _stats(self):
+        return json.loads(self._get("/cache/stats")[1])
+
+    def test_repeated_page_is_a_hit(self):
+        self._get("/users")
+        before = self._stats()
+        status, _ = self._get("/users")
+        after = self._stats()
+        self.assertEqual(status, 200)
+        self.assertEqual(after["hits"], before["hits"] + 1)
+        self.assertEqual(after["misses"], before["misses"])
+
+    def test_mutation_bumps_version(self):
+        self._get("/currencies")
+        version = self._stats()["version"]
+        status, _ = self._get("/currency/update?ZZZ=1.5")
+        self.assertEqual(status, 302)
+        self.assertEqual(self._stats()["version"], version + 1)
+
+    def test_noop_mutation_keeps_version(self):
+        self._get("/currencies")
+        version = self._stats()["version"]
+        for path in ("/currency/update?QQQ=1.5", "/currency/delete?id=0",
+                     "/subscription/delete?user_id=1&currency_id=0"):
+            status, _ = self._get(path)
+            self.assertEqual(status, 302)
+        self.assertEqual(self._stats()["version"], version)
+
+    def test_subscription_for_unknown_user_is_404(self):
+        status, _ = self._get("/subscription/add?user_id=999&char_code=ZZZ")
+        self.assertEqual(status, 404)
+        # Ошибка не оставила открытой транзакции: запись проходит.
+        status, _ = self._get("/currency/update?ZZZ=4.5")
+        self.assertEqual(status, 302)
+
+    def test_conditional_get_returns_304(self):
+        resp, _ = self._request("/users")
+        etag = resp.getheader("ETag")
+        self.assertIsNotNone(etag)
+        self.assertEqual(resp.getheader("Vary"), "Accept-Encoding")
+
+        resp, body = self._request("/users", {"If-None-Match": etag})
+        self.assertEqual(resp.status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(resp.getheader("ETag"), etag)
+
+        resp, _ = self._request(
+            "/users", {"If-Modified-Since": resp.getheader("Last-Modified")})
+        self.assertEqual(resp.status, 304)
+
+    def test_etag_changes_after_mutation(self):
+        resp, _ = self._request("/currencies")
+        etag = resp.getheader("ETag")
+        self._get("/currency/update?ZZZ=2.5")
+        resp, _ = self._request("/currencies", {"If-None-Match": etag})
+        self.assertEqual(resp.status, 200)
+        self.assertNotEqual(resp.getheader("ETag"), etag)
+
+    def test_gzip_response(self):
+        _, plain = self._request("/")
+        resp, body = self._request("/", {"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(int(resp.getheader("Content-Length")), len(body))
+        self.assertEqual(gzip.decompress(body), plain)
+
+
+if __name__ == "__main__":
+    unittest.main()
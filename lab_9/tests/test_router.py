@@ -0,0 +1,99 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.client import HTTPConnection
+
+import myapp
+from utils.router import Router
+
+
+class TestRouter(unittest.TestCase):
+    """Таблица маршрутов: точные пути и шаблоны с параметрами."""
+
+    def setUp(self):
+        self.router = Router()
+        self.router.add("/", "index")
+        self.router.add("/user", "user_query")
+        self.router.add("/user/<int:user_id>", "user")
+        self.router.add("/currency/<code>/history", "history")
+
+    def test_exact_path(self):
+        self.assertEqual(self.router.resolve("/"), ("index", {}))
+        self.assertEqual(self.router.resolve("/user"), ("user_query", {}))
+
+    def test_path_params_are_converted(self):
+        self.assertEqual(self.router.resolve("/user/42"),
+                         ("user", {"user_id": 42}))
+        self.assertEqual(self.router.resolve("/currency/USD/history"),
+                         ("history", {"code": "USD"}))
+
+    def test_no_match(self):
+        self.assertIsNone(self.router.resolve("/user/abc"))
+        self.assertIsNone(self.router.resolve("/user/1/extra"))
+        self.assertIsNone(self.router.resolve("/missing"))
+
+    def test_decorator_returns_function(self):
+        @self.router.route("/author")
+        def handler():
+            return None
+
+        self.assertIs(self.router.resolve("/author").handler, handler)
+
+    def test_invalid_routes(self):
+        with self.assertRaises(ValueError):
+            self.router.add("/", "again")
+        with self.assertRaises(ValueError):
+            self.router.add("/user/<int:id>", "again")
+        with self.assertRaises(ValueError):
+            self.router.add("/<code>", "dynamic first segment")
+        with self.assertRaises(ValueError):
+            self.router.add("/x/<float:v>", "unknown converter")
+        with self.assertRaises(ValueError):
+            self.router.add("relative", "no slash")
+
+
+class TestAppRoutes(unittest.TestCase):
+    """Маршруты приложения через таблицу router."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Временная база: тесты не трогают рабочий currencies.db.
+        cls.tmp = tempfile.TemporaryDirectory()
+        myapp.init_app(os.path.join(cls.tmp.name, "test.db"),
+                       fetch_rates=False)
+        cls.server = myapp.make_server("localhost", 0, max_workers=2)
+        cls.thread = threading.Thread(target=cls.server.serve_forever,
+                                      daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        myapp.close_app()
+        cls.tmp.cleanup()
+
+    def _get(self, path):
+        conn = HTTPConnection("localhost", self.server.server_address[1],
+                              timeout=5)
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        return resp.status, body
+
+    def test_user_path_param_matches_query(self):
+        self.assertEqual(self._get("/user/1"), self._get("/user?id=1"))
+
+    def test_unknown_route_is_404(self):
+        self.assertEqual(self._get("/nope")[0], 404)
+        self.assertEqual(self._get("/user/x")[0], 404)
+
+    def test_bad_query_is_400(self):
+        self.assertEqual(self._get("/user?id=x")[0], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import sqlite3
+import unittest
+
+from controllers.databasecontroller import SCHEMA_VERSION, CurrencyRatesCRUD
+from models.currency import Currency
+
+# Схема до введения миграций (user_version = 0).
+LEGACY_SCHEMA = """
+CREATE TABLE user (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL);
+CREATE TABLE currency (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, num_code TEXT NOT NULL,
+    char_code TEXT NOT NULL, name TEXT NOT NULL, value REAL, nominal INTEGER
+);
+CREATE TABLE user_currency (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL, currency_id INTEGER NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES user(id),
+    FOREIGN KEY (currency_id) REFERENCES currency(id)
+);
+"""
+
+
+def _usd(value=90.0):
+    return Currency(currency_id=None, char_code="USD", value=value,
+                    nominal=1, num_code="840", name="Доллар США")
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    """Версионированная схема: индексы, ограничения, миграция данных."""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+
+    def _plan(self, sql, params):
+        rows = self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return " ".join(row[3] for row in rows)
+
+    def test_new_database_is_at_latest_version(self):
+        db = CurrencyRatesCRUD(self.conn)
+        self.assertEqual(db.schema_version, SCHEMA_VERSION)
+        self.assertIn(
+            "USING INDEX currency_char_code",
+            self._plan("SELECT * FROM currency WHERE char_code = ?",
+                       ("USD",)),
+        )
+        self.assertIn(
+            "USING COVERING INDEX",
+            self._plan("SELECT currency_id FROM user_currency"
+                       " WHERE user_id = ?", (1,)),
+        )
+
+    def test_duplicates_are_rejected(self):
+        db = CurrencyRatesCRUD(self.conn)
+        db.create(_usd())
+        with self.assertRaises(sqlite3.IntegrityError):
+            db.create(_usd())
+
+        self.conn.execute("INSERT INTO user(id, name) VALUES (1, 'A')")
+        for _ in range(2):
+            self.conn.execute(
+                "INSERT OR IGNORE INTO user_currency(user_id, currency_id)"
+                " VALUES (1, 1)")
+        count = self.conn.execute(
+            "SELECT COUNT(*) FROM user_currency").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_foreign_keys_cascade(self):
+        db = CurrencyRatesCRUD(self.conn)
+        currency_id = db.create(_usd())
+        self.conn.execute("INSERT INTO user(id, name) VALUES (1, 'A')")
+        self.conn.execute(
+            "INSERT INTO user_currency(user_id, currency_id) VALUES (1, ?)",
+            (currency_id,))
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.conn.execute(
+                "INSERT INTO user_currency(user_id, currency_id)"
+                " VALUES (2, ?)", (currency_id,))
+
+        db.delete(currency_id)
+        count = self.conn.execute(
+            "SELECT COUNT(*) FROM user_currency").fetchone()[0]
+        self.assertEqual(count, 0)
+
+    def test_legacy_data_is_migrated(self):
+        self.conn.executescript(LEGACY_SCHEMA + """
+            INSERT INTO user(id, name) VALUES (1, 'A');
+            INSERT INTO currency(id, num_code, char_code, name, value)
+            VALUES (1, '840', 'USD', 'Доллар', 90),
+                   (2, '840', 'USD', 'Доллар', 91),
+                   (3, '978', 'EUR', 'Евро', 100);
+            INSERT INTO user_currency(user_id, currency_id)
+            VALUES (1, 1), (1, 2), (1, 3), (1, 3), (2, 3), (1, 99);
+        """)
+
+        db = CurrencyRatesCRUD(self.conn)
+
+        self.assertEqual(db.schema_version, SCHEMA_VERSION)
+        self.assertEqual(sorted(c["id"] for c in db.read_all()), [1, 3])
+        rows = self.conn.execute(
+            "SELECT user_id, currency_id FROM user_currency"
+            " ORDER BY currency_id").fetchall()
+        self.assertEqual([tuple(r) for r in rows], [(1, 1), (1, 3)])
+
+    def test_newer_schema_is_rejected(self):
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        with self.assertRaises(RuntimeError):
+            CurrencyRatesCRUD(self.conn)
+
+
+if __name__ == "__main__":
+    unittest.main()
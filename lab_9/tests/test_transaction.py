@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from controllers.connectionpool import ConnectionPool
+from controllers.currencycontroller import CurrencyController
+from controllers.databasecontroller import CurrencyRatesCRUD
+from models.currency import Currency
+
+
+def _currency(code, value=1.0):
+    return Currency(currency_id=None, char_code=code, value=value,
+                    nominal=1, num_code="001", name="Валюта")
+
+
+class TestTransaction(unittest.TestCase):
+    """Единица работы CurrencyRatesCRUD.transaction()."""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.db = CurrencyRatesCRUD(self.conn)
+
+    def _codes(self):
+        return sorted(c["char_code"] for c in self.db.read_all())
+
+    def test_commit_once_at_the_end(self):
+        with self.db.transaction():
+            self.db.create(_currency("USD"))
+            self.db.create(_currency("EUR"))
+            self.assertTrue(self.conn.in_transaction)
+            self.assertEqual(self._codes(), ["EUR", "USD"])
+        self.assertFalse(self.conn.in_transaction)
+        self.assertFalse(self.db.in_transaction)
+        self.assertEqual(self._codes(), ["EUR", "USD"])
+
+    def test_rollback_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.create(_currency("USD"))
+                raise RuntimeError("boom")
+        self.assertEqual(self._codes(), [])
+        self.assertFalse(self.db.in_transaction)
+
+    def test_nested_savepoint_rolls_back_only_inner_block(self):
+        with self.db.transaction():
+            self.db.create(_currency("USD"))
+            with self.assertRaises(sqlite3.IntegrityError):
+                with self.db.transaction():
+                    self.db.create(_currency("EUR"))
+                    self.db.create(_currency("USD"))
+            self.db.create(_currency("GBP"))
+        self.assertEqual(self._codes(), ["GBP", "USD"])
+
+    def test_upsert_inside_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.upsert_many([_currency("USD")])
+                raise RuntimeError("boom")
+        self.assertEqual(self._codes(), [])
+
+    def test_bulk_controller_methods(self):
+        controller = CurrencyController(self.db)
+        self.db.create_many([_currency("USD"), _currency("EUR")])
+
+        self.assertEqual(controller.update_many({"USD": 2.0, "XXX": 3.0}), 1)
+        self.assertEqual(self.db.get_by_char_code("USD")["value"], 2.0)
+
+        ids = [c["id"] for c in self.db.read_all()]
+        self.assertEqual(controller.delete_many(ids + [999]), 2)
+        self.assertEqual(self._codes(), [])
+
+
+class TestPoolTransaction(unittest.TestCase):
+    """Транзакция в пуле подключений не видна другим потокам до commit."""
+
+    def test_isolation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "test.db")
+            pool = ConnectionPool(path)
+            readers = ConnectionPool(path, readonly=True)
+            db = CurrencyRatesCRUD(pool, read_pool=readers)
+            seen = []
+
+            def count_in_other_thread():
+                thread = threading.Thread(
+                    target=lambda: seen.append(len(db.read_all())))
+                thread.start()
+                thread.join()
+
+            with db.transaction():
+                db.create(_currency("USD"))
+                self.assertEqual(len(db.read_all()), 1)
+                count_in_other_thread()
+            count_in_other_thread()
+
+            self.assertEqual(seen, [0, 1])
+            readers.close()
+            pool.close()
+
+    def test_failed_write_does_not_block_other_threads(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = ConnectionPool(os.path.join(tmp, "test.db"), timeout=0.5)
+            self.addCleanup(pool.close)
+            db = CurrencyRatesCRUD(pool)
+            db.create(_currency("USD"))
+
+            # Повтор char_code нарушает уникальный индекс.
+            with self.assertRaises(sqlite3.IntegrityError):
+                db.create(_currency("USD"))
+            self.assertFalse(db.connection().in_transaction)
+
+            results = []
+            thread = threading.Thread(
+                target=lambda: results.append(db.update("USD", 2.0)))
+            thread.start()
+            thread.join()
+            self.assertEqual(results, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import sqlite3
+import unittest
+
+from controllers.databasecontroller import ChangeSet, CurrencyRatesCRUD
+from models.currency import Currency
+
+
+def _currency(code, value, name="Валюта"):
+    return Currency(currency_id=None, char_code=code, value=value,
+                    nominal=1, num_code="001", name=name)
+
+
+class TestUpsertMany(unittest.TestCase):
+    """Обновление курсов без удаления строк."""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.db = CurrencyRatesCRUD(self.conn)
+
+    def test_change_set(self):
+        changes = self.db.upsert_many([_currency("USD", 90.0),
+                                       _currency("EUR", 100.0)])
+        self.assertEqual(changes, ChangeSet(("USD", "EUR"), (), ()))
+        self.assertTrue(changes)
+
+        changes = self.db.upsert_many([_currency("USD", 91.0),
+                                       _currency("EUR", 100.0),
+                                       _currency("GBP", 110.0)])
+        self.assertEqual(changes, ChangeSet(("GBP",), ("USD",), ("EUR",)))
+        self.assertEqual(self.db.get_by_char_code("USD")["value"], 91.0)
+
+    def test_ids_and_subscriptions_are_kept(self):
+        self.db.upsert_many([_currency("USD", 90.0)])
+        usd_id = self.db.get_by_char_code("USD")["id"]
+        self.conn.execute("INSERT INTO user(id, name) VALUES (1, 'A')")
+        self.conn.execute(
+            "INSERT INTO user_currency(user_id, currency_id) VALUES (1, ?)",
+            (usd_id,))
+        self.conn.commit()
+
+        self.db.upsert_many([_currency("USD", 95.0, name="Доллар США")])
+
+        self.assertEqual(self.db.get_by_char_code("USD")["id"], usd_id)
+        count = self.conn.execute(
+            "SELECT COUNT(*) FROM user_currency").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_unchanged_rows_are_not_written(self):
+        self.db.upsert_many([_currency("USD", 90.0), _currency("EUR", 1.0)])
+        before = self.conn.total_changes
+
+        changes = self.db.upsert_many([_currency("USD", 90.0),
+                                       _currency("EUR", 1.0)])
+
+        self.assertFalse(changes)
+        self.assertEqual(self.conn.total_changes, before)
+
+    def test_missing_codes_are_not_deleted(self):
+        self.db.upsert_many([_currency("USD", 90.0), _currency("EUR", 1.0)])
+        self.db.upsert_many([_currency("USD", 90.0)])
+        self.assertEqual(len(self.db.read_all()), 2)
+
+    def test_empty_input(self):
+        self.assertEqual(self.db.upsert_many([]), ChangeSet((), (), ()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -199,7 +199,9 @@ def setup_currency_file_logger(
     logger_obj.setLevel(logging.INFO)
 
     if not logger_obj.handlers:
-        file_handler = logging.FileHandler(filename, encoding="utf-8")
+        # delay=True: файл открывается при первой записи, а не при импорте.
+        file_handler = logging.FileHandler(filename, encoding="utf-8",
+                                           delay=True)
         formatter = logging.Formatter(
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
@@ -0,0 +1,221 @@
+"""Кэш отрендеренных страниц с инвалидацией по версии данных.
+
+Кроме тела страницы кэш хранит её ``ETag``, время изменения данных
+(``Last-Modified``) и сжатые варианты тела, которые создаются при первом
+запросе с подходящим ``Accept-Encoding``. Brotli используется, только
+если установлен пакет ``brotli``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+# Тела меньше этого размера не сжимаются: выигрыш меньше заголовков.
+MIN_COMPRESS_SIZE = 512
+GZIP_LEVEL = 6
+
+_COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda body: gzip.compress(body, GZIP_LEVEL, mtime=0),
+}
+if brotli is not None:
+    _COMPRESSORS["br"] = brotli.compress
+
+# Порядок предпочтения кодировок, если клиент принимает несколько.
+_PREFERRED_ENCODINGS = ("br", "gzip")
+
+
+def choose_encoding(accept_encoding: str | None, size: int) -> str:
+    """
+    Выбрать кодировку тела по заголовку ``Accept-Encoding``.
+
+    Returns
+    -------
+    str
+        ``"br"``, ``"gzip"`` или ``"identity"``.
+    """
+    if not accept_encoding or size < MIN_COMPRESS_SIZE:
+        return "identity"
+
+    accepted, refused = set(), set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        (accepted if q > 0 else refused).add(name.strip().lower())
+
+    # '*' разрешает только кодировки, которые клиент не отверг явно
+    # (например, "gzip;q=0, *").
+    for encoding in _PREFERRED_ENCODINGS:
+        if encoding not in _COMPRESSORS or encoding in refused:
+            continue
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Проверить ``If-None-Match`` (слабое сравнение, как в RFC 9110)."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag
+                    for tag in candidates)
+
+
+def not_modified_since(if_modified_since: str, modified: float) -> bool:
+    """Данные не менялись после даты из ``If-Modified-Since``."""
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(modified) <= since
+
+
+class CachedPage:
+    """
+    Страница в кэше: тело, ``ETag`` и сжатые варианты.
+
+    ``ETag`` строится из версии данных и хэша тела; у каждого сжатого
+    варианта свой ``ETag`` с суффиксом кодировки.
+    """
+
+    __slots__ = ("body", "version", "modified", "_etag", "_variants")
+
+    def __init__(self, body: bytes, version: int, modified: float) -> None:
+        self.body = body
+        self.version = version
+        self.modified = modified
+        digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self._etag = f"{version}-{digest}"
+        self._variants: dict[str, bytes] = {"identity": body}
+
+    @property
+    def last_modified(self) -> str:
+        """Значение заголовка ``Last-Modified``."""
+        return formatdate(self.modified, usegmt=True)
+
+    def etag(self, encoding: str = "identity") -> str:
+        """``ETag`` варианта страницы в кодировке ``encoding``."""
+        if encoding == "identity":
+            return f'"{self._etag}"'
+        return f'"{self._etag}-{encoding}"'
+
+    def encoded(self, encoding: str) -> bytes:
+        """Тело в кодировке ``encoding`` (сжимается один раз)."""
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = _COMPRESSORS[encoding](self.body)
+            # Гонка двух потоков безопасна: оба получат одинаковые байты.
+            self._variants[encoding] = variant
+        return variant
+
+
+class PageCache:
+    """
+    Кэш готовых HTML-страниц в виде :class:`CachedPage`.
+
+    Ключ записи — маршрут и версия данных. Обработчики, изменяющие данные,
+    вызывают :meth:`bump`: версия увеличивается, и все страницы, собранные
+    по старым данным, перестают находиться в кэше. Страница, которая
+    рендерилась во время изменения, сохраняется под старой версией и
+    поэтому никогда не будет отдана.
+
+    Parameters
+    ----------
+    max_entries : int
+        Максимальное число страниц; при переполнении вытесняется самая
+        старая запись.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pages: dict[str, CachedPage] = {}
+        self._version = 0
+        self._modified = time.time()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        """Текущая версия данных."""
+        return self._version
+
+    def bump(self) -> int:
+        """Отметить изменение данных и вернуть новую версию."""
+        with self._lock:
+            self._version += 1
+            self._modified = time.time()
+            self._pages.clear()
+            return self._version
+
+    def lookup(self, route: str) -> tuple[int, CachedPage | None]:
+        """
+        Найти страницу для текущей версии данных.
+
+        Returns
+        -------
+        tuple[int, CachedPage | None]
+            Версия, для которой выполнялся поиск (её нужно передать в
+            :meth:`store`), и страница или None при промахе.
+        """
+        with self._lock:
+            version = self._version
+            page = self._pages.get(route)
+            if page is not None and page.version == version:
+                self.hits += 1
+                return version, page
+            self.misses += 1
+            return version, None
+
+    def store(self, route: str, version: int, body: bytes) -> CachedPage:
+        """
+        Сохранить страницу, собранную по данным версии ``version``.
+
+        Возвращает :class:`CachedPage` даже если версия уже устарела и
+        страница не попала в кэш.
+        """
+        page = CachedPage(body, version, self._modified)
+        with self._lock:
+            if version != self._version:
+                return page
+            if route not in self._pages and \
+                    len(self._pages) >= self.max_entries:
+                del self._pages[next(iter(self._pages))]
+            self._pages[route] = page
+            return page
+
+    def get_or_render(self, route: str,
+                      render: Callable[[], str]) -> CachedPage:
+        """Вернуть страницу из кэша или отрендерить и сохранить её."""
+        version, page = self.lookup(route)
+        if page is None:
+            page = self.store(route, version, render().encode("utf-8"))
+        return page
+
+    def stats(self) -> dict:
+        """Счётчики попаданий и промахов."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "version": self._version,
+                "entries": len(self._pages),
+            }
@@ -0,0 +1,131 @@
+"""Таблица маршрутов HTTP-обработчика.
+
+Точные пути хранятся в словаре и находятся за O(1). Пути с параметрами
+(``/user/<int:user_id>``) компилируются в регулярные выражения один раз
+при регистрации и группируются по первому сегменту пути, поэтому запрос
+проверяет только шаблоны своей группы, а не всю таблицу.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, NamedTuple
+
+# Конвертеры параметров пути: регулярное выражение и преобразование.
+_CONVERTERS: dict[str, tuple[str, Callable[[str], Any]]] = {
+    "str": (r"[^/]+", str),
+    "int": (r"\d+", int),
+}
+
+_PARAM = re.compile(r"<(?:(?P<converter>\w+):)?(?P<name>\w+)>")
+
+
+class Match(NamedTuple):
+    """Найденный маршрут: обработчик и параметры из пути."""
+
+    handler: Callable[..., Any]
+    path_params: dict[str, Any]
+
+
+def _first_segment(path: str) -> str:
+    return path.lstrip("/").split("/", 1)[0]
+
+
+class Router:
+    """
+    Таблица маршрутов ``путь -> обработчик``.
+
+    Обработчики регистрируются декоратором :meth:`route`:
+
+        router = Router()
+
+        @router.route("/user/<int:user_id>")
+        def handle_user(self, params, user_id): ...
+
+    Шаблон пути может содержать параметры ``<name>`` (любой сегмент) или
+    ``<int:name>`` (целое число); первый сегмент шаблона должен быть
+    постоянным.
+    """
+
+    def __init__(self) -> None:
+        self._exact: dict[str, Callable[..., Any]] = {}
+        self._patterns: dict[
+            str, list[tuple[re.Pattern, dict[str, Callable], Callable]]
+        ] = {}
+        # Формы зарегистрированных шаблонов без имён параметров:
+        # '/user/<int:id>' и '/user/<int:user_id>' — один маршрут.
+        self._shapes: set[str] = set()
+
+    def add(self, pattern: str, handler: Callable[..., Any]) -> None:
+        """
+        Зарегистрировать обработчик для пути или шаблона пути.
+
+        Raises
+        ------
+        ValueError
+            Если маршрут уже зарегистрирован, указан неизвестный
+            конвертер или первый сегмент шаблона содержит параметр.
+        """
+        if not pattern.startswith("/"):
+            raise ValueError(f"route must start with '/': {pattern!r}")
+
+        if _PARAM.search(pattern) is None:
+            if pattern in self._exact:
+                raise ValueError(f"duplicate route: {pattern!r}")
+            self._exact[pattern] = handler
+            return
+
+        prefix = _first_segment(pattern)
+        if _PARAM.search(prefix):
+            raise ValueError(
+                f"first path segment must be static: {pattern!r}")
+
+        regex, converters, pos = [], {}, 0
+        for param in _PARAM.finditer(pattern):
+            name = param["name"]
+            kind = param["converter"] or "str"
+            if kind not in _CONVERTERS:
+                raise ValueError(f"unknown converter {kind!r} in {pattern!r}")
+            part, converters[name] = _CONVERTERS[kind]
+            regex.append(re.escape(pattern[pos:param.start()]))
+            regex.append(f"(?P<{name}>{part})")
+            pos = param.end()
+        regex.append(re.escape(pattern[pos:]))
+
+        shape = _PARAM.sub(lambda m: f"<{m['converter'] or 'str'}>",
+                           pattern)
+        if shape in self._shapes:
+            raise ValueError(f"duplicate route: {pattern!r}")
+        self._shapes.add(shape)
+        self._patterns.setdefault(prefix, []).append(
+            (re.compile("".join(regex)), converters, handler))
+
+    def route(self, pattern: str) -> Callable[[Callable], Callable]:
+        """Декоратор: зарегистрировать функцию для ``pattern``."""
+        def decorator(handler: Callable) -> Callable:
+            self.add(pattern, handler)
+            return handler
+        return decorator
+
+    def resolve(self, path: str) -> Match | None:
+        """
+        Найти обработчик для пути запроса (без строки запроса).
+
+        Returns
+        -------
+        Match | None
+            Обработчик и параметры пути или None, если маршрута нет.
+        """
+        handler = self._exact.get(path)
+        if handler is not None:
+            return Match(handler, {})
+
+        for regex, converters, handler in self._patterns.get(
+                _first_segment(path), ()):
+            found = regex.fullmatch(path)
+            if found is not None:
+                return Match(handler, {
+                    name: converters[name](value)
+                    for name, value in found.groupdict().items()
+                })
+        return None